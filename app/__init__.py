@@ -1,11 +1,21 @@
 from kom_python_core.python_core.logging import LoggingConfig
 import logging
 from flask import Flask
-from flask_cors import CORS
 from flask_migrate import Migrate
 from app.routes import stack_service_bp
+from app.debug_routes import register_debug_routes
 from app.config import get_config
-from app.database import init_db, db
+from app.database import init_db, init_db_breaker, db
+from app.sharding import init_sharding
+from app.service.last_seen_service import init_last_seen
+from app.service.user_cache_service import init_user_cache
+from app.utils.auth import register_authentication
+from app.utils.concurrency_limit import register_concurrency_limit
+from app.utils.cors import register_cors
+from app.utils.deadlines import limit_statements
+from app.utils.error_handlers import register_error_handlers
+from app.utils.profiling import register_profiler
+from app.utils.tracing import register_tracing
 import os
 
 
@@ -19,9 +29,6 @@ logger = logging.get_logger(__name__)
 def create_app():
     app = Flask(__name__)
 
-    # Enable CORS
-    CORS(app)
-
     # Configure Logging
     logger.configure()
     logger.set_log_level(log_level)
@@ -31,15 +38,31 @@ def create_app():
     config = get_config()
     app.config.from_object(config)
     logger.debug("Configuration loaded.")
+    # Logins could not sign tokens; only development and testing default it
+    if not app.config.get("JWT_SECRET_KEY"):
+        raise RuntimeError(f"JWT_SECRET_KEY must be set when FLASK_ENV={config.ENV}")
+
+    # Trace sampled requests first, so their span covers the other hooks
+    register_tracing(app)
 
-    # Initialize the database
+    # Initialize the database and the user shards' engines
     init_db(app)
+    init_db_breaker(app)
+    init_sharding(app)
+    # Statements run for a request are bounded by the request's deadline
+    limit_statements()
     logger.debug("Database has been initialized.")
 
     # Initialize Flask-Migrate
     Migrate(app, db)
     logger.debug("Flask-Migrate has been initialized.")
 
+    # Register the service's CLI commands (the db ones attach on import)
+    from app.cli import debug_cli, users_cli
+
+    app.cli.add_command(users_cli)
+    app.cli.add_command(debug_cli)
+
     # Import models after initializing db and migrate
     from app import models  # Ensure models are imported here
 
@@ -47,6 +70,29 @@ def create_app():
     app.register_blueprint(stack_service_bp)
     logger.debug("Stack service blueprint registered.")
 
+    # User lookup cache, warmed from the last snapshot
+    init_user_cache(app)
+
+    # Resolve bearer tokens and buffer last-seen times of their users
+    init_last_seen(app)
+    register_authentication(app)
+
+    # Map service exceptions to JSON error responses
+    register_error_handlers(app)
+
+    # Debug endpoints, only registered when enabled in the configuration
+    register_debug_routes(app)
+
+    # Per-request profiling, only installed when configured
+    register_profiler(app)
+
+    # Shed requests skip everything but CORS
+    register_concurrency_limit(app)
+
+    # Enable CORS for the configured origins. Outermost, so preflights are
+    # answered first and shed 503s are still readable by browsers.
+    register_cors(app)
+
     # Conditionally register Swagger UI in development environment
     if app.config.get("ENV") == "development":
         register_swagger_ui(app)
@@ -0,0 +1,5 @@
+# app/asgi.py
+
+from app.async_app import create_asgi_app
+
+app = create_asgi_app()
@@ -0,0 +1,49 @@
+# app/async_app.py
+
+import asyncio
+import logging
+
+from quart import Quart, request
+
+from app import create_app
+from app.async_database import init_async_db
+from app.async_routes import async_stack_service_bp
+from app.config import get_config
+from app.utils.auth import register_authentication
+from app.utils.concurrency_limit import register_concurrency_limit
+from app.utils.cors import register_cors
+from app.utils.error_handlers import register_error_handlers
+from app.utils.tracing import register_tracing
+
+logger = logging.getLogger(__name__)
+
+
+def create_asgi_app():
+    """Creates the ASGI app serving the stack routes with async database I/O.
+
+    The Flask app is still created, for its configuration, extensions and
+    app context, which the shared services rely on.
+    """
+    flask_app = create_app()
+    if flask_app.config.get("USER_SHARD_URIS"):
+        # run_service binds one async session, which cannot span shards
+        raise RuntimeError("USER_SHARD_URIS is not supported in ASGI mode")
+
+    app = Quart(__name__)
+    app.config.from_object(get_config())
+    register_tracing(app, request)
+    init_async_db(app, flask_app)
+    app.register_blueprint(async_stack_service_bp)
+    last_seen = flask_app.extensions["last_seen"]
+    register_authentication(app, request, last_seen)
+    register_error_handlers(app, request)
+    register_concurrency_limit(app)
+    # Outermost, as in the Flask app
+    register_cors(app)
+
+    @app.after_serving
+    async def flush_last_seen():
+        await asyncio.to_thread(last_seen.stop)
+
+    logger.info("ASGI application creation complete.")
+    return app
@@ -0,0 +1,53 @@
+# app/async_database.py
+
+from quart import current_app
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import bind_session
+
+# Async driver used for each backend of SQLALCHEMY_DATABASE_URI
+ASYNC_DRIVERS = {"mysql": "mysql+aiomysql", "sqlite": "sqlite+aiosqlite"}
+
+
+def async_database_uri(uri):
+    """Returns ``uri`` with its driver replaced by the backend's async driver."""
+    url = make_url(uri)
+    return url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+
+
+def init_async_db(app, flask_app) -> None:
+    """Creates the async engine for ``app`` from the Flask app's database URI.
+
+    ``flask_app`` is kept so services can run inside its app context.
+    """
+    engine = create_async_engine(
+        async_database_uri(flask_app.config["SQLALCHEMY_DATABASE_URI"]),
+        pool_pre_ping=True,
+    )
+    app.extensions["async_db"] = async_sessionmaker(engine, expire_on_commit=False)
+    app.extensions["flask_app"] = flask_app
+
+    @app.after_serving
+    async def dispose_engine():
+        await engine.dispose()
+
+
+def _call_service(sync_session, flask_app, service_function, args):
+    with flask_app.app_context(), bind_session(sync_session):
+        return service_function(*args)
+
+
+async def run_service(service_function, *args):
+    """Awaits a synchronous service whose queries run on the async engine.
+
+    The service runs against the sync view of an ``AsyncSession`` inside a
+    Flask app context, so each query it makes through ``get_db`` suspends
+    this request instead of blocking the event loop. CPU-bound work must be
+    moved off the loop before calling it.
+    """
+    extensions = current_app.extensions
+    async with extensions["async_db"]() as session:
+        return await session.run_sync(
+            _call_service, extensions["flask_app"], service_function, args
+        )
@@ -0,0 +1,136 @@
+# app/async_routes.py
+
+import asyncio
+
+from quart import Blueprint, current_app
+
+from app.async_database import run_service
+from app.routes import BULK_STATUS_TIMEOUT_SECONDS, CHANGES_TIMEOUT_SECONDS
+from app.schemas.user_schema import (
+    LoginResultSchema,
+    UserBulkStatusSchema,
+    UserChangesPageSchema,
+    UserChangesSchema,
+    UserCreatedRangeSchema,
+    UserListSchema,
+    UserLoginSchema,
+    UserPageSchema,
+    UserSchema,
+    UserSearchSchema,
+    UserStatsSchema,
+)
+from app.service import (
+    user_cache_service,
+    user_events_service,
+    user_service,
+    user_stats_service,
+)
+from app.utils.async_endpoint import async_endpoint
+from app.utils.auth import admin_required, current_user_id, login_required
+from app.utils.deadlines import bounded_wait
+from app.utils.security import hash_password, verify_and_update
+
+# Same routes as app.routes, with handlers that await database I/O
+async_stack_service_bp = Blueprint("stack", __name__, url_prefix="/service/stack")
+
+
+@async_stack_service_bp.route("/health", methods=["GET"])
+async def health():
+    """Health check endpoint to verify that the stack_service is running."""
+    return {"status": "OK"}, 200
+
+
+@async_stack_service_bp.route("/users", methods=["POST"])
+@async_endpoint(load=UserSchema(), dump=UserSchema())
+async def create_user(params):
+    """Creates a user, hashing the password in a worker thread."""
+    password = await asyncio.to_thread(
+        hash_password, params["password"], current_app.config["BCRYPT_ROUNDS"]
+    )
+    return await run_service(user_service.insert_user, {**params, "password": password})
+
+
+@async_stack_service_bp.route("/users/login", methods=["POST"])
+@async_endpoint(load=UserLoginSchema(), dump=LoginResultSchema())
+async def login(params):
+    """Checks a user's credentials and issues a bearer token.
+
+    bcrypt runs in a worker thread.
+    """
+    user = await run_service(user_service.find_login_user, params["login"])
+    verified, new_hash = await asyncio.to_thread(
+        verify_and_update,
+        params["password"],
+        user.password if user else None,
+        current_app.config["BCRYPT_ROUNDS"],
+    )
+    return await run_service(user_service.finish_login, user, verified, new_hash)
+
+
+@async_stack_service_bp.route("/users/me", methods=["GET"])
+@login_required
+@async_endpoint()
+async def current_user():
+    """The user the bearer token belongs to."""
+    return await run_service(user_cache_service.lookup_user, current_user_id.get())
+
+
+@async_stack_service_bp.route("/users/<int:user_id>", methods=["GET"])
+@async_endpoint()
+async def get_user(user_id):
+    """A user's public fields, served from the warm user cache when possible."""
+    return await run_service(user_cache_service.lookup_user, user_id)
+
+
+@async_stack_service_bp.route("/users/changes", methods=["GET"])
+@admin_required
+@async_endpoint(
+    load=UserChangesSchema(),
+    dump=UserChangesPageSchema(),
+    location="query",
+    timeout=CHANGES_TIMEOUT_SECONDS,
+)
+async def user_changes(params):
+    """Change feed of user events; long polls sleep without holding a thread."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + bounded_wait(params["wait"])
+    while True:
+        result, status = await run_service(user_events_service.fetch_changes, params)
+        remaining = deadline - loop.time()
+        if result["events"] or remaining <= 0:
+            return result, status
+        await asyncio.sleep(
+            min(current_app.config["CHANGE_FEED_POLL_SECONDS"], remaining)
+        )
+
+
+@async_stack_service_bp.route("/users/stats", methods=["GET"])
+@admin_required
+@async_endpoint(load=UserStatsSchema(), location="query")
+async def user_stats(params):
+    """User totals and daily signups, read from the maintained rollups."""
+    return await run_service(user_stats_service.get_user_stats, params)
+
+
+@async_stack_service_bp.route("/users/search", methods=["GET"])
+@admin_required
+@async_endpoint(load=UserSearchSchema(), dump=UserListSchema(), location="query")
+async def search_users(params):
+    """Prefix search over usernames, emails and names for type-ahead."""
+    return await run_service(user_service.search_users, params)
+
+
+@async_stack_service_bp.route("/users/created", methods=["GET"])
+@admin_required
+@async_endpoint(load=UserCreatedRangeSchema(), dump=UserPageSchema(), location="query")
+async def list_users_created(params):
+    """Pages through users created in a time range."""
+    return await run_service(user_service.list_users_created, params)
+
+
+@async_stack_service_bp.route("/users/bulk-status", methods=["POST"])
+@admin_required
+@async_endpoint(load=UserBulkStatusSchema(), timeout=BULK_STATUS_TIMEOUT_SECONDS)
+async def bulk_set_active(params):
+    """Activates or deactivates users in bounded batches."""
+    return await run_service(user_service.bulk_set_active, params)
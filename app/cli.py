@@ -0,0 +1,219 @@
+# app/cli.py
+
+import logging
+from datetime import timedelta
+
+import click
+import sqlalchemy as sa
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from flask_migrate import upgrade
+from flask_migrate.cli import db as db_cli
+
+from app.database import db
+from app.models import utcnow
+from app.service.user_events_service import prune_user_events
+from app.service.user_stats_service import reconcile_user_stats
+from app.sharding import is_sharded, shard_count, shard_engine
+from app.utils.index_audit import (
+    collect_indexes,
+    find_redundant_indexes,
+    parse_query_log,
+    suggest_missing_indexes,
+)
+from app.utils.migration_guard import (
+    MIGRATION_LOCK_NAME,
+    advisory_lock,
+    backup_database,
+    is_schema_current,
+)
+from app.utils.profiling import PROFILE_HEADER, sign_profile_request
+from app.utils.security import MAX_ROUNDS, MIN_ROUNDS, calibrate_rounds
+
+logger = logging.getLogger(__name__)
+
+users_cli = AppGroup("users", help="User maintenance commands.")
+debug_cli = AppGroup("debug", help="Diagnostics commands.")
+
+
+@db_cli.command("upgrade-if-needed")
+@click.option(
+    "--backup-dir",
+    default=None,
+    help="Dump the database into this directory before migrating.",
+)
+@click.option(
+    "--lock-timeout",
+    default=600,
+    show_default=True,
+    help="Seconds to wait for another replica to finish migrating.",
+)
+@with_appcontext
+def upgrade_if_needed(backup_dir, lock_timeout) -> None:
+    """Upgrade to head unless the schema is already current.
+
+    With USER_SHARD_URIS set, every user shard is upgraded after the main
+    database the same way.
+    """
+    _upgrade_database(db.engine, "Database", backup_dir, lock_timeout)
+    if is_sharded():
+        for shard in range(shard_count()):
+            _upgrade_database(
+                shard_engine(shard),
+                f"User shard {shard}",
+                backup_dir,
+                lock_timeout,
+                x_arg=[f"shard={shard}"],
+            )
+
+
+def _upgrade_database(engine, label, backup_dir, lock_timeout, x_arg=None) -> None:
+    alembic_config = current_app.extensions["migrate"].migrate.get_config()
+
+    with engine.connect() as connection:
+        if is_schema_current(connection, alembic_config):
+            click.echo(f"{label} schema is at head; skipping migrations.")
+            return
+
+    with engine.connect() as lock_connection:
+        with advisory_lock(lock_connection, MIGRATION_LOCK_NAME, lock_timeout):
+            # Another replica may have migrated while we waited for the lock
+            with engine.connect() as connection:
+                if is_schema_current(connection, alembic_config):
+                    click.echo(f"{label} schema was migrated by another replica.")
+                    return
+            if backup_dir:
+                path = backup_database(engine.url, backup_dir)
+                click.echo(f"{label} backup written to {path}.")
+            if x_arg is None:
+                upgrade()
+            else:
+                upgrade(x_arg=x_arg)
+            click.echo(f"{label}: Alembic migrations completed successfully.")
+
+
+@db_cli.command("index-audit")
+@click.option(
+    "--query-log",
+    type=click.File("r"),
+    default=None,
+    help="Query log (one statement per line) to look for missing indexes.",
+)
+@click.option(
+    "--min-count",
+    default=1,
+    show_default=True,
+    help="Only suggest indexes for predicates seen at least this often.",
+)
+@with_appcontext
+def index_audit(query_log, min_count) -> None:
+    """Report redundant indexes and suggest missing ones."""
+    inspector = sa.inspect(db.engine)
+    indexes_by_table = {}
+    table_columns = {}
+    for table in inspector.get_table_names():
+        if table == "alembic_version":
+            continue
+        indexes_by_table[table] = collect_indexes(inspector, table)
+        table_columns[table] = {c["name"] for c in inspector.get_columns(table)}
+
+    findings = [
+        finding
+        for table, indexes in indexes_by_table.items()
+        for finding in find_redundant_indexes(table, indexes)
+    ]
+    click.echo(f"Redundant indexes: {len(findings)}")
+    for finding in findings:
+        click.echo(f"  {finding.table}.{finding.index} {finding.reason}")
+
+    if query_log is None:
+        return
+    usage = parse_query_log(query_log, table_columns)
+    suggestions = suggest_missing_indexes(indexes_by_table, usage, min_count)
+    click.echo(f"Missing indexes: {len(suggestions)}")
+    for suggestion in suggestions:
+        click.echo(
+            f"  {suggestion.table} ({', '.join(suggestion.columns)}) "
+            f"used by {suggestion.count} queries"
+        )
+
+
+@users_cli.command("reconcile-stats")
+@click.option(
+    "--batch-size",
+    default=10000,
+    show_default=True,
+    help="Users read per chunk.",
+)
+def reconcile_stats(batch_size) -> None:
+    """Rebuild the user counters and daily signup rollup from the users table."""
+    stats = reconcile_user_stats(batch_size)
+    click.echo(
+        f"User stats reconciled: {stats['total']} users, {stats['active']} active, "
+        f"{stats['days']} signup days in {stats['batches']} batches."
+    )
+
+
+@users_cli.command("prune-events")
+@click.option(
+    "--days",
+    default=7,
+    show_default=True,
+    help="Keep events from this many days; consumers must read within it.",
+)
+@click.option(
+    "--batch-size",
+    default=10000,
+    show_default=True,
+    help="Events deleted per transaction.",
+)
+def prune_events(days, batch_size) -> None:
+    """Delete change feed events older than the retention period."""
+    deleted = prune_user_events(utcnow() - timedelta(days=days), batch_size)
+    click.echo(f"Pruned {deleted} user events older than {days} days.")
+
+
+@users_cli.command("calibrate-bcrypt")
+@click.option(
+    "--target-ms",
+    default=250.0,
+    show_default=True,
+    help="Hashing time budget per password on this machine.",
+)
+@click.option("--min-rounds", default=10, show_default=True)
+@click.option("--max-rounds", default=16, show_default=True)
+@click.option("--samples", default=3, show_default=True)
+def calibrate_bcrypt(target_ms, min_rounds, max_rounds, samples) -> None:
+    """Measure bcrypt on this machine and pick BCRYPT_ROUNDS for the target."""
+    if not MIN_ROUNDS <= min_rounds <= max_rounds <= MAX_ROUNDS:
+        raise click.BadParameter(
+            f"Rounds must satisfy {MIN_ROUNDS} <= min <= max <= {MAX_ROUNDS}."
+        )
+    rounds, timings = calibrate_rounds(
+        target_ms / 1000, min_rounds, max_rounds, samples
+    )
+    for cost, seconds in timings.items():
+        click.echo(f"  cost {cost}: {seconds * 1000:.1f} ms")
+    if timings[rounds] > target_ms / 1000:
+        click.echo(f"Warning: even cost {rounds} exceeds {target_ms:g} ms.")
+    current = current_app.config["BCRYPT_ROUNDS"]
+    click.echo(f"BCRYPT_ROUNDS={rounds} (currently {current})")
+    if rounds != current:
+        click.echo("Existing hashes are rehashed at the new cost on their next login.")
+
+
+@debug_cli.command("profile-header")
+@click.argument("method")
+@click.argument("path")
+@click.option(
+    "--ttl",
+    default=300,
+    show_default=True,
+    help="Seconds the signed header stays valid.",
+)
+def profile_header(method, path, ttl) -> None:
+    """Print a signed header that profiles requests to METHOD PATH."""
+    secret = current_app.config.get("PROFILE_SECRET")
+    if not secret:
+        raise click.ClickException("PROFILE_SECRET is not configured.")
+    click.echo(f"{PROFILE_HEADER}: {sign_profile_request(secret, method, path, ttl)}")
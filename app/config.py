@@ -10,6 +10,163 @@ class Config:
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     DEBUG = False
 
+    # In-memory username prefix index used by the user search endpoint. New
+    # users are picked up every USERNAME_INDEX_REFRESH_SECONDS; renames only
+    # once the index is rebuilt, every USERNAME_INDEX_MAX_AGE_SECONDS.
+    USERNAME_INDEX_ENABLED = os.getenv("USERNAME_INDEX_ENABLED", "false") == "true"
+    USERNAME_INDEX_REFRESH_SECONDS = int(
+        os.getenv("USERNAME_INDEX_REFRESH_SECONDS", "30")
+    )
+    USERNAME_INDEX_MAX_AGE_SECONDS = int(
+        os.getenv("USERNAME_INDEX_MAX_AGE_SECONDS", "3600")
+    )
+    USERNAME_INDEX_REFRESH_BATCH = 10000
+
+    # Rows updated per transaction by bulk user operations
+    USER_BULK_BATCH_SIZE = int(os.getenv("USER_BULK_BATCH_SIZE", "500"))
+
+    # Databases the users tables are spread over by a hash of the user id.
+    # Empty keeps them in SQLALCHEMY_DATABASE_URI, which always holds the
+    # user_directory that allocates ids and keeps emails and usernames unique.
+    USER_SHARD_URIS = tuple(
+        uri.strip()
+        for uri in os.getenv("USER_SHARD_URIS", "").split(",")
+        if uri.strip()
+    )
+    # Threads querying each shard for scatter, one per uWSGI request thread,
+    # so concurrent requests never queue behind each other's shard queries
+    USER_SHARD_THREADS = int(os.getenv("USER_SHARD_THREADS", "8"))
+
+    # Per-worker cache of public user fields for lookups by id. Other
+    # workers' writes are only seen once an entry is USER_CACHE_TTL_SECONDS old.
+    USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+    USER_CACHE_TTL_SECONDS = int(os.getenv("USER_CACHE_TTL_SECONDS", "300"))
+    # The USER_CACHE_SNAPSHOT_SIZE hottest entries are saved to this file every
+    # USER_CACHE_SNAPSHOT_SECONDS and loaded by new workers; keep it on a
+    # volume that outlives deploys
+    USER_CACHE_SNAPSHOT_PATH = os.getenv("USER_CACHE_SNAPSHOT_PATH")
+    USER_CACHE_SNAPSHOT_SECONDS = int(os.getenv("USER_CACHE_SNAPSHOT_SECONDS", "60"))
+    USER_CACHE_SNAPSHOT_SIZE = int(os.getenv("USER_CACHE_SNAPSHOT_SIZE", "5000"))
+
+    # Change feed: events become visible once CHANGE_FEED_SETTLE_SECONDS old
+    # by the database's clock, so a slow commit cannot land behind a cursor
+    # that already moved on. Events are the last write of their transaction,
+    # so this must exceed the longest commit (including replication waits).
+    # Long polls re-check the outbox every CHANGE_FEED_POLL_SECONDS. They
+    # bypass the concurrency limiter, so at most CHANGE_FEED_MAX_WAITERS of
+    # them hold a request thread per worker; the rest are answered at once.
+    CHANGE_FEED_SETTLE_SECONDS = float(os.getenv("CHANGE_FEED_SETTLE_SECONDS", "1"))
+    CHANGE_FEED_POLL_SECONDS = float(os.getenv("CHANGE_FEED_POLL_SECONDS", "0.5"))
+    CHANGE_FEED_MAX_WAITERS = int(os.getenv("CHANGE_FEED_MAX_WAITERS", "2"))
+
+    # bcrypt cost factor for new password hashes
+    BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+    # Connection pool per worker process. Each request admitted by the
+    # concurrency limiter holds at most one connection at a time.
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "4"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "2"))
+    MYSQL_ENGINE_OPTIONS = {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_pre_ping": True,
+        "pool_recycle": 3600,
+    }
+
+    # get_db, and each user shard, fail fast with 503 once DB_BREAKER_FAILURE_RATE
+    # of the last DB_BREAKER_WINDOW calls (and at least DB_BREAKER_MIN_CALLS)
+    # could not reach the database. After DB_BREAKER_OPEN_SECONDS a single
+    # trial call checks whether it is back.
+    DB_BREAKER_ENABLED = os.getenv("DB_BREAKER_ENABLED", "true") == "true"
+    DB_BREAKER_FAILURE_RATE = float(os.getenv("DB_BREAKER_FAILURE_RATE", "0.5"))
+    DB_BREAKER_MIN_CALLS = int(os.getenv("DB_BREAKER_MIN_CALLS", "5"))
+    DB_BREAKER_WINDOW = int(os.getenv("DB_BREAKER_WINDOW", "20"))
+    DB_BREAKER_OPEN_SECONDS = float(os.getenv("DB_BREAKER_OPEN_SECONDS", "5"))
+
+    # Reads, and the write transactions of signups, bulk chunks and rehashes,
+    # re-run on deadlocks and lock wait timeouts (all but signups also on lost
+    # connections), up to DB_RETRY_ATTEMPTS times with a full-jitter backoff
+    # of DB_RETRY_BASE_SECONDS doubling per retry, capped at
+    # DB_RETRY_MAX_SECONDS. An endpoint call spends at most DB_RETRY_BUDGET
+    # retries across all its services.
+    DB_RETRY_ATTEMPTS = int(os.getenv("DB_RETRY_ATTEMPTS", "3"))
+    DB_RETRY_BASE_SECONDS = float(os.getenv("DB_RETRY_BASE_SECONDS", "0.05"))
+    DB_RETRY_MAX_SECONDS = float(os.getenv("DB_RETRY_MAX_SECONDS", "1.0"))
+    DB_RETRY_BUDGET = int(os.getenv("DB_RETRY_BUDGET", "3"))
+
+    # Requests let into Flask at once per worker; the rest get an immediate
+    # 503 with Retry-After instead of waiting in the listen backlog. The limit
+    # grows while requests finish within CONCURRENCY_LATENCY_TARGET_SECONDS
+    # and shrinks by CONCURRENCY_LIMIT_BACKOFF when they do not. Its maximum
+    # defaults to the pool size, leaving the overflow to background threads.
+    CONCURRENCY_LIMIT_ENABLED = os.getenv("CONCURRENCY_LIMIT_ENABLED", "true") == "true"
+    CONCURRENCY_LIMIT_INITIAL = int(os.getenv("CONCURRENCY_LIMIT_INITIAL", "4"))
+    CONCURRENCY_LIMIT_MIN = int(os.getenv("CONCURRENCY_LIMIT_MIN", "1"))
+    CONCURRENCY_LIMIT_MAX = int(os.getenv("CONCURRENCY_LIMIT_MAX", str(DB_POOL_SIZE)))
+    CONCURRENCY_LATENCY_TARGET_SECONDS = float(
+        os.getenv("CONCURRENCY_LATENCY_TARGET_SECONDS", "0.5")
+    )
+    CONCURRENCY_LIMIT_BACKOFF = 0.9
+    CONCURRENCY_RETRY_AFTER_SECONDS = 1
+
+    # tracemalloc-backed /debug/memory endpoint; tracing slows every allocation
+    MEMORY_DEBUG_ENABLED = os.getenv("MEMORY_DEBUG_ENABLED", "false") == "true"
+    MEMORY_DEBUG_FRAMES = int(os.getenv("MEMORY_DEBUG_FRAMES", "1"))
+
+    # Per-request profiles are written to PROFILE_DIR for requests sampled at
+    # PROFILE_SAMPLE_RATE or carrying an X-Profile header signed with
+    # PROFILE_SECRET (see `flask debug profile-header`)
+    PROFILE_DIR = os.getenv("PROFILE_DIR")
+    PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+    PROFILE_SECRET = os.getenv("PROFILE_SECRET")
+
+    # Budget of each endpoint call unless its route sets one; clients may ask
+    # for less with X-Request-Timeout. Past it, queries are no longer sent
+    # and MySQL stops running SELECTs (MAX_EXECUTION_TIME).
+    REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "30"))
+
+    # Requests sampled at TRACE_SAMPLE_RATE, or sent with a sampled W3C
+    # traceparent header, have their spans appended as JSON lines to TRACE_FILE
+    TRACE_FILE = os.getenv("TRACE_FILE")
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0"))
+
+    # Browser origins allowed to call the API; preflights are cached this long
+    CORS_ORIGINS = tuple(
+        origin.strip()
+        for origin in os.getenv("CORS_ORIGINS", "").split(",")
+        if origin.strip()
+    )
+    CORS_MAX_AGE = int(os.getenv("CORS_MAX_AGE", "86400"))
+    CORS_SUPPORTS_CREDENTIALS = False
+    # Request headers browsers may send: the token, the client's deadline,
+    # trace context and the signed profiling header
+    CORS_ALLOW_HEADERS = (
+        "Authorization",
+        "Content-Type",
+        "X-Request-Timeout",
+        "traceparent",
+        "X-Profile",
+    )
+    # Response headers scripts may read, for backing off and profiling
+    CORS_EXPOSE_HEADERS = ("Retry-After", "X-Profile-Busy")
+
+    # Bearer tokens issued at login
+    JWT_SECRET_KEY = os.getenv("JWT_SECRET_KEY")
+    JWT_ALGORITHM = "HS256"
+    JWT_EXPIRES_SECONDS = int(os.getenv("JWT_EXPIRES_SECONDS", "3600"))
+    # Users whose tokens may call the admin routes: bulk status, search,
+    # created ranges, stats and the change feed
+    ADMIN_USER_IDS = frozenset(
+        int(user_id)
+        for user_id in os.getenv("ADMIN_USER_IDS", "").split(",")
+        if user_id.strip()
+    )
+
+    # users.last_seen_at is buffered per worker and written in batches every
+    # LAST_SEEN_FLUSH_SECONDS, or sooner once LAST_SEEN_MAX_PENDING users wait
+    LAST_SEEN_FLUSH_SECONDS = float(os.getenv("LAST_SEEN_FLUSH_SECONDS", "5"))
+    LAST_SEEN_MAX_PENDING = int(os.getenv("LAST_SEEN_MAX_PENDING", "1000"))
+
     def __init__(self):
         logger.debug("Base Config class initialized.")
 
@@ -20,12 +177,33 @@ class DevConfig(Config):
     )
     DEBUG = True
     ENV = "development"
+    CORS_ORIGINS = Config.CORS_ORIGINS or (
+        "http://localhost:3000",
+        "http://127.0.0.1:3000",
+    )
+    JWT_SECRET_KEY = Config.JWT_SECRET_KEY or "development-only-jwt-secret-key!"
 
     def __init__(self):
         super().__init__()
         logger.debug("DevConfig initialized with DEBUG=True and ENV=development.")
 
 
+class TestingConfig(Config):
+    # One in-memory database per process, shared by all its connections, so
+    # test runs need no MySQL server and parallel workers never collide
+    SQLALCHEMY_DATABASE_URI = os.getenv("TEST_DATABASE_URL", "sqlite://")
+    TESTING = True
+    ENV = "testing"
+    BCRYPT_ROUNDS = 4
+    JWT_SECRET_KEY = "testing-only-jwt-secret-key-0001"
+    # Tests flush the buffer themselves instead of a background thread
+    LAST_SEEN_FLUSH_SECONDS = 3600.0
+
+    def __init__(self):
+        super().__init__()
+        logger.debug("TestingConfig initialized with ENV=testing.")
+
+
 class StagingConfig(Config):
     DEBUG = True
     ENV = "staging"
@@ -39,6 +217,7 @@ class StagingConfig(Config):
     SQLALCHEMY_DATABASE_URI = (
         f"mysql+pymysql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     )
+    SQLALCHEMY_ENGINE_OPTIONS = Config.MYSQL_ENGINE_OPTIONS
 
     def __init__(self):
         super().__init__()
@@ -58,6 +237,7 @@ class ProdConfig(Config):
     SQLALCHEMY_DATABASE_URI = (
         f"mysql+pymysql://{DB_USERNAME}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
     )
+    SQLALCHEMY_ENGINE_OPTIONS = Config.MYSQL_ENGINE_OPTIONS
 
     def __init__(self):
         super().__init__()
@@ -69,6 +249,8 @@ def get_config():
 
     if env == "development":
         return DevConfig()
+    elif env == "testing":
+        return TestingConfig()
     elif env == "staging":
         return StagingConfig()
     elif env == "production":
@@ -1,9 +1,13 @@
 # app/database.py
 
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.exc import SQLAlchemyError
 from kom_python_core import Logger
-from contextlib import contextmanager
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+
+from app.utils.circuit_breaker import breaker_from_config
 
 # Initialize Flask-SQLAlchemy
 db = SQLAlchemy()
@@ -11,6 +15,9 @@ db = SQLAlchemy()
 # Get the logger
 logger = Logger(__name__)
 
+# Session handed out by get_db instead of db.session while bound
+_bound_session = ContextVar("bound_session", default=None)
+
 
 def init_db(app) -> None:
     """Initializes the database with the Flask app."""
@@ -18,19 +25,48 @@ def init_db(app) -> None:
     logger.debug("Database has been initialized.")
 
 
+def init_db_breaker(app) -> None:
+    """Makes get_db fail fast while the database is unreachable."""
+    breaker = breaker_from_config("Database", app.config)
+    if breaker is not None:
+        app.extensions["db_breaker"] = breaker
+
+
+def _guard():
+    if has_app_context():
+        breaker = current_app.extensions.get("db_breaker")
+        if breaker is not None:
+            return breaker.guard()
+    return nullcontext()
+
+
+@contextmanager
+def bind_session(session):
+    """Makes get_db use ``session`` in the current context."""
+    token = _bound_session.set(session)
+    try:
+        yield session
+    finally:
+        _bound_session.reset(token)
+
+
 @contextmanager
 def get_db():
     """Provides a database session for a request.
-    Closes the session when done.
+    Closes the session when done. While the database circuit breaker is
+    open, raises ServiceUnavailableError instead.
     """
     logger.debug("Getting database session")
-    db_session = db.session
-    try:
-        yield db_session
-    except SQLAlchemyError as e:
-        logger.error(f"Database session rollback due to error: {e}")
-        db_session.rollback()
-        raise
-    finally:
-        db_session.close()
-        logger.debug("Database session closed")
+    db_session = _bound_session.get()
+    if db_session is None:
+        db_session = db.session
+    with _guard():
+        try:
+            yield db_session
+        except SQLAlchemyError as e:
+            logger.error(f"Database session rollback due to error: {e}")
+            db_session.rollback()
+            raise
+        finally:
+            db_session.close()
+            logger.debug("Database session closed")
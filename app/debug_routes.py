@@ -0,0 +1,32 @@
+# app/debug_routes.py
+
+import logging
+
+from flask import Blueprint
+
+from app.schemas.debug_schema import MemoryReportSchema
+from app.utils.endpoint import endpoint
+from app.utils.memory_debug import MemoryTracker
+
+logger = logging.getLogger(__name__)
+
+debug_bp = Blueprint("debug", __name__, url_prefix="/service/stack/debug")
+
+memory_tracker = MemoryTracker()
+
+
+@debug_bp.route("/memory", methods=["GET"])
+@endpoint(load=MemoryReportSchema(), location="query")
+def memory_report(params):
+    """Top allocation sites of this worker and their growth since the last call."""
+    return memory_tracker.report(**params)
+
+
+def register_debug_routes(app) -> None:
+    """Starts tracemalloc and registers the debug endpoints when enabled."""
+    if not app.config.get("MEMORY_DEBUG_ENABLED"):
+        return
+    memory_tracker.frames = app.config["MEMORY_DEBUG_FRAMES"]
+    memory_tracker.start()
+    app.register_blueprint(debug_bp)
+    logger.warning("Memory debug endpoint enabled; allocations are being traced.")
@@ -1 +1,114 @@
-# app/models.py
\ No newline at end of file
+# app/models.py
+
+from datetime import datetime, timezone
+
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+from app.database import db
+
+
+def utcnow() -> datetime:
+    """Returns the current UTC time as a naive datetime, as stored by MySQL."""
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def to_naive_utc(value) -> datetime:
+    """Converts an aware datetime to naive UTC; naive values are assumed UTC."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class db_utcnow(FunctionElement):
+    """The database server's current UTC time, as a naive datetime."""
+
+    type = db.DateTime()
+    inherit_cache = True
+
+
+@compiles(db_utcnow)
+def _compile_db_utcnow(element, compiler, **kw) -> str:
+    # SQLite's CURRENT_TIMESTAMP is already UTC
+    return "CURRENT_TIMESTAMP"
+
+
+@compiles(db_utcnow, "mysql")
+def _compile_mysql_db_utcnow(element, compiler, **kw) -> str:
+    # NOW() and CURRENT_TIMESTAMP follow the session's time zone
+    return "UTC_TIMESTAMP()"
+
+
+class User(db.Model):
+    __tablename__ = "users"
+    __table_args__ = (
+        db.Index("ix_users_is_active_created_at_id", "is_active", "created_at", "id"),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(255), unique=True, index=True, nullable=False)
+    username = db.Column(db.String(150), unique=True, index=True, nullable=False)
+    password = db.Column(db.String(255), nullable=False)
+    first_name = db.Column(db.String(150), index=True, nullable=False)
+    last_name = db.Column(db.String(150), index=True, nullable=False)
+    is_active = db.Column(db.Boolean, default=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=utcnow, nullable=False)
+    # Written in batches by the last-seen write-behind buffer, so it lags
+    # real activity by up to LAST_SEEN_FLUSH_SECONDS
+    last_seen_at = db.Column(db.DateTime, nullable=True)
+
+    def __repr__(self) -> str:
+        return f"<User {self.id} {self.username}>"
+
+
+class UserDirectory(db.Model):
+    """Allocates user ids and keeps emails and usernames unique across shards.
+
+    Always stored in the main database; the user row itself lives on the
+    shard picked from its id (see ``app.sharding``).
+    """
+
+    __tablename__ = "user_directory"
+
+    id = db.Column(db.Integer, primary_key=True)
+    email = db.Column(db.String(255), unique=True, nullable=False)
+    username = db.Column(db.String(150), unique=True, nullable=False)
+
+
+class UserEvent(db.Model):
+    """Outbox of user changes, appended in the transaction that made them.
+
+    Read in id order by the change feed; ids are only ordered per shard.
+    ``created_at`` comes from the shard's clock, which the feed also reads,
+    so app servers' clocks never decide what is visible.
+    """
+
+    __tablename__ = "user_events"
+
+    id = db.Column(
+        db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True
+    )
+    user_id = db.Column(db.Integer, nullable=False)
+    type = db.Column(db.String(32), nullable=False)
+    payload = db.Column(db.JSON, nullable=False)
+    created_at = db.Column(
+        db.DateTime, default=db_utcnow(), index=True, nullable=False
+    )
+
+
+class UserCounter(db.Model):
+    """Running totals over ``users``, updated in the same transaction as writes."""
+
+    __tablename__ = "user_counters"
+
+    name = db.Column(db.String(32), primary_key=True)
+    value = db.Column(db.BigInteger, default=0, nullable=False)
+
+
+class UserDailySignups(db.Model):
+    """Signups per UTC day, updated in the same transaction as user inserts."""
+
+    __tablename__ = "user_daily_signups"
+
+    day = db.Column(db.Date, primary_key=True)
+    signups = db.Column(db.Integer, default=0, nullable=False)
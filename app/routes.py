@@ -1,13 +1,113 @@
 from flask import Blueprint, jsonify
 import logging
+from app.schemas.user_schema import (
+    LoginResultSchema,
+    UserBulkStatusSchema,
+    UserChangesPageSchema,
+    UserChangesSchema,
+    UserCreatedRangeSchema,
+    UserListSchema,
+    UserLoginSchema,
+    UserPageSchema,
+    UserSchema,
+    UserSearchSchema,
+    UserStatsSchema,
+)
+from app.service import (
+    user_cache_service,
+    user_events_service,
+    user_service,
+    user_stats_service,
+)
+from app.utils.auth import admin_required, current_user_id, login_required
+from app.utils.endpoint import endpoint
 
 # Get the logger
 logger = logging.getLogger(__name__)
 
 stack_service_bp = Blueprint("stack", __name__, url_prefix="/service/stack")
 
+# Long polls wait up to 30 s and bulk updates run many batches, so these
+# routes get more than REQUEST_TIMEOUT_SECONDS
+CHANGES_TIMEOUT_SECONDS = 45
+BULK_STATUS_TIMEOUT_SECONDS = 120
+
 
 @stack_service_bp.route("/health", methods=["GET"])
 def health():
     """Health check endpoint to verify that the stack_service is running."""
     return jsonify({"status": "OK"}), 200
+
+
+@stack_service_bp.route("/users", methods=["POST"])
+@endpoint(load=UserSchema(), dump=UserSchema())
+def create_user(params):
+    """Creates a user."""
+    return user_service.create_user(params)
+
+
+@stack_service_bp.route("/users/login", methods=["POST"])
+@endpoint(load=UserLoginSchema(), dump=LoginResultSchema())
+def login(params):
+    """Checks a user's credentials and issues a bearer token."""
+    return user_service.authenticate(params)
+
+
+@stack_service_bp.route("/users/me", methods=["GET"])
+@login_required
+@endpoint()
+def current_user():
+    """The user the bearer token belongs to."""
+    return user_cache_service.lookup_user(current_user_id.get())
+
+
+@stack_service_bp.route("/users/<int:user_id>", methods=["GET"])
+@endpoint()
+def get_user(user_id):
+    """A user's public fields, served from the warm user cache when possible."""
+    return user_cache_service.lookup_user(user_id)
+
+
+@stack_service_bp.route("/users/changes", methods=["GET"])
+@admin_required
+@endpoint(
+    load=UserChangesSchema(),
+    dump=UserChangesPageSchema(),
+    location="query",
+    timeout=CHANGES_TIMEOUT_SECONDS,
+)
+def user_changes(params):
+    """Change feed of user events after a cursor, with optional long polling."""
+    return user_events_service.wait_for_changes(params)
+
+
+@stack_service_bp.route("/users/stats", methods=["GET"])
+@admin_required
+@endpoint(load=UserStatsSchema(), location="query")
+def user_stats(params):
+    """User totals and daily signups, read from the maintained rollups."""
+    return user_stats_service.get_user_stats(params)
+
+
+@stack_service_bp.route("/users/search", methods=["GET"])
+@admin_required
+@endpoint(load=UserSearchSchema(), dump=UserListSchema(), location="query")
+def search_users(params):
+    """Prefix search over usernames, emails and names for type-ahead."""
+    return user_service.search_users(params)
+
+
+@stack_service_bp.route("/users/created", methods=["GET"])
+@admin_required
+@endpoint(load=UserCreatedRangeSchema(), dump=UserPageSchema(), location="query")
+def list_users_created(params):
+    """Pages through users created in a time range."""
+    return user_service.list_users_created(params)
+
+
+@stack_service_bp.route("/users/bulk-status", methods=["POST"])
+@admin_required
+@endpoint(load=UserBulkStatusSchema(), timeout=BULK_STATUS_TIMEOUT_SECONDS)
+def bulk_set_active(params):
+    """Activates or deactivates users in bounded batches."""
+    return user_service.bulk_set_active(params)
@@ -0,0 +1,12 @@
+# app/schemas/debug_schema.py
+
+from marshmallow import Schema, fields, validate
+
+
+class MemoryReportSchema(Schema):
+    top = fields.Int(load_default=20, validate=validate.Range(min=1, max=200))
+    group_by = fields.Str(
+        load_default="lineno",
+        validate=validate.OneOf(["lineno", "filename", "traceback"]),
+    )
+    reset = fields.Bool(load_default=False)
@@ -0,0 +1,134 @@
+# app/schemas/user_schema.py
+
+from marshmallow import (
+    Schema,
+    ValidationError,
+    fields,
+    post_load,
+    validate,
+    validates_schema,
+)
+
+from app.models import to_naive_utc
+
+SEARCH_FIELDS = ("username", "email", "first_name", "last_name")
+MAX_BULK_IDS = 10000
+
+
+class UserSchema(Schema):
+    id = fields.Int(dump_only=True)
+    email = fields.Email(required=True, validate=validate.Length(max=255))
+    username = fields.Str(required=True, validate=validate.Length(min=1, max=150))
+    password = fields.Str(
+        required=True, load_only=True, validate=validate.Length(min=8, max=128)
+    )
+    first_name = fields.Str(required=True, validate=validate.Length(min=1, max=150))
+    last_name = fields.Str(required=True, validate=validate.Length(min=1, max=150))
+    is_active = fields.Bool(dump_only=True)
+    created_at = fields.DateTime(dump_only=True)
+    last_seen_at = fields.DateTime(dump_only=True)
+
+
+class UserLoginSchema(Schema):
+    login = fields.Str(required=True, validate=validate.Length(min=1, max=255))
+    password = fields.Str(required=True, validate=validate.Length(min=1, max=128))
+
+
+class LoginResultSchema(Schema):
+    user = fields.Nested(UserSchema)
+    access_token = fields.Str()
+    token_type = fields.Str()
+    expires_in = fields.Int()
+
+
+class UserListSchema(Schema):
+    users = fields.List(fields.Nested(UserSchema))
+    count = fields.Int()
+
+
+class UserPageSchema(Schema):
+    users = fields.List(fields.Nested(UserSchema))
+    next_cursor = fields.Str(allow_none=True)
+
+
+class UserSearchSchema(Schema):
+    q = fields.Str(required=True, validate=validate.Length(min=1, max=150))
+    search_fields = fields.Str(data_key="fields", load_default=",".join(SEARCH_FIELDS))
+    limit = fields.Int(load_default=10, validate=validate.Range(min=1, max=50))
+
+    @post_load
+    def split_fields(self, data, **kwargs):
+        requested = [f.strip() for f in data["search_fields"].split(",") if f.strip()]
+        unknown = sorted(set(requested) - set(SEARCH_FIELDS))
+        if unknown or not requested:
+            raise ValidationError(
+                f"Must be a comma-separated subset of {', '.join(SEARCH_FIELDS)}.",
+                "fields",
+            )
+        # Keep the caller's priority order but drop duplicates
+        data["search_fields"] = tuple(dict.fromkeys(requested))
+        return data
+
+
+class UserFilterSchema(Schema):
+    created_after = fields.DateTime()
+    created_before = fields.DateTime()
+    email_domain = fields.Str(validate=validate.Length(min=1, max=255))
+
+    @validates_schema
+    def validate_not_empty(self, data, **kwargs):
+        if not data:
+            raise ValidationError("At least one filter is required.")
+
+
+class UserBulkStatusSchema(Schema):
+    is_active = fields.Bool(required=True)
+    ids = fields.List(
+        fields.Int(validate=validate.Range(min=1)),
+        validate=validate.Length(min=1, max=MAX_BULK_IDS),
+    )
+    filter = fields.Nested(UserFilterSchema)
+
+    @validates_schema
+    def validate_target(self, data, **kwargs):
+        if ("ids" in data) == ("filter" in data):
+            raise ValidationError("Exactly one of ids or filter is required.")
+
+
+class UserCreatedRangeSchema(Schema):
+    start = fields.DateTime(required=True)
+    end = fields.DateTime(required=True)
+    active_only = fields.Bool(load_default=True)
+    limit = fields.Int(load_default=100, validate=validate.Range(min=1, max=500))
+    cursor = fields.Str(validate=validate.Length(max=200))
+
+    @post_load
+    def normalize_range(self, data, **kwargs):
+        data["start"] = to_naive_utc(data["start"])
+        data["end"] = to_naive_utc(data["end"])
+        if data["start"] >= data["end"]:
+            raise ValidationError("start must be before end.", "start")
+        return data
+
+
+class UserChangesSchema(Schema):
+    cursor = fields.Str(validate=validate.Length(min=1, max=500))
+    limit = fields.Int(load_default=100, validate=validate.Range(min=1, max=1000))
+    wait = fields.Int(load_default=0, validate=validate.Range(min=0, max=30))
+
+
+class UserEventSchema(Schema):
+    id = fields.Int()
+    user_id = fields.Int()
+    type = fields.Str()
+    payload = fields.Dict()
+    created_at = fields.DateTime()
+
+
+class UserChangesPageSchema(Schema):
+    events = fields.List(fields.Nested(UserEventSchema))
+    next_cursor = fields.Str()
+
+
+class UserStatsSchema(Schema):
+    days = fields.Int(load_default=30, validate=validate.Range(min=1, max=366))
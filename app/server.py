@@ -1,5 +1,9 @@
 # app/server.py
 
 from app import create_app
+from app.utils.fast_path import FastPathMiddleware
 
 app = create_app()
+
+# Probes and metrics scrapes are answered before Flask dispatch
+app.wsgi_app = FastPathMiddleware(app.wsgi_app)
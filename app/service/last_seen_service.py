@@ -0,0 +1,64 @@
+# app/service/last_seen_service.py
+
+import atexit
+import logging
+
+from flask import current_app
+from sqlalchemy import case, update
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models import User, utcnow
+from app.sharding import group_by_shard, shard_session
+from app.utils.exceptions import DatabaseError
+from app.utils.write_behind import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+# Users updated by one UPDATE statement when the buffer is flushed
+LAST_SEEN_BATCH_SIZE = 500
+
+
+def flush_last_seen(app, seen) -> None:
+    """Writes ``{user_id: last_seen_at}`` with one UPDATE per batch of users.
+
+    Ids are sorted so concurrent flushes from several workers lock rows in
+    the same order, and each batch is committed on its own.
+    """
+    with app.app_context():
+        try:
+            for shard, ids in group_by_shard(seen).items():
+                with shard_session(shard) as session:
+                    for i in range(0, len(ids), LAST_SEEN_BATCH_SIZE):
+                        chunk = ids[i : i + LAST_SEEN_BATCH_SIZE]
+                        session.execute(
+                            update(User)
+                            .where(User.id.in_(chunk))
+                            .values(
+                                last_seen_at=case(
+                                    {user_id: seen[user_id] for user_id in chunk},
+                                    value=User.id,
+                                )
+                            )
+                            .execution_options(synchronize_session=False)
+                        )
+                        session.commit()
+        except SQLAlchemyError as e:
+            raise DatabaseError("Failed to update last seen times") from e
+    logger.debug("Flushed last seen times of %d users", len(seen))
+
+
+def init_last_seen(app) -> WriteBehindBuffer:
+    """Creates the app's last-seen buffer, flushed on interval and at exit."""
+    buffer = WriteBehindBuffer(
+        lambda seen: flush_last_seen(app, seen),
+        interval=app.config["LAST_SEEN_FLUSH_SECONDS"],
+        max_pending=app.config["LAST_SEEN_MAX_PENDING"],
+    )
+    app.extensions["last_seen"] = buffer
+    atexit.register(buffer.stop)
+    return buffer
+
+
+def record_last_seen(user_id) -> None:
+    """Marks ``user_id`` as seen now; the row is written on the next flush."""
+    current_app.extensions["last_seen"].put(user_id, utcnow())
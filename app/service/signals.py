@@ -0,0 +1,9 @@
+# app/service/signals.py
+
+from blinker import Namespace
+
+_signals = Namespace()
+
+# Sent with ``ids=[...]`` after user rows were changed outside the ORM unit of
+# work (bulk updates), so in-process caches can drop their copies.
+users_changed = _signals.signal("users-changed")
@@ -0,0 +1,91 @@
+# app/service/user_cache_service.py
+
+import atexit
+import logging
+import threading
+
+from flask import current_app
+
+from app.schemas.user_schema import UserSchema
+from app.service.signals import users_changed
+from app.service.user_service import get_user
+from app.utils.snapshot_cache import SnapshotCache
+
+logger = logging.getLogger(__name__)
+
+_user_schema = UserSchema()
+
+
+@users_changed.connect
+def _invalidate_changed(sender, ids=(), **kwargs) -> None:
+    cache = getattr(sender, "extensions", {}).get("user_cache")
+    if cache is not None:
+        cache.invalidate(ids)
+
+
+def save_user_cache(app) -> int:
+    """Writes the hottest cached users to the snapshot file, if configured."""
+    path = app.config.get("USER_CACHE_SNAPSHOT_PATH")
+    if not path:
+        return 0
+    cache = app.extensions["user_cache"]
+    try:
+        saved = cache.save(path, app.config["USER_CACHE_SNAPSHOT_SIZE"])
+    except OSError:
+        logger.warning("Could not write user cache snapshot %s", path, exc_info=True)
+        return 0
+    logger.debug("Saved %d cached users to %s", saved, path)
+    return saved
+
+
+def _save_periodically(app, stopped) -> None:
+    while not stopped.wait(app.config["USER_CACHE_SNAPSHOT_SECONDS"]):
+        save_user_cache(app)
+
+
+def init_user_cache(app) -> SnapshotCache:
+    """Creates the app's user cache, warmed from the last snapshot.
+
+    With ``USER_CACHE_SNAPSHOT_PATH`` set, the hottest entries are saved
+    every ``USER_CACHE_SNAPSHOT_SECONDS`` and at exit, so the next worker
+    to start serves them without touching the database.
+    """
+    cache = SnapshotCache(
+        app.config["USER_CACHE_SIZE"], app.config["USER_CACHE_TTL_SECONDS"]
+    )
+    app.extensions["user_cache"] = cache
+    path = app.config.get("USER_CACHE_SNAPSHOT_PATH")
+    if not path:
+        return cache
+
+    loaded = cache.load(path)
+    logger.info("Warmed the user cache with %d users from %s", loaded, path)
+    stopped = threading.Event()
+    threading.Thread(
+        target=_save_periodically,
+        args=(app, stopped),
+        name="user-cache-snapshot",
+        daemon=True,
+    ).start()
+
+    def save_at_exit():
+        stopped.set()
+        save_user_cache(app)
+
+    atexit.register(save_at_exit)
+    return cache
+
+
+def lookup_user(user_id):
+    """Returns the public fields of a user, from the cache when possible.
+
+    Changes made by this process drop the cached copy right away; changes
+    made elsewhere show up once the entry expires.
+    """
+    cache = current_app.extensions["user_cache"]
+    data = cache.get(user_id)
+    if data is None:
+        user, _ = get_user(user_id)
+        data = _user_schema.dump(user)
+        cache.put(user_id, data)
+    return data, 200
@@ -0,0 +1,169 @@
+# app/service/user_events_service.py
+
+import base64
+import binascii
+import heapq
+import logging
+import time
+from datetime import timedelta
+
+from flask import current_app
+from sqlalchemy import delete, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models import UserEvent, db_utcnow
+from app.service.signals import users_changed
+from app.sharding import scatter, shard_count, shard_session
+from app.utils.change_notifier import ChangeNotifier
+from app.utils.deadlines import bounded_wait
+from app.utils.exceptions import DatabaseError, ValidationError
+from app.utils.retry import retry_transient
+
+logger = logging.getLogger(__name__)
+
+USER_CREATED = "user.created"
+USER_ACTIVATED = "user.activated"
+USER_DEACTIVATED = "user.deactivated"
+
+# Fields of a user copied into its events; never the password hash
+EVENT_USER_FIELDS = ("id", "email", "username", "first_name", "last_name")
+
+# Woken whenever this process changes users, so long polls answer at once
+change_notifier = ChangeNotifier()
+
+
+@users_changed.connect
+def _notify_change(sender, **kwargs) -> None:
+    change_notifier.notify()
+
+
+def created_event(user) -> dict:
+    payload = {field: getattr(user, field) for field in EVENT_USER_FIELDS}
+    payload["is_active"] = user.is_active
+    payload["created_at"] = user.created_at.isoformat()
+    return {"user_id": user.id, "type": USER_CREATED, "payload": payload}
+
+
+def status_event(user_id, is_active) -> dict:
+    event_type = USER_ACTIVATED if is_active else USER_DEACTIVATED
+    return {"user_id": user_id, "type": event_type, "payload": {"is_active": is_active}}
+
+
+def record_user_events(session, events) -> None:
+    """Appends ``events`` to the outbox in the caller's transaction.
+
+    Their ``created_at`` is the database's time of this insert, so callers
+    must make it the last write before they commit: the feed only covers
+    the time from here to the commit with ``CHANGE_FEED_SETTLE_SECONDS``.
+    """
+    if events:
+        session.execute(insert(UserEvent), events)
+
+
+def _encode_cursor(last_ids) -> str:
+    return base64.urlsafe_b64encode(",".join(map(str, last_ids)).encode()).decode()
+
+
+def _decode_cursor(cursor, count) -> list:
+    if cursor is None:
+        return [0] * count
+    try:
+        last_ids = [
+            int(i) for i in base64.urlsafe_b64decode(cursor).decode().split(",")
+        ]
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValidationError("Invalid cursor") from e
+    # A cursor from before the shard count changed cannot be resumed
+    if len(last_ids) != count:
+        raise ValidationError("Invalid cursor")
+    return last_ids
+
+
+def _events_after(session, after_id, settle, limit) -> list:
+    # Measured on the shard's clock, the one that stamped its events
+    visible_before = session.scalar(select(db_utcnow())) - settle
+    return session.scalars(
+        select(UserEvent)
+        .where(UserEvent.id > after_id, UserEvent.created_at <= visible_before)
+        .order_by(UserEvent.id)
+        .limit(limit)
+    ).all()
+
+
+@retry_transient
+def fetch_changes(params):
+    """Returns up to ``limit`` events after ``cursor`` and the cursor to go on.
+
+    The cursor holds the last event id read from each shard. Every shard
+    is read from its own position by primary key, and the pages are merged
+    by creation time, taking a prefix of each so no event is skipped.
+    """
+    last_ids = _decode_cursor(params.get("cursor"), shard_count())
+    limit = params["limit"]
+    settle = timedelta(seconds=current_app.config["CHANGE_FEED_SETTLE_SECONDS"])
+    try:
+        pages = scatter(_events_after, settle, limit, shard_args=last_ids)
+    except SQLAlchemyError as e:
+        raise DatabaseError("Failed to read user changes") from e
+
+    tagged = [[(event, shard) for event in page] for shard, page in enumerate(pages)]
+    merged = heapq.merge(*tagged, key=lambda item: (item[0].created_at, item[1]))
+    events = []
+    for event, shard in merged:
+        if len(events) >= limit:
+            break
+        events.append(event)
+        last_ids[shard] = event.id
+    return {"events": events, "next_cursor": _encode_cursor(last_ids)}, 200
+
+
+def wait_for_changes(params):
+    """Like ``fetch_changes``, but waits up to ``wait`` seconds for an event.
+
+    Writes made by this process wake the wait right away; other processes'
+    writes are found by re-reading every ``CHANGE_FEED_POLL_SECONDS``.
+    Each waiter holds a request thread, so once ``CHANGE_FEED_MAX_WAITERS``
+    wait in this process, further polls are answered without waiting.
+    """
+    config = current_app.config
+    with change_notifier.waiting(config["CHANGE_FEED_MAX_WAITERS"]) as admitted:
+        wait = bounded_wait(params["wait"]) if admitted else 0
+        deadline = time.monotonic() + wait
+        while True:
+            version = change_notifier.version
+            result, status = fetch_changes(params)
+            remaining = deadline - time.monotonic()
+            if result["events"] or remaining <= 0:
+                return result, status
+            change_notifier.wait(
+                version, min(config["CHANGE_FEED_POLL_SECONDS"], remaining)
+            )
+
+
+def _prune_shard(session, older_than, batch_size) -> int:
+    deleted = 0
+    while True:
+        ids = session.scalars(
+            select(UserEvent.id)
+            .where(UserEvent.created_at < older_than)
+            .order_by(UserEvent.id)
+            .limit(batch_size)
+        ).all()
+        if not ids:
+            return deleted
+        session.execute(delete(UserEvent).where(UserEvent.id.in_(ids)))
+        session.commit()
+        deleted += len(ids)
+
+
+def prune_user_events(older_than, batch_size) -> int:
+    """Deletes events created before ``older_than``, in short transactions."""
+    deleted = 0
+    try:
+        for shard in range(shard_count()):
+            with shard_session(shard) as session:
+                deleted += _prune_shard(session, older_than, batch_size)
+    except SQLAlchemyError as e:
+        raise DatabaseError("Failed to prune user events") from e
+    logger.info("Pruned %d user events created before %s", deleted, older_than)
+    return deleted
@@ -0,0 +1,484 @@
+# app/service/user_service.py
+
+import base64
+import binascii
+import heapq
+import itertools
+import logging
+import operator
+import time
+from datetime import datetime
+
+from flask import current_app
+from sqlalchemy import and_, delete, or_, select, update
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from app.database import get_db
+from app.models import User, UserDirectory, to_naive_utc
+from app.service.last_seen_service import record_last_seen
+from app.service.signals import users_changed
+from app.service.user_events_service import (
+    created_event,
+    record_user_events,
+    status_event,
+)
+from app.service.user_stats_service import record_active_change, record_users_created
+from app.sharding import (
+    group_by_shard,
+    scatter,
+    shard_count,
+    shard_session,
+    user_session,
+)
+from app.utils.deadlines import without_deadline
+from app.utils.exceptions import (
+    AuthenticationError,
+    DatabaseError,
+    NotFoundError,
+    ValidationError,
+)
+from app.utils.prefix_index import PrefixIndex
+from app.utils.retry import LOCK_MYSQL_ERRORS, retry_transient
+from app.utils.security import hash_password, verify_and_update
+from app.utils.tokens import issue_token
+
+logger = logging.getLogger(__name__)
+
+# Per-worker index of usernames, refreshed incrementally from the users table
+username_index = PrefixIndex()
+
+
+def create_user(params):
+    """Creates a user and counts it in the user stats in the same transaction."""
+    return insert_user({**params, "password": hash_password(params["password"])})
+
+
+def _allocate_user_id(email, username) -> int:
+    """Claims ``email`` and ``username`` in the directory; returns the new id."""
+    with get_db() as session:
+        entry = UserDirectory(email=email, username=username)
+        session.add(entry)
+        session.flush()
+        user_id = entry.id
+        session.commit()
+    return user_id
+
+
+def _release_user_id(user_id) -> None:
+    try:
+        # Also after the request ran out of time, or the claim is orphaned
+        with without_deadline(), get_db() as session:
+            session.execute(delete(UserDirectory).where(UserDirectory.id == user_id))
+            session.commit()
+    except SQLAlchemyError:
+        logger.error("Could not release directory entry %s", user_id, exc_info=True)
+
+
+@retry_transient(codes=LOCK_MYSQL_ERRORS)
+def _write_user(user_id, params):
+    """Writes the user and its stats and event to its shard, in one transaction.
+
+    Re-run on deadlocks and lock wait timeouts, which the signup counter
+    upserts can hit under load, but not after a lost connection, when the
+    row may already have been committed.
+    """
+    user = User(id=user_id, **params)
+    with user_session(user_id) as session:
+        session.add(user)
+        session.flush()
+        record_users_created(session, [user])
+        record_user_events(session, [created_event(user)])
+        # Detached before the commit so its attributes are not expired
+        # and the caller can serialize it without reloading the row
+        session.expunge(user)
+        session.commit()
+    return user
+
+
+def insert_user(params):
+    """Like ``create_user``, for a ``password`` that is already hashed.
+
+    The id, email and username are claimed in the directory first, then
+    the row is written to the shard picked from the id. The claim is
+    released again if that write fails for any reason, including the
+    request deadline. Only a worker dying in between, or the release
+    failing too (which is logged), leaves a directory entry without a user.
+    """
+    try:
+        user_id = _allocate_user_id(params["email"], params["username"])
+    except IntegrityError as e:
+        raise ValidationError("Email or username is already taken") from e
+    except SQLAlchemyError as e:
+        raise DatabaseError("Failed to create user") from e
+
+    try:
+        user = _write_user(user_id, params)
+    except SQLAlchemyError as e:
+        _release_user_id(user_id)
+        if isinstance(e, IntegrityError):
+            raise ValidationError("Email or username is already taken") from e
+        raise DatabaseError("Failed to create user") from e
+    except BaseException:
+        _release_user_id(user_id)
+        raise
+
+    users_changed.send(current_app._get_current_object(), ids=[user.id])
+    return user, 201
+
+
+@retry_transient
+def get_user(user_id):
+    """Returns the user with ``user_id``."""
+    try:
+        with user_session(user_id) as session:
+            user = session.get(User, user_id)
+    except SQLAlchemyError as e:
+        raise DatabaseError("Failed to load user") from e
+    if user is None:
+        raise NotFoundError("User not found")
+    return user, 200
+
+
+def authenticate(params):
+    """Checks a username or email and password pair and issues a token.
+
+    A hash whose cost differs from ``BCRYPT_ROUNDS`` is replaced on
+    success, so stored hashes follow the configured cost over time.
+    """
+    user = find_login_user(params["login"])
+    verified, new_hash = verify_and_update(
+        params["password"], user.password if user else None
+    )
+    return finish_login(user, verified, new_hash)
+
+
+@retry_transient
+def find_login_user(login):
+    """Returns the user whose username or email is ``login``, or None."""
+    try:
+        with get_db() as session:
+            user_id = session.scalars(
+                select(UserDirectory.id).where(
+                    or_(UserDirectory.username == login, UserDirectory.email == login)
+                )
+            ).first()
+        if user_id is None:
+            return None
+        with user_session(user_id) as session:
+            return session.get(User, user_id)
+    except SQLAlchemyError as e:
+        raise DatabaseError("Failed to load user") from e
+
+
+def finish_login(user, verified, new_hash):
+    """Completes ``authenticate`` once the password check has run."""
+    if user is None or not verified or not user.is_active:
+        raise AuthenticationError("Invalid credentials")
+    if new_hash is not None:
+        _replace_password_hash(user, new_hash)
+    record_last_seen(user.id)
+    return {"user": user, **issue_token(user.id)}, 200
+
+
+@retry_transient
+def _write_password_hash(user_id, old_hash, new_hash) -> None:
+    with user_session(user_id) as session:
+        # Only replace the hash that was verified, never a newer password
+        session.execute(
+            update(User)
+            .where(User.id == user_id, User.password == old_hash)
+            .values(password=new_hash)
+        )
+        session.commit()
+
+
+def _replace_password_hash(user, new_hash) -> None:
+    try:
+        _write_password_hash(user.id, user.password, new_hash)
+    except SQLAlchemyError:
+        # The login itself succeeded; the hash is upgraded on a later login
+        logger.warning("Could not rehash password of user %s", user.id, exc_info=True)
+        return
+    user.password = new_hash
+    logger.info("Rehashed password of user %s", user.id)
+
+
+def _escape_like(value) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def _id_username_page(session, after_id, batch_size) -> list:
+    return session.execute(
+        select(User.id, User.username)
+        .where(User.id > after_id)
+        .order_by(User.id)
+        .limit(batch_size)
+    ).all()
+
+
+def _username_index_ready() -> bool:
+    """Refreshes the username index when due and tells whether it can be used."""
+    config = current_app.config
+    if not config.get("USERNAME_INDEX_ENABLED"):
+        return False
+
+    built_at = username_index.built_at
+    if (
+        built_at is not None
+        and time.monotonic() - built_at >= config["USERNAME_INDEX_MAX_AGE_SECONDS"]
+    ):
+        # Renames are not tracked, so rebuild to bound how stale keys get
+        username_index.clear()
+        logger.info("Username index cleared for a rebuild")
+
+    refreshed_at = username_index.refreshed_at
+    if (
+        refreshed_at is None
+        or not username_index.complete
+        or time.monotonic() - refreshed_at >= config["USERNAME_INDEX_REFRESH_SECONDS"]
+    ):
+
+        def fetch_rows(after_id, batch_size):
+            pages = scatter(_id_username_page, after_id, batch_size)
+            rows = heapq.merge(*pages, key=operator.attrgetter("id"))
+            return list(rows)[:batch_size]
+
+        loaded = username_index.refresh(
+            fetch_rows, config["USERNAME_INDEX_REFRESH_BATCH"]
+        )
+        logger.debug("Username index refreshed with %d new rows", loaded)
+    return username_index.complete
+
+
+def _search_username_index(prefix, limit) -> list:
+    ids = username_index.search(prefix, limit)
+    users = {}
+    for shard, shard_ids in group_by_shard(ids).items():
+        with shard_session(shard) as session:
+            users.update(
+                (u.id, u)
+                for u in session.scalars(select(User).where(User.id.in_(shard_ids)))
+            )
+    # Entries may be stale after a rename; only keep rows that still match
+    folded = prefix.casefold()
+    return [
+        users[i]
+        for i in ids
+        if i in users and users[i].username.casefold().startswith(folded)
+    ]
+
+
+def _prefix_page(session, field, pattern, limit) -> list:
+    column = getattr(User, field)
+    return session.scalars(
+        select(User)
+        .where(column.like(pattern, escape="\\"))
+        .order_by(column)
+        .limit(limit)
+    ).all()
+
+
+@retry_transient
+def search_users(params):
+    """Returns users whose username, email or names start with ``q``.
+
+    Each requested field is searched with an index-friendly ``LIKE 'q%'``
+    ordered by that field, in the order the fields were given, until
+    ``limit`` distinct users are found. Every shard is asked for ``limit``
+    matches and their ordered pages are merged.
+    """
+    prefix, limit = params["q"], params["limit"]
+    pattern = f"{_escape_like(prefix)}%"
+    found = {}
+    try:
+        for field in params["search_fields"]:
+            if len(found) >= limit:
+                break
+            if field == "username" and _username_index_ready():
+                users = _search_username_index(prefix, limit)
+            else:
+                pages = scatter(_prefix_page, field, pattern, limit)
+                users = heapq.merge(*pages, key=operator.attrgetter(field))
+            for user in users:
+                if len(found) >= limit:
+                    break
+                found.setdefault(user.id, user)
+    except SQLAlchemyError as e:
+        raise DatabaseError("Failed to search users") from e
+
+    return {"users": list(found.values()), "count": len(found)}, 200
+
+
+def _filter_clauses(user_filter) -> list:
+    clauses = []
+    if "created_after" in user_filter:
+        clauses.append(User.created_at >= to_naive_utc(user_filter["created_after"]))
+    if "created_before" in user_filter:
+        clauses.append(User.created_at < to_naive_utc(user_filter["created_before"]))
+    if "email_domain" in user_filter:
+        domain = _escape_like(user_filter["email_domain"].lstrip("@"))
+        clauses.append(User.email.like(f"%@{domain}", escape="\\"))
+    return clauses
+
+
+def _filtered_id_chunks(shard, user_filter, batch_size):
+    """Yields the ids on ``shard`` matching ``user_filter``, in id order, by chunk.
+
+    Each chunk is read with its own keyset query, in its own short
+    transaction, so no statement scans more than the rows between two
+    consecutive chunks and no snapshot stays open while they are updated.
+    """
+    clauses = _filter_clauses(user_filter)
+    last_id = 0
+    while True:
+        with shard_session(shard) as session:
+            ids = session.scalars(
+                select(User.id)
+                .where(User.id > last_id, *clauses)
+                .order_by(User.id)
+                .limit(batch_size)
+            ).all()
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+@retry_transient
+def _set_chunk_active(shard, chunk, is_active) -> list:
+    """Sets ``is_active`` on the ids of ``chunk``; returns those it changed.
+
+    A failed attempt is rolled back whole, and the next one locks and
+    re-reads the rows still to change, so counts and events stay exact.
+    """
+    with shard_session(shard) as session:
+        # Locked first so the outbox names exactly the rows changed
+        changed = session.scalars(
+            select(User.id)
+            .where(User.id.in_(chunk), User.is_active != is_active)
+            .with_for_update()
+        ).all()
+        if changed:
+            session.execute(
+                update(User)
+                .where(User.id.in_(changed))
+                .values(is_active=is_active)
+                .execution_options(synchronize_session=False)
+            )
+            delta = len(changed) if is_active else -len(changed)
+            record_active_change(session, delta)
+            record_user_events(session, [status_event(i, is_active) for i in changed])
+        session.commit()
+    return changed
+
+
+def bulk_set_active(params):
+    """Activates or deactivates users by id list or filter in short batches.
+
+    Every chunk of at most ``USER_BULK_BATCH_SIZE`` ids is updated with one
+    ``UPDATE ... WHERE id IN (...)`` and committed right away, so row locks
+    are only held for a single chunk. The active user counter is adjusted by
+    the rows each chunk changed, and an event is appended to the outbox for
+    each of them, in that chunk's transaction. A chunk that hits a deadlock
+    or lock wait timeout is retried on its own. Shards are updated one after
+    another.
+    """
+    is_active = params["is_active"]
+    batch_size = current_app.config["USER_BULK_BATCH_SIZE"]
+    shard_ids = group_by_shard(params["ids"]) if "ids" in params else None
+    processed = updated = batches = 0
+    try:
+        for shard in range(shard_count()):
+            if shard_ids is not None:
+                ids = shard_ids.get(shard, [])
+                chunks = (
+                    ids[i : i + batch_size] for i in range(0, len(ids), batch_size)
+                )
+            else:
+                chunks = _filtered_id_chunks(shard, params["filter"], batch_size)
+
+            for chunk in chunks:
+                changed = _set_chunk_active(shard, chunk, is_active)
+                batches += 1
+                processed += len(chunk)
+                updated += len(changed)
+                users_changed.send(current_app._get_current_object(), ids=chunk)
+                logger.info(
+                    "Bulk status update batch %d: %d users processed, %d updated",
+                    batches,
+                    processed,
+                    updated,
+                )
+    except SQLAlchemyError as e:
+        raise DatabaseError(
+            f"Bulk status update stopped after {batches} batches"
+        ) from e
+
+    return {
+        "is_active": is_active,
+        "processed": processed,
+        "updated": updated,
+        "batches": batches,
+    }, 200
+
+
+def _encode_cursor(user) -> str:
+    key = f"{user.created_at.isoformat()}|{user.id}"
+    return base64.urlsafe_b64encode(key.encode()).decode()
+
+
+def _decode_cursor(cursor):
+    try:
+        created_at, user_id = base64.urlsafe_b64decode(cursor).decode().split("|")
+        return datetime.fromisoformat(created_at), int(user_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValidationError("Invalid cursor") from e
+
+
+def _created_pages(session, statuses, clauses, limit) -> list:
+    return [
+        session.scalars(
+            select(User)
+            .where(User.is_active == is_active, *clauses)
+            .order_by(User.created_at, User.id)
+            .limit(limit + 1)
+        ).all()
+        for is_active in statuses
+    ]
+
+
+@retry_transient
+def list_users_created(params):
+    """Pages through users created in ``[start, end)`` by ``(created_at, id)``.
+
+    Each page seeks on ``ix_users_is_active_created_at_id`` past the cursor
+    and reads at most ``limit + 1`` index entries per ``is_active`` value, so
+    a page costs the same at the start and the end of the range. Without
+    ``active_only`` both values are read and merged, as are the pages of
+    all shards.
+    """
+    limit = params["limit"]
+    clauses = [User.created_at >= params["start"], User.created_at < params["end"]]
+    if "cursor" in params:
+        created_at, user_id = _decode_cursor(params["cursor"])
+        clauses.append(
+            or_(
+                User.created_at > created_at,
+                and_(User.created_at == created_at, User.id > user_id),
+            )
+        )
+    statuses = (True,) if params["active_only"] else (True, False)
+    try:
+        pages = scatter(_created_pages, statuses, clauses, limit)
+    except SQLAlchemyError as e:
+        raise DatabaseError("Failed to list users") from e
+
+    merged = heapq.merge(
+        *itertools.chain.from_iterable(pages),
+        key=lambda user: (user.created_at, user.id),
+    )
+    page = list(itertools.islice(merged, limit + 1))
+    has_more = len(page) > limit
+    page = page[:limit]
+    next_cursor = _encode_cursor(page[-1]) if has_more else None
+    return {"users": page, "next_cursor": next_cursor}, 200
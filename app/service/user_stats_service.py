@@ -0,0 +1,161 @@
+# app/service/user_stats_service.py
+
+import logging
+from collections import Counter
+from datetime import timedelta
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.exc import SQLAlchemyError
+
+from app.models import User, UserCounter, UserDailySignups, utcnow
+from app.sharding import scatter, shard_count, shard_session
+from app.utils.exceptions import DatabaseError
+from app.utils.retry import retry_transient
+
+logger = logging.getLogger(__name__)
+
+TOTAL = "total"
+ACTIVE = "active"
+
+
+def _increment(session, model, key, column, delta) -> None:
+    """Adds ``delta`` to ``column`` of the row at ``key``, creating it if missing.
+
+    Runs as one ``INSERT ... ON DUPLICATE KEY UPDATE`` (``ON CONFLICT`` on
+    SQLite), so concurrent writers never lose an increment.
+    """
+    values = {**key, column: delta}
+    increment = {column: getattr(model, column) + delta}
+    if session.get_bind().dialect.name == "mysql":
+        stmt = mysql.insert(model).values(**values).on_duplicate_key_update(increment)
+    else:
+        stmt = (
+            sqlite.insert(model)
+            .values(**values)
+            .on_conflict_do_update(index_elements=list(key), set_=increment)
+        )
+    session.execute(stmt)
+
+
+def record_users_created(session, users) -> None:
+    """Counts newly inserted ``users`` in the caller's transaction."""
+    if not users:
+        return
+    _increment(session, UserCounter, {"name": TOTAL}, "value", len(users))
+    active = sum(1 for user in users if user.is_active)
+    if active:
+        _increment(session, UserCounter, {"name": ACTIVE}, "value", active)
+    for day, signups in sorted(Counter(u.created_at.date() for u in users).items()):
+        _increment(session, UserDailySignups, {"day": day}, "signups", signups)
+
+
+def record_active_change(session, delta) -> None:
+    """Adjusts the active user count in the caller's transaction."""
+    if delta:
+        _increment(session, UserCounter, {"name": ACTIVE}, "value", delta)
+
+
+def _read_stats(session, first_day):
+    counters = session.execute(
+        select(UserCounter.name, UserCounter.value).where(
+            UserCounter.name.in_((TOTAL, ACTIVE))
+        )
+    ).all()
+    signups = session.execute(
+        select(UserDailySignups.day, UserDailySignups.signups).where(
+            UserDailySignups.day >= first_day
+        )
+    ).all()
+    return counters, signups
+
+
+@retry_transient
+def get_user_stats(params):
+    """Returns user totals and signups for the last ``days`` UTC days.
+
+    Reads two counter rows and at most ``days`` rollup rows per shard,
+    regardless of how many users exist, and adds them up. Days without
+    signups are reported as zero.
+    """
+    today = utcnow().date()
+    first_day = today - timedelta(days=params["days"] - 1)
+    counters, signups = Counter(), Counter()
+    try:
+        for shard_counters, shard_signups in scatter(_read_stats, first_day):
+            counters.update(dict(shard_counters))
+            signups.update(dict(shard_signups))
+    except SQLAlchemyError as e:
+        raise DatabaseError("Failed to read user stats") from e
+
+    daily = []
+    day = first_day
+    while day <= today:
+        daily.append({"day": day.isoformat(), "signups": signups.get(day, 0)})
+        day += timedelta(days=1)
+    return {
+        "total": counters.get(TOTAL, 0),
+        "active": counters.get(ACTIVE, 0),
+        "daily_signups": daily,
+    }, 200
+
+
+def _reconcile_shard(session, batch_size) -> dict:
+    total = active = batches = 0
+    signups = Counter()
+    last_id = 0
+    while True:
+        rows = session.execute(
+            select(User.id, User.is_active, User.created_at)
+            .where(User.id > last_id)
+            .order_by(User.id)
+            .limit(batch_size)
+        ).all()
+        # End the read transaction so no snapshot is held between chunks
+        session.commit()
+        if not rows:
+            break
+        batches += 1
+        total += len(rows)
+        active += sum(1 for row in rows if row.is_active)
+        signups.update(row.created_at.date() for row in rows)
+        last_id = rows[-1].id
+        logger.info("Reconciled %d users in %d batches", total, batches)
+
+    session.execute(delete(UserDailySignups))
+    if signups:
+        session.execute(
+            insert(UserDailySignups),
+            [{"day": d, "signups": n} for d, n in sorted(signups.items())],
+        )
+    session.execute(delete(UserCounter))
+    session.execute(
+        insert(UserCounter),
+        [{"name": TOTAL, "value": total}, {"name": ACTIVE, "value": active}],
+    )
+    session.commit()
+    return {"total": total, "active": active, "signups": signups, "batches": batches}
+
+
+def reconcile_user_stats(batch_size) -> dict:
+    """Rebuilds the counters and daily rollup of every shard from ``users``.
+
+    Users are read in primary key chunks of ``batch_size``, each in its own
+    short transaction, and the rebuilt rows are written in a final one.
+    Users created or changed while the scan runs may be miscounted, so run
+    it when write traffic is low.
+    """
+    total = active = batches = 0
+    signups = Counter()
+    try:
+        for shard in range(shard_count()):
+            with shard_session(shard) as session:
+                stats = _reconcile_shard(session, batch_size)
+            total += stats["total"]
+            active += stats["active"]
+            batches += stats["batches"]
+            signups.update(stats["signups"])
+    except SQLAlchemyError as e:
+        raise DatabaseError("Failed to reconcile user stats") from e
+
+    return {"total": total, "active": active, "days": len(signups), "batches": batches}
@@ -0,0 +1,134 @@
+# app/sharding.py
+
+import contextvars
+import zlib
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager, nullcontext
+
+from flask import current_app
+from sqlalchemy import create_engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from app.database import db, get_db
+from app.utils.circuit_breaker import breaker_from_config
+
+# Tables that live on every shard; everything else stays in the main database
+SHARDED_TABLES = ("users", "user_events", "user_counters", "user_daily_signups")
+
+
+class UserShards:
+    """Engines of the user shards and the threads that query them in parallel."""
+
+    def __init__(self, uris, engine_options, config=None) -> None:
+        self.engines = [create_engine(uri, **engine_options) for uri in uris]
+        # One circuit breaker per shard, so one shard's outage spares the rest
+        self.breakers = [
+            breaker_from_config(f"User shard {n}", config or {})
+            for n in range(len(uris))
+        ]
+        # Shared by the worker's request threads, each of which may query
+        # every shard at once
+        threads = (config or {}).get("USER_SHARD_THREADS", 1)
+        self.executor = ThreadPoolExecutor(
+            max_workers=len(uris) * threads, thread_name_prefix="user-shards"
+        )
+
+
+def init_sharding(app) -> None:
+    """Creates an engine per ``USER_SHARD_URIS`` entry.
+
+    Without shard URIs the users tables stay in the main database, which
+    then acts as the only shard.
+    """
+    uris = app.config.get("USER_SHARD_URIS")
+    if uris:
+        options = app.config.get("SQLALCHEMY_ENGINE_OPTIONS") or {}
+        app.extensions["user_shards"] = UserShards(uris, options, app.config)
+
+
+def is_sharded() -> bool:
+    return "user_shards" in current_app.extensions
+
+
+def shard_count() -> int:
+    if not is_sharded():
+        return 1
+    return len(current_app.extensions["user_shards"].engines)
+
+
+def shard_of(user_id) -> int:
+    """Returns the shard holding ``user_id``; stable across processes."""
+    return zlib.crc32(int(user_id).to_bytes(8, "big")) % shard_count()
+
+
+def shard_engine(shard):
+    if not is_sharded():
+        return db.engine
+    return current_app.extensions["user_shards"].engines[shard]
+
+
+@contextmanager
+def shard_session(shard):
+    """Provides a session on ``shard``, like ``get_db`` does for the main one."""
+    if not is_sharded():
+        with get_db() as session:
+            yield session
+        return
+    breaker = current_app.extensions["user_shards"].breakers[shard]
+    with breaker.guard() if breaker is not None else nullcontext():
+        session = Session(shard_engine(shard))
+        try:
+            yield session
+        except SQLAlchemyError:
+            session.rollback()
+            raise
+        finally:
+            session.close()
+
+
+def user_session(user_id):
+    """Provides a session on the shard holding ``user_id``."""
+    return shard_session(shard_of(user_id))
+
+
+def group_by_shard(user_ids) -> dict:
+    """Returns ``{shard: sorted ids}`` for the shards holding ``user_ids``."""
+    groups = defaultdict(list)
+    for user_id in sorted(set(user_ids)):
+        groups[shard_of(user_id)].append(user_id)
+    return dict(sorted(groups.items()))
+
+
+def _run_on_shard(app, shard, fn, args):
+    with app.app_context(), shard_session(shard) as session:
+        return fn(session, *args)
+
+
+def scatter(fn, *args, shard_args=None) -> list:
+    """Calls ``fn(session, *args)`` on every shard and returns their results.
+
+    With ``shard_args``, shard ``n`` gets ``shard_args[n]`` right after its
+    session. Shards are queried in parallel, so a list query takes as long
+    as the slowest shard. Results are in shard order; the first error is
+    raised.
+    """
+    count = shard_count()
+    calls = [
+        args if shard_args is None else (shard_args[shard], *args)
+        for shard in range(count)
+    ]
+    if count == 1:
+        with shard_session(0) as session:
+            return [fn(session, *calls[0])]
+    app = current_app._get_current_object()
+    executor = app.extensions["user_shards"].executor
+    # Each shard's thread runs in a copy of this context, for the trace span
+    futures = [
+        executor.submit(
+            contextvars.copy_context().run, _run_on_shard, app, shard, fn, calls[shard]
+        )
+        for shard in range(count)
+    ]
+    return [future.result() for future in futures]
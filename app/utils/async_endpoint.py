@@ -0,0 +1,39 @@
+# app/utils/async_endpoint.py
+
+import functools
+
+from quart import current_app, request
+
+from app.utils.endpoint import dump_stage, endpoint_call, load_stage, view_stage
+
+
+async def _query_data():
+    return request.args
+
+
+async def _json_data():
+    return await request.get_json(silent=True)
+
+
+_LOCATIONS = {"query": _query_data, "json": _json_data}
+
+
+def async_endpoint(load=None, dump=None, location="json", status=200, timeout=None):
+    """The ``endpoint`` decorator for coroutine views of the ASGI app."""
+    read = _LOCATIONS[location]
+
+    def decorator(view):
+        route = view.__name__
+
+        @functools.wraps(view)
+        async def wrapper(*args, **kwargs):
+            with endpoint_call(route, current_app.config, request.headers, timeout):
+                if load is not None:
+                    args = load_stage(load, await read(), args)
+                with view_stage(route):
+                    result = await view(*args, **kwargs)
+                return dump_stage(result, status, dump)
+
+        return wrapper
+
+    return decorator
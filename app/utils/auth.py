@@ -0,0 +1,91 @@
+# app/utils/auth.py
+
+import functools
+import inspect
+from contextvars import ContextVar
+
+from flask import request
+
+from app.models import utcnow
+from app.utils.exceptions import AuthenticationError, AuthorizationError
+from app.utils.tokens import decode_token
+
+# Id of the user whose bearer token came with the current request, if any
+current_user_id = ContextVar("current_user_id", default=None)
+# Whether that user is one of the ADMIN_USER_IDS
+current_user_is_admin = ContextVar("current_user_is_admin", default=False)
+
+
+def register_authentication(app, current_request=request, last_seen=None) -> None:
+    """Resolves the bearer token of every request before its view runs.
+
+    A valid token sets ``current_user_id`` (and ``current_user_is_admin``
+    for ``ADMIN_USER_IDS``) and marks the user as seen in
+    the ``last_seen`` buffer (the app's own by default); an invalid one is
+    rejected with 401. Requests without a token pass through anonymously.
+    """
+    if last_seen is None:
+        last_seen = app.extensions["last_seen"]
+
+    def authenticate_request():
+        current_user_id.set(None)
+        current_user_is_admin.set(False)
+        header = current_request.headers.get("Authorization")
+        if not header:
+            return
+        scheme, _, token = header.partition(" ")
+        if scheme.lower() != "bearer" or not token:
+            raise AuthenticationError("Invalid or expired token")
+        user_id = decode_token(token.strip(), app.config)
+        current_user_id.set(user_id)
+        current_user_is_admin.set(user_id in app.config.get("ADMIN_USER_IDS", ()))
+        last_seen.put(user_id, utcnow())
+
+    if inspect.iscoroutinefunction(app.full_dispatch_request):
+        # Quart runs sync hooks in a thread with a copy of the context, so
+        # the hook must be a coroutine for the view to see current_user_id
+        async def authenticate_async_request():
+            authenticate_request()
+
+        app.before_request(authenticate_async_request)
+    else:
+        app.before_request(authenticate_request)
+
+
+def _require_login() -> None:
+    if current_user_id.get() is None:
+        raise AuthenticationError("Authentication required")
+
+
+def _require_admin() -> None:
+    _require_login()
+    if not current_user_is_admin.get():
+        raise AuthorizationError("Admin access required")
+
+
+def _guarded(view, check):
+    if inspect.iscoroutinefunction(view):
+
+        @functools.wraps(view)
+        async def async_wrapper(*args, **kwargs):
+            check()
+            return await view(*args, **kwargs)
+
+        return async_wrapper
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        check()
+        return view(*args, **kwargs)
+
+    return wrapper
+
+
+def login_required(view):
+    """Rejects requests without a valid bearer token with 401."""
+    return _guarded(view, _require_login)
+
+
+def admin_required(view):
+    """Like ``login_required``, and rejects users not in ADMIN_USER_IDS with 403."""
+    return _guarded(view, _require_admin)
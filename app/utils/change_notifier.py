@@ -0,0 +1,41 @@
+# app/utils/change_notifier.py
+
+import threading
+from contextlib import contextmanager
+
+
+class ChangeNotifier:
+    """Lets threads sleep until something changed or a timeout passed.
+
+    Readers take ``version`` before they look for changes and pass it to
+    ``wait``, so a ``notify`` that happens in between is not missed.
+    """
+
+    def __init__(self) -> None:
+        self._condition = threading.Condition()
+        self.version = 0
+        self.waiters = 0
+
+    def notify(self) -> None:
+        with self._condition:
+            self.version += 1
+            self._condition.notify_all()
+
+    def wait(self, version, timeout) -> bool:
+        """Returns True once ``version`` is outdated, False after ``timeout``."""
+        with self._condition:
+            return self._condition.wait_for(lambda: self.version != version, timeout)
+
+    @contextmanager
+    def waiting(self, max_waiters):
+        """Yields whether the caller may wait, False while ``max_waiters`` do."""
+        with self._condition:
+            admitted = self.waiters < max_waiters
+            if admitted:
+                self.waiters += 1
+        try:
+            yield admitted
+        finally:
+            if admitted:
+                with self._condition:
+                    self.waiters -= 1
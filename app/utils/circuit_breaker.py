@@ -0,0 +1,153 @@
+# app/utils/circuit_breaker.py
+
+import logging
+import math
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+from sqlalchemy.exc import DBAPIError, InterfaceError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.utils.exceptions import ServiceUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# MySQL client and server errors meaning the server cannot be reached or used:
+# too many connections, shutting down, can't connect (2002, 2003), unknown
+# host, server gone away and lost connection
+MYSQL_UNAVAILABLE_ERRORS = frozenset({1040, 1053, 2002, 2003, 2005, 2006, 2013})
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+def is_unavailable(error) -> bool:
+    """Whether ``error`` says the database is down rather than the query bad."""
+    if isinstance(error, PoolTimeoutError):
+        return True
+    if not isinstance(error, DBAPIError):
+        return False
+    if error.connection_invalidated:
+        return True
+    args = getattr(error.orig, "args", None)
+    return (
+        isinstance(error, (OperationalError, InterfaceError))
+        and bool(args)
+        and args[0] in MYSQL_UNAVAILABLE_ERRORS
+    )
+
+
+class CircuitBreaker:
+    """Fails calls fast while a dependency is down.
+
+    Closed, it lets calls through and remembers whether the last ``window``
+    failed; once ``failure_rate`` of them (and at least ``min_calls``) did,
+    it opens. Open, it rejects every call with ``ServiceUnavailableError``
+    for ``open_seconds``. Then, half-open, a single trial call goes through
+    while the others are still rejected: its success closes the breaker,
+    its failure opens it again.
+    """
+
+    def __init__(
+        self,
+        name,
+        failure_rate=0.5,
+        min_calls=5,
+        window=20,
+        open_seconds=5.0,
+        clock=time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_rate = failure_rate
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._outcomes = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == OPEN and self._retry_after() <= 0:
+                return HALF_OPEN
+            return self._state
+
+    def _retry_after(self) -> float:
+        return self._opened_at + self.open_seconds - self._clock()
+
+    def acquire(self) -> bool:
+        """Lets a call through, or raises ``ServiceUnavailableError``.
+
+        Returns True for the trial call of a half-open breaker.
+        """
+        with self._lock:
+            if self._state == CLOSED:
+                return False
+            retry_after = self._retry_after()
+            if retry_after <= 0 and not self._probing:
+                self._state = HALF_OPEN
+                self._probing = True
+                return True
+        raise ServiceUnavailableError(
+            f"{self.name} is unavailable", retry_after=max(1, math.ceil(retry_after))
+        )
+
+    def record(self, probe, failed) -> None:
+        with self._lock:
+            if probe:
+                self._probing = False
+                if failed:
+                    self._open()
+                else:
+                    self._state = CLOSED
+                    self._outcomes.clear()
+                    logger.warning("Circuit breaker for %s closed", self.name)
+                return
+            if self._state != CLOSED:
+                return
+            self._outcomes.append(failed)
+            failures = sum(self._outcomes)
+            if (
+                failed
+                and len(self._outcomes) >= self.min_calls
+                and failures >= self.failure_rate * len(self._outcomes)
+            ):
+                self._open()
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._outcomes.clear()
+        logger.error(
+            "Circuit breaker for %s opened for %ss", self.name, self.open_seconds
+        )
+
+    @contextmanager
+    def guard(self):
+        """Runs the block as one call, failed if it raised ``is_unavailable``."""
+        probe = self.acquire()
+        try:
+            yield
+        except BaseException as e:
+            self.record(probe, is_unavailable(e))
+            raise
+        self.record(probe, False)
+
+
+def breaker_from_config(name, config):
+    """Returns the ``DB_BREAKER_*`` configured breaker, or None if disabled."""
+    if not config.get("DB_BREAKER_ENABLED"):
+        return None
+    return CircuitBreaker(
+        name,
+        failure_rate=config["DB_BREAKER_FAILURE_RATE"],
+        min_calls=config["DB_BREAKER_MIN_CALLS"],
+        window=config["DB_BREAKER_WINDOW"],
+        open_seconds=config["DB_BREAKER_OPEN_SECONDS"],
+    )
@@ -0,0 +1,177 @@
+# app/utils/concurrency_limit.py
+
+import inspect
+import json
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+OVERLOADED_BODY = json.dumps({"error": "Service overloaded, retry later"}).encode()
+
+# Long polls idle by design: they would hold slots without using the
+# database, and their latency says nothing about load. They bypass the
+# limiter; the change feed caps its own waiters (CHANGE_FEED_MAX_WAITERS).
+LONG_POLL_PATHS = ("/service/stack/users/changes",)
+
+
+class AdaptiveLimiter:
+    """Per-worker concurrency limit adjusted by latency (AIMD).
+
+    Each request finishing within ``latency_target`` adds ``1 / limit``, so
+    the limit grows by about one per round of requests while the worker
+    keeps up. A slower one multiplies it by ``backoff``, at most once per
+    ``latency_target`` so a single slow burst is only counted once. The
+    limit only grows while it is being used, never past ``max_limit``.
+    """
+
+    def __init__(
+        self,
+        initial=4,
+        min_limit=1,
+        max_limit=64,
+        latency_target=0.5,
+        backoff=0.9,
+        clock=time.monotonic,
+    ) -> None:
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._limit = float(min(max(initial, min_limit), max_limit))
+        self._in_flight = 0
+        self._last_decrease = None
+        self.shed = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def acquire(self) -> bool:
+        """Takes a slot for a request; False means the request must be shed."""
+        with self._lock:
+            if self._in_flight >= int(self._limit):
+                self.shed += 1
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self, latency=None) -> None:
+        """Frees a slot; ``latency`` of None skips the limit's feedback."""
+        with self._lock:
+            in_flight = self._in_flight
+            self._in_flight -= 1
+            if latency is None:
+                return
+            if latency <= self.latency_target:
+                # Only grow a limit the traffic actually reaches
+                if in_flight * 2 >= self._limit:
+                    self._limit = min(self._limit + 1 / self._limit, self.max_limit)
+                return
+            now = self._clock()
+            if (
+                self._last_decrease is not None
+                and now - self._last_decrease < self.latency_target
+            ):
+                return
+            self._last_decrease = now
+            self._limit = limit = max(self._limit * self.backoff, self.min_limit)
+        logger.debug("Concurrency limit lowered to %.1f after %.3fs", limit, latency)
+
+
+def _overloaded_headers(retry_after):
+    return [
+        ("Content-Type", "application/json"),
+        ("Content-Length", str(len(OVERLOADED_BODY))),
+        ("Retry-After", str(retry_after)),
+    ]
+
+
+class ConcurrencyLimitMiddleware:
+    """WSGI middleware that sheds requests over the limiter's limit with 503.
+
+    Shed requests never reach Flask, so answering them costs next to
+    nothing and the admitted ones keep their latency under overload.
+    Requests to ``bypass_paths`` are neither limited nor counted.
+    """
+
+    def __init__(self, app, limiter, retry_after=1, bypass_paths=()) -> None:
+        self.app = app
+        self.limiter = limiter
+        self.bypass_paths = frozenset(bypass_paths)
+        self._headers = _overloaded_headers(retry_after)
+
+    def __call__(self, environ, start_response):
+        if environ.get("PATH_INFO") in self.bypass_paths:
+            return self.app(environ, start_response)
+        if not self.limiter.acquire():
+            start_response("503 Service Unavailable", list(self._headers))
+            return [OVERLOADED_BODY]
+        started = time.perf_counter()
+        try:
+            # Flask responses are buffered, so this covers the whole request
+            return self.app(environ, start_response)
+        finally:
+            self.limiter.release(time.perf_counter() - started)
+
+
+class AsgiConcurrencyLimitMiddleware:
+    """``ConcurrencyLimitMiddleware`` for the HTTP requests of an ASGI app."""
+
+    def __init__(self, app, limiter, retry_after=1, bypass_paths=()) -> None:
+        self.app = app
+        self.limiter = limiter
+        self.bypass_paths = frozenset(bypass_paths)
+        self._headers = [
+            (name.lower().encode(), value.encode())
+            for name, value in _overloaded_headers(retry_after)
+        ]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope.get("path") in self.bypass_paths:
+            return await self.app(scope, receive, send)
+        if not self.limiter.acquire():
+            await send(
+                {"type": "http.response.start", "status": 503, "headers": self._headers}
+            )
+            await send({"type": "http.response.body", "body": OVERLOADED_BODY})
+            return
+        started = time.perf_counter()
+        try:
+            return await self.app(scope, receive, send)
+        finally:
+            self.limiter.release(time.perf_counter() - started)
+
+
+def register_concurrency_limit(app) -> None:
+    """Puts an ``AdaptiveLimiter`` in front of the app when enabled.
+
+    The limiter is per worker process and is kept in
+    ``app.extensions["concurrency_limiter"]``.
+    """
+    config = app.config
+    if not config.get("CONCURRENCY_LIMIT_ENABLED"):
+        return
+    limiter = AdaptiveLimiter(
+        initial=config["CONCURRENCY_LIMIT_INITIAL"],
+        min_limit=config["CONCURRENCY_LIMIT_MIN"],
+        max_limit=config["CONCURRENCY_LIMIT_MAX"],
+        latency_target=config["CONCURRENCY_LATENCY_TARGET_SECONDS"],
+        backoff=config["CONCURRENCY_LIMIT_BACKOFF"],
+    )
+    app.extensions["concurrency_limiter"] = limiter
+    options = {
+        "retry_after": config["CONCURRENCY_RETRY_AFTER_SECONDS"],
+        "bypass_paths": LONG_POLL_PATHS,
+    }
+    if inspect.iscoroutinefunction(app.full_dispatch_request):
+        app.asgi_app = AsgiConcurrencyLimitMiddleware(app.asgi_app, limiter, **options)
+    else:
+        app.wsgi_app = ConcurrencyLimitMiddleware(app.wsgi_app, limiter, **options)
@@ -0,0 +1,133 @@
+# app/utils/cors.py
+
+import inspect
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ALLOW_HEADERS = ("Authorization", "Content-Type")
+# Every response depends on the request's Origin, allowed or not, so shared
+# caches must never hand one origin's response to another
+VARY_ORIGIN = ("Vary", "Origin")
+
+
+class CorsMiddleware:
+    """WSGI middleware that applies CORS for an allowlist of origins.
+
+    The headers for every allowed origin are built once. Requests without
+    an ``Origin`` header, or from origins outside the allowlist, go to the
+    app and only get ``Vary: Origin``. Preflights from allowed origins are answered here with
+    a long ``Access-Control-Max-Age``, so browsers cache them and Flask
+    never sees them. ``headers`` are the request headers browsers may send,
+    ``expose_headers`` the response headers scripts may read.
+    """
+
+    def __init__(
+        self,
+        app,
+        origins,
+        methods=("GET", "POST", "PUT", "PATCH", "DELETE"),
+        headers=DEFAULT_ALLOW_HEADERS,
+        expose_headers=(),
+        max_age=86400,
+        supports_credentials=False,
+    ) -> None:
+        self.app = app
+        self._vary = [VARY_ORIGIN]
+        self._simple = {}
+        self._preflight = {}
+        for origin in origins:
+            simple = [("Access-Control-Allow-Origin", origin), VARY_ORIGIN]
+            if supports_credentials:
+                simple.append(("Access-Control-Allow-Credentials", "true"))
+            if expose_headers:
+                simple.append(
+                    ("Access-Control-Expose-Headers", ", ".join(expose_headers))
+                )
+            self._simple[origin] = simple
+            self._preflight[origin] = simple + [
+                ("Access-Control-Allow-Methods", ", ".join(methods)),
+                ("Access-Control-Allow-Headers", ", ".join(headers)),
+                ("Access-Control-Max-Age", str(max_age)),
+                ("Content-Length", "0"),
+            ]
+
+    def __call__(self, environ, start_response):
+        origin = environ.get("HTTP_ORIGIN")
+        cors_headers = self._simple.get(origin, self._vary)
+        if (
+            origin in self._preflight
+            and environ.get("REQUEST_METHOD") == "OPTIONS"
+            and "HTTP_ACCESS_CONTROL_REQUEST_METHOD" in environ
+        ):
+            start_response("204 No Content", self._preflight[origin])
+            return []
+
+        def cors_start_response(status, headers, exc_info=None):
+            return start_response(status, headers + cors_headers, exc_info)
+
+        return self.app(environ, cors_start_response)
+
+
+def _encoded(headers):
+    return [(name.lower().encode(), value.encode()) for name, value in headers]
+
+
+class AsgiCorsMiddleware(CorsMiddleware):
+    """``CorsMiddleware`` for the HTTP requests of an ASGI app."""
+
+    def __init__(self, app, origins, **options) -> None:
+        super().__init__(app, origins, **options)
+        self._vary = _encoded(self._vary)
+        self._simple = {k: _encoded(v) for k, v in self._simple.items()}
+        self._preflight = {k: _encoded(v) for k, v in self._preflight.items()}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        origin = headers.get(b"origin", b"").decode("latin-1")
+        cors_headers = self._simple.get(origin, self._vary)
+        if (
+            origin in self._preflight
+            and scope["method"] == "OPTIONS"
+            and b"access-control-request-method" in headers
+        ):
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": 204,
+                    "headers": self._preflight[origin],
+                }
+            )
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def cors_send(message):
+            if message["type"] == "http.response.start":
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", ()), *cors_headers],
+                }
+            await send(message)
+
+        return await self.app(scope, receive, cors_send)
+
+
+def register_cors(app) -> None:
+    """Wraps the app in CorsMiddleware for the configured origin allowlist."""
+    origins = app.config.get("CORS_ORIGINS") or ()
+    if not origins:
+        logger.info("No CORS origins configured; cross-origin requests are denied.")
+        return
+    options = {
+        "headers": app.config.get("CORS_ALLOW_HEADERS", DEFAULT_ALLOW_HEADERS),
+        "expose_headers": app.config.get("CORS_EXPOSE_HEADERS", ()),
+        "max_age": app.config.get("CORS_MAX_AGE", 86400),
+        "supports_credentials": app.config.get("CORS_SUPPORTS_CREDENTIALS", False),
+    }
+    if inspect.iscoroutinefunction(app.full_dispatch_request):
+        app.asgi_app = AsgiCorsMiddleware(app.asgi_app, origins, **options)
+    else:
+        app.wsgi_app = CorsMiddleware(app.wsgi_app, origins, **options)
+    logger.debug("CORS enabled for %s", ", ".join(origins))
@@ -0,0 +1,129 @@
+# app/utils/deadlines.py
+
+import math
+import re
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.utils.exceptions import DeadlineExceededError
+
+# Seconds the client is willing to wait, e.g. "2.5"; only shortens the budget
+DEADLINE_HEADER = "X-Request-Timeout"
+
+# MySQL's ER_QUERY_TIMEOUT, raised when MAX_EXECUTION_TIME stops a SELECT
+_ER_QUERY_TIMEOUT = 3024
+_SELECT = re.compile(r"\s*SELECT\b(\s*/\*\+)?", re.IGNORECASE)
+
+# time.monotonic() by which the current request must be answered
+_deadline = ContextVar("request_deadline", default=None)
+
+
+def time_left():
+    """Seconds until the current request's deadline, or None without one."""
+    deadline = _deadline.get()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def bounded_wait(seconds, margin=1.0) -> float:
+    """Cuts a wait so the request still answers ``margin`` s before its deadline."""
+    remaining = time_left()
+    if remaining is None:
+        return seconds
+    return max(0.0, min(seconds, remaining - margin))
+
+
+def check_deadline(stage) -> None:
+    """Raises ``DeadlineExceededError`` once the request's deadline passed."""
+    remaining = time_left()
+    if remaining is not None and remaining <= 0:
+        raise DeadlineExceededError(f"Request deadline exceeded before {stage}")
+
+
+@contextmanager
+def without_deadline():
+    """Lifts the request's deadline in the block, for cleanup that must run."""
+    token = _deadline.set(None)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _requested_timeout(headers):
+    try:
+        timeout = float(headers.get(DEADLINE_HEADER, ""))
+    except ValueError:
+        return None
+    return timeout if 0 < timeout < math.inf else None
+
+
+@contextmanager
+def request_deadline(headers, timeout):
+    """Gives the block ``timeout`` seconds, checked at stages and statements.
+
+    A shorter ``X-Request-Timeout`` from the client wins, since nobody
+    reads the response after it gave up. Without either, nothing is set.
+    """
+    budget = timeout
+    requested = _requested_timeout(headers)
+    if requested is not None and (not budget or requested < budget):
+        budget = requested
+    if not budget:
+        yield
+        return
+    token = _deadline.set(time.monotonic() + budget)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def _add_time_limit(match, milliseconds) -> str:
+    hint = f"MAX_EXECUTION_TIME({milliseconds})"
+    if match.group(1):
+        # MySQL only reads the first hint comment, so join the existing one
+        return f"{match.group(0)} {hint}"
+    return f"{match.group(0)} /*+ {hint} */"
+
+
+def _limit_statement(conn, cursor, statement, parameters, context, executemany):
+    remaining = time_left()
+    if remaining is None:
+        return statement, parameters
+    if remaining <= 0:
+        raise DeadlineExceededError("Request deadline exceeded before a query")
+    if conn.dialect.name == "mysql":
+        # Only SELECTs honour the limit; writes are bounded by the check above
+        match = _SELECT.match(statement)
+        if match is not None:
+            milliseconds = max(1, math.ceil(remaining * 1000))
+            statement = _add_time_limit(match, milliseconds) + statement[match.end() :]
+    return statement, parameters
+
+
+def _translate_timeout(exception_context) -> None:
+    error = exception_context.original_exception
+    if (
+        exception_context.dialect.name == "mysql"
+        and getattr(error, "args", None)
+        and error.args[0] == _ER_QUERY_TIMEOUT
+    ):
+        raise DeadlineExceededError(
+            "Request deadline exceeded during a query"
+        ) from exception_context.sqlalchemy_exception
+
+
+def limit_statements() -> None:
+    """Applies the request deadline to every statement of every engine.
+
+    Statements past the deadline are not sent; on MySQL, SELECTs get the
+    time left as ``MAX_EXECUTION_TIME``, so the server stops them too.
+    """
+    if event.contains(Engine, "before_cursor_execute", _limit_statement):
+        return
+    event.listen(Engine, "before_cursor_execute", _limit_statement, retval=True)
+    event.listen(Engine, "handle_error", _translate_timeout)
@@ -0,0 +1,99 @@
+# app/utils/endpoint.py
+
+import functools
+import time
+from contextlib import contextmanager
+
+from flask import current_app, request
+
+from app.utils.deadlines import check_deadline, request_deadline
+from app.utils.metrics import route_timings
+from app.utils.retry import retry_policy
+from app.utils.tracing import span
+
+
+def _query_data():
+    return request.args
+
+
+def _json_data():
+    return request.get_json(silent=True)
+
+
+_LOCATIONS = {"query": _query_data, "json": _json_data}
+
+
+@contextmanager
+def endpoint_call(route, config, headers, timeout):
+    """Times the call of ``route`` and scopes its deadline and retry budget.
+
+    Shared by ``endpoint`` and ``async_endpoint``, which pass their own
+    framework's app config and request headers.
+    """
+    started = time.perf_counter()
+    try:
+        budget = timeout or config.get("REQUEST_TIMEOUT_SECONDS")
+        with request_deadline(headers, budget), retry_policy(config):
+            yield
+    finally:
+        route_timings.observe(route, time.perf_counter() - started)
+
+
+def load_stage(load, data, args) -> tuple:
+    """Returns ``args`` with ``data`` loaded by ``load`` in front."""
+    with span(f"load {type(load).__name__}"):
+        return (load.load(data), *args)
+
+
+@contextmanager
+def view_stage(route):
+    check_deadline("the view")
+    with span(f"view {route}"):
+        yield
+
+
+def dump_stage(result, status, dump) -> tuple:
+    """Returns the view's ``result`` as a ``(body, status)`` pair."""
+    if type(result) is tuple:
+        result, status = result
+    if dump is not None:
+        check_deadline("serialization")
+        with span(f"dump {type(dump).__name__}"):
+            result = dump.dump(result)
+    return result, status
+
+
+def endpoint(load=None, dump=None, location="json", status=200, timeout=None):
+    """Turns a function into a view that loads, calls and dumps with schemas.
+
+    With ``load``, the request's query string or JSON body (per
+    ``location``) is validated by that schema and passed to the view as its
+    first argument. The view returns a value or a ``(value, status)``
+    tuple; the value is serialized with ``dump`` when given and handed to
+    Flask as JSON. Errors are left to the app's error handlers and every
+    call is timed into ``route_timings``; on traced requests, loading,
+    the view and dumping each get a span.
+
+    The call must finish within ``timeout`` seconds (default
+    ``REQUEST_TIMEOUT_SECONDS``), or sooner if the client asks; past that
+    it fails with ``DeadlineExceededError`` at the next stage or query.
+    Services retrying transient database errors share one
+    ``DB_RETRY_BUDGET`` for the call.
+    """
+    read = _LOCATIONS[location]
+
+    def decorator(view):
+        route = view.__name__
+
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            with endpoint_call(route, current_app.config, request.headers, timeout):
+                if load is not None:
+                    args = load_stage(load, read(), args)
+                with view_stage(route):
+                    result = view(*args, **kwargs)
+                return dump_stage(result, status, dump)
+
+        return wrapper
+
+    return decorator
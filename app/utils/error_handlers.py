@@ -0,0 +1,92 @@
+# app/utils/error_handlers.py
+
+import functools
+import json
+import logging
+
+from flask import request
+from marshmallow import ValidationError as MarshmallowValidationError
+from werkzeug.exceptions import HTTPException
+
+from app.utils.exceptions import (
+    AuthenticationError,
+    AuthorizationError,
+    DatabaseError,
+    DeadlineExceededError,
+    NotFoundError,
+    ServiceUnavailableError,
+    ValidationError,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def _body(message) -> bytes:
+    return json.dumps({"error": message}).encode()
+
+
+# Bodies for responses whose content never changes are built once
+DATABASE_ERROR_BODY = _body("Database error occurred")
+INTERNAL_ERROR_BODY = _body("Internal server error")
+
+
+@functools.lru_cache(maxsize=256)
+def _message_body(message) -> bytes:
+    # Service error messages are a small fixed set, so each is encoded once
+    return _body(message)
+
+
+def register_error_handlers(app, current_request=request) -> None:
+    """Maps the service exceptions to JSON error responses for the whole app.
+
+    ``current_request`` is the request proxy of the app's framework, so the
+    same handlers serve the Flask app and the ASGI app.
+    """
+
+    def response(body, status):
+        return app.response_class(body, status=status, mimetype="application/json")
+
+    def schema_error(e):
+        logger.warning(
+            "Validation error in %s: %s", current_request.endpoint, e.messages
+        )
+        return response(_body(e.messages), 400)
+
+    def message_error(status):
+        def handler(e):
+            logger.warning(
+                "%s in %s: %s",
+                type(e).__name__,
+                current_request.endpoint,
+                e.message,
+            )
+            return response(_message_body(e.message), status)
+
+        return handler
+
+    def unavailable_error(e):
+        logger.warning("%s in %s", e.message, current_request.endpoint)
+        result = response(_message_body(e.message), 503)
+        if e.retry_after is not None:
+            result.headers["Retry-After"] = str(e.retry_after)
+        return result
+
+    def database_error(e):
+        logger.error("Database error in %s: %s", current_request.endpoint, e.message)
+        return response(DATABASE_ERROR_BODY, 500)
+
+    def unexpected_error(e):
+        if isinstance(e, HTTPException):
+            return e
+        logger.exception("Unexpected error in %s", current_request.endpoint)
+        return response(INTERNAL_ERROR_BODY, 500)
+
+    app.register_error_handler(MarshmallowValidationError, schema_error)
+    app.register_error_handler(ValidationError, message_error(400))
+    app.register_error_handler(AuthenticationError, message_error(401))
+    app.register_error_handler(AuthorizationError, message_error(403))
+    app.register_error_handler(NotFoundError, message_error(404))
+    app.register_error_handler(DeadlineExceededError, message_error(504))
+    app.register_error_handler(ServiceUnavailableError, unavailable_error)
+    app.register_error_handler(DatabaseError, database_error)
+    app.register_error_handler(Exception, unexpected_error)
@@ -16,3 +16,19 @@ class AuthorizationError(Exception):
 class DatabaseError(Exception):
     def __init__(self, message="Database operation failed") -> None:
         self.message = message
+
+
+class NotFoundError(Exception):
+    def __init__(self, message="Resource not found") -> None:
+        self.message = message
+
+
+class ServiceUnavailableError(Exception):
+    def __init__(self, message="Service unavailable", retry_after=None) -> None:
+        self.message = message
+        self.retry_after = retry_after
+
+
+class DeadlineExceededError(Exception):
+    def __init__(self, message="Request deadline exceeded") -> None:
+        self.message = message
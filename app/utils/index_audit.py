@@ -0,0 +1,162 @@
+# app/utils/index_audit.py
+
+import re
+from collections import Counter
+from typing import NamedTuple
+
+
+class Index(NamedTuple):
+    name: str
+    columns: tuple
+    unique: bool = False
+    primary: bool = False
+
+
+class Finding(NamedTuple):
+    table: str
+    index: str
+    reason: str
+
+
+class Suggestion(NamedTuple):
+    table: str
+    columns: tuple
+    count: int
+
+
+_STRING_LITERAL = re.compile(r"'(?:[^'\\]|\\.)*'")
+_STATEMENT = re.compile(
+    r"\b(?:FROM|UPDATE)\s+`?(\w+)`?(?:\s+(?:AS\s+)?\w+)?\s+(?:SET\s+.+?\s+)?"
+    r"WHERE\s+(.+?)(?:\s+ORDER\s+BY\s+(.+?))?(?:\s+LIMIT\b.*)?$",
+    re.IGNORECASE,
+)
+_EQUALITY = re.compile(r"(?:\w+\.)?`?(\w+)`?\s*(?:=|\bIN\b|\bIS\b)", re.IGNORECASE)
+_RANGE = re.compile(
+    r"(?:\w+\.)?`?(\w+)`?\s*(?:<=|>=|<|>|\bBETWEEN\b|\bLIKE\b)", re.IGNORECASE
+)
+_ORDER_COLUMN = re.compile(r"(?:\w+\.)?`?(\w+)`?")
+
+
+def collect_indexes(inspector, table) -> list:
+    """Returns the primary key, unique constraints and indexes of ``table``."""
+    indexes = []
+    pk = inspector.get_pk_constraint(table)
+    if pk.get("constrained_columns"):
+        indexes.append(
+            Index(
+                pk.get("name") or "PRIMARY",
+                tuple(pk["constrained_columns"]),
+                unique=True,
+                primary=True,
+            )
+        )
+    for constraint in inspector.get_unique_constraints(table):
+        indexes.append(
+            Index(constraint["name"], tuple(constraint["column_names"]), unique=True)
+        )
+    seen = {index.name for index in indexes}
+    for index in inspector.get_indexes(table):
+        if index["name"] not in seen:
+            indexes.append(
+                Index(
+                    index["name"],
+                    tuple(index["column_names"]),
+                    unique=bool(index.get("unique")),
+                )
+            )
+    return indexes
+
+
+def _rank(index) -> int:
+    return 2 if index.primary else int(index.unique)
+
+
+def _covering_index(index, indexes):
+    for other in indexes:
+        if other is index or other.columns[: len(index.columns)] != index.columns:
+            continue
+        if other.columns == index.columns:
+            # Of two identical indexes keep the stronger one, or the first by name
+            if (_rank(other), index.name) > (_rank(index), other.name):
+                return other
+        elif not index.unique:
+            return other
+    return None
+
+
+def find_redundant_indexes(table, indexes) -> list:
+    """Reports indexes that another index on the same table already covers.
+
+    A non-unique index is redundant when its columns are a leftmost prefix of
+    another index. A unique index still enforces a constraint, so it is only
+    redundant when the primary key or another unique index has exactly the
+    same columns.
+    """
+    findings = []
+    for index in indexes:
+        if index.primary:
+            continue
+        other = _covering_index(index, indexes)
+        if other is None:
+            continue
+        if other.columns != index.columns:
+            reason = f"is a prefix of {other.name} ({', '.join(other.columns)})"
+        elif other.primary:
+            reason = "duplicates the primary key"
+        else:
+            reason = f"duplicates {other.name}"
+        findings.append(Finding(table, index.name, reason))
+    return findings
+
+
+def _columns(patterns, text, known) -> tuple:
+    columns = []
+    for pattern in patterns:
+        for column in pattern.findall(text or ""):
+            if column in known and column not in columns:
+                columns.append(column)
+    return tuple(columns)
+
+
+def parse_query_log(lines, table_columns) -> Counter:
+    """Counts the filtered and sorted columns of statements in a query log.
+
+    Any log with one statement per line works (MySQL general or slow log,
+    SQLAlchemy echo output). ``table_columns`` maps table names to their
+    column names so literals and keywords are ignored. Keys are
+    ``(table, where_columns, order_by_columns)`` with equality predicates
+    listed before range predicates.
+    """
+    usage = Counter()
+    for line in lines:
+        statement = _STRING_LITERAL.sub("?", line.strip())
+        match = _STATEMENT.search(statement)
+        if not match or match.group(1) not in table_columns:
+            continue
+        table, where, order_by = match.groups()
+        known = table_columns[table]
+        where_columns = _columns((_EQUALITY, _RANGE), where, known)
+        if where_columns:
+            order_columns = _columns((_ORDER_COLUMN,), order_by, known)
+            usage[(table, where_columns, order_columns)] += 1
+    return usage
+
+
+def suggest_missing_indexes(indexes_by_table, usage, min_count=1) -> list:
+    """Suggests indexes for observed filters that no existing index leads with."""
+    suggestions = {}
+    for (table, where_columns, order_columns), count in usage.items():
+        if any(index.columns[0] in where_columns for index in indexes_by_table[table]):
+            continue
+        columns = where_columns + tuple(
+            c for c in order_columns if c not in where_columns
+        )
+        suggestions[(table, columns)] = suggestions.get((table, columns), 0) + count
+    return sorted(
+        (
+            Suggestion(table, columns, count)
+            for (table, columns), count in suggestions.items()
+            if count >= min_count
+        ),
+        key=lambda suggestion: -suggestion.count,
+    )
@@ -0,0 +1,80 @@
+# app/utils/memory_debug.py
+
+import os
+import resource
+import threading
+import tracemalloc
+
+# Allocations made by tracemalloc itself or by imports are never leaks
+_IGNORED = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, "<unknown>"),
+)
+
+
+def current_rss_bytes() -> int:
+    """Returns this process's resident set size."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        # No procfs (macOS): fall back to the peak, reported in bytes there
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _stat(stat, with_diff) -> dict:
+    frames = [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+    entry = {"site": frames[0], "size_bytes": stat.size, "count": stat.count}
+    if len(frames) > 1:
+        entry["traceback"] = frames
+    if with_diff:
+        entry["size_diff_bytes"] = stat.size_diff
+        entry["count_diff"] = stat.count_diff
+    return entry
+
+
+class MemoryTracker:
+    """Takes tracemalloc snapshots and diffs each against the previous one.
+
+    Tracing slows allocations down, so it is only started for workers that
+    serve the memory debug endpoint.
+    """
+
+    def __init__(self, frames=1) -> None:
+        self.frames = frames
+        self._lock = threading.Lock()
+        self._previous = None
+
+    def start(self) -> None:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(self.frames)
+
+    def report(self, top=20, group_by="lineno", reset=False) -> dict:
+        """Returns the top allocation sites and their growth since the last call.
+
+        ``reset`` drops the previous snapshot first, so the diff starts over.
+        """
+        snapshot = tracemalloc.take_snapshot().filter_traces(_IGNORED)
+        with self._lock:
+            previous = None if reset else self._previous
+            self._previous = snapshot
+
+        current, peak = tracemalloc.get_traced_memory()
+        report = {
+            "pid": os.getpid(),
+            "rss_bytes": current_rss_bytes(),
+            "traced_bytes": current,
+            "traced_peak_bytes": peak,
+            "top": [_stat(stat, False) for stat in snapshot.statistics(group_by)[:top]],
+            "growth": None,
+        }
+        if previous is not None:
+            growth = [
+                stat
+                for stat in snapshot.compare_to(previous, group_by)
+                if stat.size_diff > 0
+            ]
+            report["growth"] = [_stat(stat, True) for stat in growth[:top]]
+        return report
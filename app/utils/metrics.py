@@ -0,0 +1,133 @@
+# app/utils/metrics.py
+
+import threading
+
+
+class RouteTimings:
+    """Per-route request count and latency totals, kept per worker process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def observe(self, route, seconds) -> None:
+        with self._lock:
+            stats = self._routes.get(route)
+            if stats is None:
+                self._routes[route] = [1, seconds, seconds]
+                return
+            stats[0] += 1
+            stats[1] += seconds
+            if seconds > stats[2]:
+                stats[2] = seconds
+
+    def snapshot(self) -> dict:
+        """Returns ``{route: {"count", "total_seconds", "max_seconds"}}``."""
+        with self._lock:
+            return {
+                route: {"count": count, "total_seconds": total, "max_seconds": peak}
+                for route, (count, total, peak) in self._routes.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+
+
+route_timings = RouteTimings()
+
+
+def _escape_label(value) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(timings) -> str:
+    """Renders a ``RouteTimings.snapshot()`` in the Prometheus text format.
+
+    The values are per worker process, so with several workers each scrape
+    only sees the worker that answered it.
+    """
+    lines = [
+        "# HELP stack_request_duration_seconds Time spent serving requests.",
+        "# TYPE stack_request_duration_seconds summary",
+    ]
+    for route, stats in sorted(timings.items()):
+        label = f'{{route="{_escape_label(route)}"}}'
+        lines.append(f"stack_request_duration_seconds_count{label} {stats['count']}")
+        lines.append(
+            f"stack_request_duration_seconds_sum{label} {stats['total_seconds']:.6f}"
+        )
+    lines += [
+        "# HELP stack_request_duration_max_seconds Slowest request per route.",
+        "# TYPE stack_request_duration_max_seconds gauge",
+    ]
+    for route, stats in sorted(timings.items()):
+        label = f'{{route="{_escape_label(route)}"}}'
+        lines.append(
+            f"stack_request_duration_max_seconds{label} {stats['max_seconds']:.6f}"
+        )
+    return "\n".join(lines) + "\n"
+
+
+class RetryCounters:
+    """Transient database error retries and their outcomes, per worker process."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._retries = {}
+        self._recovered = 0
+        self._gave_up = {}
+
+    def retried(self, code) -> None:
+        with self._lock:
+            self._retries[code] = self._retries.get(code, 0) + 1
+
+    def recovered(self) -> None:
+        with self._lock:
+            self._recovered += 1
+
+    def gave_up(self, code, reason) -> None:
+        with self._lock:
+            key = (code, reason)
+            self._gave_up[key] = self._gave_up.get(key, 0) + 1
+
+    def snapshot(self) -> dict:
+        """Returns ``{"retries": {code: n}, "recovered": n,
+        "gave_up": {(code, reason): n}}``."""
+        with self._lock:
+            return {
+                "retries": dict(self._retries),
+                "recovered": self._recovered,
+                "gave_up": dict(self._gave_up),
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._retries.clear()
+            self._recovered = 0
+            self._gave_up.clear()
+
+
+retry_counters = RetryCounters()
+
+
+def render_retry_counters(counters) -> str:
+    """Renders a ``RetryCounters.snapshot()`` in the Prometheus text format."""
+    lines = [
+        "# HELP stack_db_retries_total Units of work retried after a MySQL error.",
+        "# TYPE stack_db_retries_total counter",
+    ]
+    for code, count in sorted(counters["retries"].items()):
+        lines.append(f'stack_db_retries_total{{code="{code}"}} {count}')
+    lines += [
+        "# HELP stack_db_retry_recovered_total Retried units that then succeeded.",
+        "# TYPE stack_db_retry_recovered_total counter",
+        f"stack_db_retry_recovered_total {counters['recovered']}",
+        "# HELP stack_db_retry_gave_up_total Units failed after giving up retrying.",
+        "# TYPE stack_db_retry_gave_up_total counter",
+    ]
+    for (code, reason), count in sorted(counters["gave_up"].items()):
+        lines.append(
+            f'stack_db_retry_gave_up_total{{code="{code}",reason="{reason}"}} {count}'
+        )
+    return "\n".join(lines) + "\n"
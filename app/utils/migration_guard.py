@@ -0,0 +1,84 @@
+# app/utils/migration_guard.py
+
+import logging
+import os
+import subprocess
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from alembic.script import ScriptDirectory
+from sqlalchemy import text
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_LOCK_NAME = "stack_service_migrations"
+
+
+def get_head_revisions(alembic_config) -> set:
+    """Returns the head revisions of the migration scripts on disk."""
+    return set(ScriptDirectory.from_config(alembic_config).get_heads())
+
+
+def get_current_revisions(connection) -> set:
+    """Returns the revisions stamped in ``alembic_version`` (empty if missing)."""
+    try:
+        rows = connection.execute(text("SELECT version_num FROM alembic_version"))
+    except SQLAlchemyError:
+        # The table does not exist before the very first upgrade
+        return set()
+    return set(rows.scalars())
+
+
+def is_schema_current(connection, alembic_config) -> bool:
+    """Checks with a single query whether the database is already at head."""
+    return get_current_revisions(connection) == get_head_revisions(alembic_config)
+
+
+@contextmanager
+def advisory_lock(connection, name=MIGRATION_LOCK_NAME, timeout=600):
+    """Holds a database-wide named lock for the duration of the block.
+
+    Uses ``GET_LOCK`` on MySQL, which is tied to ``connection``; other
+    dialects run unlocked. Raises ``TimeoutError`` if the lock could not be
+    acquired within ``timeout`` seconds.
+    """
+    if connection.dialect.name != "mysql":
+        logger.debug("No advisory lock on %s; continuing", connection.dialect.name)
+        yield
+        return
+
+    acquired = connection.execute(
+        text("SELECT GET_LOCK(:name, :timeout)"), {"name": name, "timeout": timeout}
+    ).scalar()
+    if acquired != 1:
+        raise TimeoutError(f"Could not acquire lock {name} within {timeout}s")
+    logger.info("Acquired advisory lock %s", name)
+    try:
+        yield
+    finally:
+        connection.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": name})
+        logger.info("Released advisory lock %s", name)
+
+
+def backup_database(url, backup_dir) -> str:
+    """Dumps the database behind ``url`` with mysqldump and returns the file path."""
+    timestamp = datetime.now(timezone.utc).strftime("%Y-%m-%d_%H-%M-%S")
+    path = os.path.join(backup_dir, f"{url.database}_{timestamp}.sql")
+    command = ["mysqldump", "--single-transaction"]
+    if url.username:
+        command += ["-u", url.username]
+    if url.host:
+        command += ["-h", url.host]
+    if url.port:
+        command += ["-P", str(url.port)]
+    command.append(url.database)
+
+    # Passing the password through the environment keeps it out of `ps`
+    env = dict(os.environ)
+    if url.password:
+        env["MYSQL_PWD"] = url.password
+    logger.info("Backing up database %s to %s", url.database, path)
+    with open(path, "w") as backup_file:
+        subprocess.run(command, stdout=backup_file, env=env, check=True)
+    return path
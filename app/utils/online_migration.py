@@ -0,0 +1,220 @@
+# app/utils/online_migration.py
+
+import logging
+import time
+
+import sqlalchemy as sa
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 1000
+
+# Statement used to copy rows into a shadow table without clobbering rows the
+# triggers have already written there.
+_INSERT_IGNORE = {
+    "mysql": "INSERT IGNORE INTO",
+    "sqlite": "INSERT OR IGNORE INTO",
+}
+
+
+def _quote(bind, name) -> str:
+    return bind.dialect.identifier_preparer.quote(name)
+
+
+def _range_clause(pk, end) -> str:
+    if end is None:
+        return f"{pk} >= :start"
+    return f"{pk} >= :start AND {pk} < :end"
+
+
+def _throttle(pause) -> None:
+    if pause:
+        time.sleep(pause)
+
+
+def iter_pk_ranges(bind, table, batch_size=DEFAULT_BATCH_SIZE, pk="id"):
+    """Yields ``(start, end)`` primary key ranges of at most ``batch_size`` rows.
+
+    Boundaries are found by walking the primary key index, so gaps in the key
+    space never produce empty batches. ``end`` is exclusive; the last range
+    has ``end=None`` and also covers rows inserted while the walk runs.
+    """
+    table_q = _quote(bind, table)
+    pk_q = _quote(bind, pk)
+    start = bind.execute(sa.text(f"SELECT MIN({pk_q}) FROM {table_q}")).scalar()
+    next_start = sa.text(
+        f"SELECT {pk_q} FROM {table_q} WHERE {pk_q} >= :start "
+        f"ORDER BY {pk_q} LIMIT 1 OFFSET :offset"
+    )
+    while start is not None:
+        end = bind.execute(next_start, {"start": start, "offset": batch_size}).scalar()
+        yield start, end
+        start = end
+
+
+def backfill_in_chunks(
+    bind,
+    table,
+    set_clause,
+    where=None,
+    params=None,
+    batch_size=DEFAULT_BATCH_SIZE,
+    pause=0.0,
+    pk="id",
+) -> int:
+    """Runs ``UPDATE <table> SET <set_clause>`` one primary key range at a time.
+
+    Call it inside ``op.get_context().autocommit_block()`` so every batch
+    commits on its own and row locks are only held for a single chunk.
+    ``pause`` seconds are slept between batches to leave room for live
+    traffic and replication. Returns the number of rows updated.
+    """
+    table_q = _quote(bind, table)
+    pk_q = _quote(bind, pk)
+    params = params or {}
+    updated = 0
+    for batch, (start, end) in enumerate(
+        iter_pk_ranges(bind, table, batch_size, pk), start=1
+    ):
+        clause = _range_clause(pk_q, end)
+        if where:
+            clause = f"{clause} AND ({where})"
+        result = bind.execute(
+            sa.text(f"UPDATE {table_q} SET {set_clause} WHERE {clause}"),
+            {**params, "start": start, "end": end},
+        )
+        updated += result.rowcount
+        logger.info(
+            "Backfill of %s: batch %d (%s >= %s) updated %d rows",
+            table,
+            batch,
+            pk,
+            start,
+            result.rowcount,
+        )
+        _throttle(pause)
+    return updated
+
+
+def copy_in_chunks(
+    bind,
+    table,
+    target,
+    columns,
+    batch_size=DEFAULT_BATCH_SIZE,
+    pause=0.0,
+    pk="id",
+    ignore=False,
+) -> int:
+    """Copies ``columns`` of ``table`` into ``target``, one primary key range at a time.
+
+    As with ``backfill_in_chunks``, call it inside ``autocommit_block()`` so
+    each ``INSERT ... SELECT`` commits on its own and only holds shared locks
+    on one chunk of ``table``. With ``ignore``, rows clashing with ones
+    already in ``target`` are skipped. Returns the number of rows copied.
+    """
+    table_q = _quote(bind, table)
+    target_q = _quote(bind, target)
+    pk_q = _quote(bind, pk)
+    cols = ", ".join(_quote(bind, c) for c in columns)
+    insert = "INSERT INTO"
+    if ignore:
+        insert = _INSERT_IGNORE.get(bind.dialect.name, insert)
+    copied = 0
+    for start, end in iter_pk_ranges(bind, table, batch_size, pk):
+        result = bind.execute(
+            sa.text(
+                f"{insert} {target_q} ({cols}) SELECT {cols} FROM {table_q} "
+                f"WHERE {_range_clause(pk_q, end)}"
+            ),
+            {"start": start, "end": end},
+        )
+        copied += result.rowcount
+        logger.info("Copied %d rows of %s into %s", copied, table, target)
+        _throttle(pause)
+    return copied
+
+
+def _mirror_triggers(bind, table, shadow, columns, pk):
+    """Returns trigger definitions, keyed by name, that mirror writes."""
+    table_q = _quote(bind, table)
+    shadow_q = _quote(bind, shadow)
+    pk_q = _quote(bind, pk)
+    cols = ", ".join(_quote(bind, c) for c in columns)
+    new_values = ", ".join(f"NEW.{_quote(bind, c)}" for c in columns)
+    replace = f"REPLACE INTO {shadow_q} ({cols}) VALUES ({new_values})"
+    return {
+        f"{table}_osc_ins": f"AFTER INSERT ON {table_q} FOR EACH ROW {replace}",
+        f"{table}_osc_upd": f"AFTER UPDATE ON {table_q} FOR EACH ROW {replace}",
+        f"{table}_osc_del": (
+            f"AFTER DELETE ON {table_q} FOR EACH ROW "
+            f"DELETE FROM {shadow_q} WHERE {pk_q} = OLD.{pk_q}"
+        ),
+    }
+
+
+def copy_and_swap(
+    bind,
+    table,
+    create_shadow,
+    columns=None,
+    batch_size=DEFAULT_BATCH_SIZE,
+    pause=0.0,
+    pk="id",
+    keep_old=False,
+) -> int:
+    """Rebuilds ``table`` through a shadow copy followed by a rename swap.
+
+    ``create_shadow(name)`` must create the new table definition under
+    ``name`` (for example with ``op.create_table``). Rows are copied in primary
+    key chunks; on MySQL, triggers keep the shadow in sync with writes made
+    during the copy and the final ``RENAME TABLE`` swaps both tables
+    atomically. Other dialects have no triggers, so writes must be paused for
+    the duration of the copy. ``columns`` defaults to every column the two
+    tables share. Returns the number of rows copied.
+    """
+    shadow = f"_{table}_new"
+    old = f"_{table}_old"
+    mysql = bind.dialect.name == "mysql"
+
+    create_shadow(shadow)
+    if columns is None:
+        inspector = sa.inspect(bind)
+        shadow_columns = {c["name"] for c in inspector.get_columns(shadow)}
+        columns = [
+            c["name"]
+            for c in inspector.get_columns(table)
+            if c["name"] in shadow_columns
+        ]
+
+    triggers = _mirror_triggers(bind, table, shadow, columns, pk) if mysql else {}
+    for name, body in triggers.items():
+        bind.execute(sa.text(f"CREATE TRIGGER {_quote(bind, name)} {body}"))
+    if not mysql:
+        logger.warning(
+            "No write mirroring on %s; writes to %s must be paused during the copy",
+            bind.dialect.name,
+            table,
+        )
+
+    copied = copy_in_chunks(
+        bind, table, shadow, columns, batch_size, pause, pk, ignore=True
+    )
+
+    table_q = _quote(bind, table)
+    shadow_q = _quote(bind, shadow)
+    old_q = _quote(bind, old)
+    if mysql:
+        bind.execute(
+            sa.text(f"RENAME TABLE {table_q} TO {old_q}, {shadow_q} TO {table_q}")
+        )
+    else:
+        bind.execute(sa.text(f"ALTER TABLE {table_q} RENAME TO {old_q}"))
+        bind.execute(sa.text(f"ALTER TABLE {shadow_q} RENAME TO {table_q}"))
+    logger.info("Swapped %s with its shadow copy", table)
+
+    for name in triggers:
+        bind.execute(sa.text(f"DROP TRIGGER IF EXISTS {_quote(bind, name)}"))
+    if not keep_old:
+        bind.execute(sa.text(f"DROP TABLE {old_q}"))
+    return copied
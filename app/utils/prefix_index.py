@@ -0,0 +1,92 @@
+# app/utils/prefix_index.py
+
+import threading
+import time
+from bisect import bisect_left, insort
+
+
+class PrefixIndex:
+    """Sorted in-memory index of ``(key, id)`` pairs answering prefix lookups.
+
+    Keys are casefolded to match MySQL's case-insensitive collations. A
+    lookup is a binary search followed by a scan of at most ``limit`` entries.
+    Rows are only loaded once, so keys changed elsewhere are seen after the
+    next ``clear`` and reload.
+    """
+
+    def __init__(self) -> None:
+        self._entries = []
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.high_water_id = 0
+        self.refreshed_at = None
+        self.built_at = None
+        self.complete = False
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, key, item_id) -> None:
+        """Indexes a changed row; rows not loaded yet are left to ``refresh``."""
+        with self._lock:
+            if item_id <= self.high_water_id:
+                insort(self._entries, (key.casefold(), item_id))
+
+    def remove(self, key, item_id) -> None:
+        entry = (key.casefold(), item_id)
+        with self._lock:
+            position = bisect_left(self._entries, entry)
+            if position < len(self._entries) and self._entries[position] == entry:
+                del self._entries[position]
+
+    def refresh(self, fetch_rows, batch_size) -> int:
+        """Loads up to ``batch_size`` rows added since the last refresh.
+
+        ``fetch_rows(after_id, batch_size)`` must return ``(id, key)`` pairs
+        with ids greater than ``after_id`` in ascending id order. ``complete``
+        stays False until a refresh comes back with a partial batch, so large
+        tables are loaded over several bounded refreshes. Rows are fetched
+        outside the lock, so concurrent refreshes may fetch the same range;
+        each row is only added once. Returns the number of rows added.
+        """
+        with self._lock:
+            generation, after_id = self._generation, self.high_water_id
+        fetched = fetch_rows(after_id, batch_size)
+        with self._lock:
+            if generation != self._generation:
+                # Cleared meanwhile; these rows belong to the old index
+                return 0
+            rows = [row for row in fetched if row[0] > self.high_water_id]
+            self._entries.extend((key.casefold(), item_id) for item_id, key in rows)
+            # Timsort merges the already sorted run with the new tail cheaply
+            self._entries.sort()
+            if rows:
+                self.high_water_id = rows[-1][0]
+            now = time.monotonic()
+            if self.built_at is None:
+                self.built_at = now
+            self.complete = len(fetched) < batch_size
+            self.refreshed_at = now
+        return len(rows)
+
+    def clear(self) -> None:
+        """Empties the index so the following refreshes reload every row."""
+        with self._lock:
+            self._generation += 1
+            self._entries = []
+            self.high_water_id = 0
+            self.refreshed_at = None
+            self.built_at = None
+            self.complete = False
+
+    def search(self, prefix, limit) -> list:
+        """Returns ids of up to ``limit`` entries whose key starts with ``prefix``."""
+        prefix = prefix.casefold()
+        with self._lock:
+            position = bisect_left(self._entries, (prefix,))
+            ids = []
+            for key, item_id in self._entries[position : position + limit]:
+                if not key.startswith(prefix):
+                    break
+                ids.append(item_id)
+        return ids
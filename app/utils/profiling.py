@@ -0,0 +1,204 @@
+# app/utils/profiling.py
+
+import cProfile
+import functools
+import hashlib
+import hmac
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+
+from werkzeug.wsgi import ClosingIterator
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = "X-Profile"
+# WSGI environ key of PROFILE_HEADER
+_PROFILE_ENVIRON_KEY = "HTTP_X_PROFILE"
+# Set on requests that wanted a profile while another one was running
+PROFILE_BUSY_HEADER = "X-Profile-Busy"
+
+# Only one profiler can be active per process, and it sees every thread
+_profiling = threading.Lock()
+
+# Bounds on the collapsed stack walk, which can branch a lot on deep trees
+_MAX_DEPTH = 64
+_MIN_WEIGHT_US = 10
+
+
+def _signature(secret, expires, method, path) -> str:
+    message = f"{expires}:{method.upper()}:{path}".encode()
+    return hmac.new(secret.encode(), message, hashlib.sha256).hexdigest()
+
+
+def sign_profile_request(secret, method, path, ttl=300, now=None) -> str:
+    """Returns an ``X-Profile`` header value valid for ``method path`` for ``ttl`` s."""
+    expires = int((time.time() if now is None else now) + ttl)
+    return f"{expires}.{_signature(secret, expires, method, path)}"
+
+
+def verify_profile_request(secret, value, method, path, now=None) -> bool:
+    expires, _, signature = value.partition(".")
+    try:
+        if int(expires) < (time.time() if now is None else now):
+            return False
+    except ValueError:
+        return False
+    expected = _signature(secret, expires, method, path)
+    return hmac.compare_digest(signature, expected)
+
+
+def _label(func) -> str:
+    filename, lineno, name = func
+    if filename == "~":
+        # Built-in functions have no source location
+        return name
+    return f"{name} ({os.path.basename(filename)}:{lineno})"
+
+
+def _callee_times(stats):
+    """Maps each function to its callees and the time spent calling each."""
+    callees = defaultdict(dict)
+    for func, (_, _, _, _, callers) in stats.stats.items():
+        for caller, edge in callers.items():
+            callees[caller][func] = edge[3]
+    return callees
+
+
+def _walk(stats, callees, stacks, func, path, on_path, budget) -> None:
+    """Adds the stacks under ``func``, given ``budget`` s of its time."""
+    _, _, own, total, _ = stats.stats[func]
+    if total <= 0 or budget * 1e6 < _MIN_WEIGHT_US:
+        return
+    scale = min(budget / total, 1.0)
+    path = f"{path};{_label(func)}" if path else _label(func)
+    weight = int(own * scale * 1e6)
+    if weight:
+        stacks[path] += weight
+    if len(on_path) >= _MAX_DEPTH:
+        return
+    for callee, edge_total in callees[func].items():
+        if callee not in on_path:
+            on_callee = on_path | {callee}
+            _walk(stats, callees, stacks, callee, path, on_callee, edge_total * scale)
+
+
+def collapsed_stacks(stats) -> Counter:
+    """Turns ``pstats.Stats`` into collapsed stacks weighted in microseconds.
+
+    cProfile only records caller/callee pairs, so each callee's time is
+    split across the stacks leading to it in proportion to the time spent
+    along each edge. The result loads in flamegraph.pl and speedscope.
+    """
+    callees = _callee_times(stats)
+    stacks = Counter()
+    for func, (_, _, _, total, callers) in stats.stats.items():
+        if not callers:
+            _walk(stats, callees, stacks, func, "", frozenset([func]), total)
+    return stacks
+
+
+def _with_busy_header(start_response):
+    def busy_start_response(status, headers, exc_info=None):
+        headers.append((PROFILE_BUSY_HEADER, "1"))
+        return start_response(status, headers, exc_info)
+
+    return busy_start_response
+
+
+class ProfilerMiddleware:
+    """WSGI middleware that profiles sampled or explicitly signed requests.
+
+    Each profiled request writes ``<name>.pstats`` and ``<name>.collapsed``
+    to ``directory`` once its response is sent. Requests that are not profiled only pay for the
+    sampling draw and a header lookup. One request is profiled at a time
+    per process; others that want a profile meanwhile are served without
+    one and get a ``PROFILE_BUSY_HEADER``.
+    """
+
+    def __init__(self, app, directory, sample_rate=0.0, secret=None) -> None:
+        self.app = app
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.secret = secret
+        os.makedirs(directory, exist_ok=True)
+
+    def _wanted(self, environ) -> bool:
+        if self.sample_rate and random.random() < self.sample_rate:
+            return True
+        header = environ.get(_PROFILE_ENVIRON_KEY)
+        return bool(
+            header
+            and self.secret
+            and verify_profile_request(
+                self.secret,
+                header,
+                environ.get("REQUEST_METHOD", "GET"),
+                environ.get("PATH_INFO", "/"),
+            )
+        )
+
+    def __call__(self, environ, start_response):
+        if not self._wanted(environ):
+            return self.app(environ, start_response)
+
+        if not _profiling.acquire(blocking=False):
+            return self.app(environ, _with_busy_header(start_response))
+        profiler = cProfile.Profile()
+        started = time.perf_counter()
+        try:
+            # Flask responses are buffered, so this covers the whole request
+            response = profiler.runcall(self.app, environ, start_response)
+        finally:
+            elapsed = time.perf_counter() - started
+            _profiling.release()
+        # Written once the server has sent the response, so the profiled
+        # request does not wait for it
+        return ClosingIterator(
+            response, functools.partial(self._write, profiler, environ, elapsed)
+        )
+
+    def _write(self, profiler, environ, elapsed) -> None:
+        path = environ.get("PATH_INFO", "/")
+        slug = re.sub(r"[^A-Za-z0-9]+", "_", path).strip("_") or "root"
+        name = (
+            f"{time.strftime('%Y%m%dT%H%M%S')}-{environ.get('REQUEST_METHOD')}-"
+            f"{slug}-{int(elapsed * 1000)}ms-{os.getpid()}"
+        )
+        base = os.path.join(self.directory, name)
+        try:
+            stats = pstats.Stats(profiler)
+            stats.dump_stats(f"{base}.pstats")
+            with open(f"{base}.collapsed", "w") as f:
+                for stack, weight in sorted(collapsed_stacks(stats).items()):
+                    f.write(f"{stack} {weight}\n")
+        except OSError:
+            logger.exception("Could not write profile %s", base)
+            return
+        logger.info("Profiled %s in %.1f ms: %s.pstats", path, elapsed * 1000, base)
+
+
+def register_profiler(app) -> None:
+    """Wraps the app in ProfilerMiddleware when profiling is configured.
+
+    Without ``PROFILE_DIR``, or with neither a sample rate nor a secret, the
+    app is left untouched and profiling costs nothing.
+    """
+    config = app.config
+    directory = config.get("PROFILE_DIR")
+    sample_rate = config.get("PROFILE_SAMPLE_RATE", 0.0)
+    secret = config.get("PROFILE_SECRET")
+    if not directory or not (sample_rate or secret):
+        return
+    app.wsgi_app = ProfilerMiddleware(app.wsgi_app, directory, sample_rate, secret)
+    logger.warning(
+        "Request profiling enabled: sample rate %s, signed header %s, writing to %s",
+        sample_rate,
+        "on" if secret else "off",
+        directory,
+    )
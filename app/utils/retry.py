@@ -0,0 +1,179 @@
+# app/utils/retry.py
+
+import asyncio
+import functools
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import current_app, has_app_context
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.util.concurrency import await_only, in_greenlet
+
+from app.utils.deadlines import time_left
+from app.utils.metrics import retry_counters
+
+try:
+    import greenlet  # noqa: F401
+except ImportError:
+    # Only the ASGI app runs services in greenlets; WSGI deploys may lack it
+    HAS_GREENLET = False
+else:
+    HAS_GREENLET = True
+
+logger = logging.getLogger(__name__)
+
+# Lock wait timeout and deadlock: MySQL rolled the transaction back, so
+# running it again from the start is safe, writes included
+LOCK_MYSQL_ERRORS = frozenset({1205, 1213})
+# Also server gone away and lost connection, after which a commit may or may
+# not have happened: only safe for units that can run twice
+RETRYABLE_MYSQL_ERRORS = LOCK_MYSQL_ERRORS | {2006, 2013}
+
+# Set while a retried unit runs, so units it calls leave retrying to it
+_in_unit = ContextVar("in_retried_unit", default=False)
+# The current request's policy, with the retries it may still spend
+_policy = ContextVar("retry_policy", default=None)
+
+
+class RetryPolicy:
+    """``DB_RETRY_*`` settings plus a retry budget shared by all units of a
+    request, including those it scatters to other threads."""
+
+    def __init__(self, attempts=3, base=0.05, cap=1.0, budget=None) -> None:
+        self.attempts = attempts
+        self.base = base
+        self.cap = cap
+        self._lock = threading.Lock()
+        self._budget = budget
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            attempts=config.get("DB_RETRY_ATTEMPTS", 1),
+            base=config.get("DB_RETRY_BASE_SECONDS", 0.05),
+            cap=config.get("DB_RETRY_MAX_SECONDS", 1.0),
+            budget=config.get("DB_RETRY_BUDGET"),
+        )
+
+    def take(self) -> bool:
+        """Spends one retry of the budget; False once it is used up."""
+        with self._lock:
+            if self._budget is None:
+                return True
+            if self._budget <= 0:
+                return False
+            self._budget -= 1
+            return True
+
+
+@contextmanager
+def retry_policy(config):
+    """Retries the units run in the block per ``config``, within one budget."""
+    token = _policy.set(RetryPolicy.from_config(config))
+    try:
+        yield
+    finally:
+        _policy.reset(token)
+
+
+def transient_error_code(error, codes=RETRYABLE_MYSQL_ERRORS):
+    """Returns the MySQL code of a retryable error, looking through the
+    ``DatabaseError`` services wrap them in, or None."""
+    for candidate in (error, error.__cause__):
+        if isinstance(candidate, DBAPIError):
+            args = getattr(candidate.orig, "args", None)
+            if args and args[0] in codes:
+                return args[0]
+    return None
+
+
+def backoff_delay(retry, base, cap) -> float:
+    """Full jitter: a random delay up to ``base * 2**retry``, capped at ``cap``."""
+    return random.uniform(0, min(cap, base * 2**retry))
+
+
+def _sleep(seconds) -> None:
+    if HAS_GREENLET and in_greenlet():
+        # A service run by the ASGI app must not block its event loop
+        await_only(asyncio.sleep(seconds))
+    else:
+        time.sleep(seconds)
+
+
+def _current_policy():
+    policy = _policy.get()
+    if policy is None:
+        # Outside a request (CLI, jobs): the app's settings, no shared budget
+        config = current_app.config if has_app_context() else {}
+        policy = RetryPolicy.from_config({**config, "DB_RETRY_BUDGET": None})
+    return policy
+
+
+def _give_up_reason(policy, retry, delay):
+    if retry >= policy.attempts:
+        return "attempts"
+    remaining = time_left()
+    if remaining is not None and delay >= remaining:
+        return "deadline"
+    if not policy.take():
+        return "budget"
+    return None
+
+
+def retry_transient(unit=None, *, codes=RETRYABLE_MYSQL_ERRORS):
+    """Re-runs the idempotent ``unit`` when it fails on a transient MySQL error.
+
+    The whole call is repeated, so it must open its own sessions and be
+    safe to run twice. It runs up to ``DB_RETRY_ATTEMPTS`` times, with a
+    jittered, capped exponential backoff in between, and stops early when
+    the request's retry budget (``DB_RETRY_BUDGET``) or deadline would be
+    exceeded. Units called by a retried unit fail straight through to it.
+
+    Use ``@retry_transient(codes=LOCK_MYSQL_ERRORS)`` for writes that must
+    not run again after a lost connection, which may have committed them.
+    """
+    if unit is None:
+        return functools.partial(retry_transient, codes=codes)
+
+    @functools.wraps(unit)
+    def wrapper(*args, **kwargs):
+        if _in_unit.get():
+            return unit(*args, **kwargs)
+        policy = _current_policy()
+        token = _in_unit.set(True)
+        try:
+            retry = 0
+            while True:
+                try:
+                    result = unit(*args, **kwargs)
+                except Exception as e:
+                    code = transient_error_code(e, codes)
+                    if code is None:
+                        raise
+                    delay = backoff_delay(retry, policy.base, policy.cap)
+                    retry += 1
+                    reason = _give_up_reason(policy, retry, delay)
+                    if reason is not None:
+                        retry_counters.gave_up(code, reason)
+                        raise
+                    retry_counters.retried(code)
+                    logger.warning(
+                        "Retrying %s in %.3fs after MySQL error %s (retry %d)",
+                        unit.__name__,
+                        delay,
+                        code,
+                        retry,
+                    )
+                    _sleep(delay)
+                    continue
+                if retry:
+                    retry_counters.recovered()
+                return result
+        finally:
+            _in_unit.reset(token)
+
+    return wrapper
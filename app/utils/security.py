@@ -0,0 +1,85 @@
+# app/utils/security.py
+
+import functools
+import statistics
+import time
+
+import bcrypt
+from flask import current_app
+
+# bcrypt's own bounds on the cost factor
+MIN_ROUNDS = 4
+MAX_ROUNDS = 31
+
+
+def hash_password(password, rounds=None) -> str:
+    """Hashes ``password`` with bcrypt, by default at the configured cost."""
+    if rounds is None:
+        rounds = current_app.config["BCRYPT_ROUNDS"]
+    return bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds=rounds)).decode()
+
+
+def check_password(password, hashed) -> bool:
+    """Tells whether ``password`` matches the bcrypt ``hashed`` value."""
+    try:
+        return bcrypt.checkpw(password.encode(), hashed.encode())
+    except ValueError:
+        # Not a bcrypt hash
+        return False
+
+
+def hash_rounds(hashed):
+    """Returns the cost factor of a ``$2b$12$...`` hash, or None if not bcrypt."""
+    parts = hashed.split("$")
+    if len(parts) != 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+@functools.lru_cache(maxsize=4)
+def _dummy_hash(rounds) -> str:
+    return hash_password("not a password", rounds)
+
+
+def verify_and_update(password, hashed, rounds=None):
+    """Checks ``password`` and says whether its hash should be replaced.
+
+    Returns ``(verified, new_hash)``. ``new_hash`` is a fresh hash at
+    ``rounds`` (the configured cost by default) when the password matched
+    a hash of a different cost, and None otherwise. With no ``hashed``
+    value a dummy hash is checked instead, so unknown users take as long
+    as known ones.
+    """
+    if rounds is None:
+        rounds = current_app.config["BCRYPT_ROUNDS"]
+    if hashed is None:
+        check_password(password, _dummy_hash(rounds))
+        return False, None
+    if not check_password(password, hashed):
+        return False, None
+    if hash_rounds(hashed) == rounds:
+        return True, None
+    return True, hash_password(password, rounds)
+
+
+def calibrate_rounds(target_seconds, min_rounds=10, max_rounds=16, samples=3):
+    """Finds the highest cost whose median hash time stays within the target.
+
+    Each extra round doubles the work, so measuring stops at the first
+    cost over the target. Returns ``(rounds, {rounds: median_seconds})``;
+    ``rounds`` is ``min_rounds`` even when that is already too slow.
+    """
+    timings = {}
+    chosen = min_rounds
+    for rounds in range(min_rounds, max_rounds + 1):
+        durations = []
+        for _ in range(samples):
+            salt = bcrypt.gensalt(rounds=rounds)
+            started = time.perf_counter()
+            bcrypt.hashpw(b"calibration password", salt)
+            durations.append(time.perf_counter() - started)
+        timings[rounds] = statistics.median(durations)
+        if timings[rounds] > target_seconds:
+            break
+        chosen = rounds
+    return chosen, timings
@@ -0,0 +1,118 @@
+# app/utils/snapshot_cache.py
+
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotCache:
+    """Thread-safe LRU cache whose hottest entries can be saved and reloaded.
+
+    Entries expire ``ttl`` seconds after they were fetched. The fetch time
+    is wall-clock time so it stays meaningful in the process that loads a
+    snapshot written by another one.
+    """
+
+    def __init__(self, capacity, ttl, clock=time.time) -> None:
+        self.capacity = capacity
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._clock() - entry[0] >= self.ttl:
+                self._entries.pop(key, None)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, value, fetched_at=None) -> None:
+        with self._lock:
+            self._entries[key] = (fetched_at or self._clock(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.capacity:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def invalidate(self, keys) -> None:
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def hottest(self, limit) -> list:
+        """Returns up to ``limit`` live ``(key, fetched_at, value)``, hottest first."""
+        now = self._clock()
+        with self._lock:
+            entries = reversed(self._entries.items())
+            return [
+                (key, fetched_at, value)
+                for key, (fetched_at, value) in entries
+                if now - fetched_at < self.ttl
+            ][:limit]
+
+    def save(self, path, limit) -> int:
+        """Writes the ``limit`` hottest entries to ``path``; returns how many.
+
+        The file is zlib-compressed JSON, readable only by its owner, and
+        replaced atomically so a worker starting meanwhile never sees half of
+        it.
+        """
+        entries = self.hottest(limit)
+        data = zlib.compress(
+            json.dumps({"version": SNAPSHOT_VERSION, "entries": entries}).encode()
+        )
+        directory = os.path.dirname(os.path.abspath(path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return len(entries)
+
+    def load(self, path) -> int:
+        """Adds the unexpired entries saved at ``path``; returns how many.
+
+        A missing or unreadable snapshot only means a cold start.
+        """
+        try:
+            with open(path, "rb") as f:
+                snapshot = json.loads(zlib.decompress(f.read()))
+            if snapshot["version"] != SNAPSHOT_VERSION:
+                return 0
+            entries = snapshot["entries"]
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError, KeyError, zlib.error):
+            logger.warning("Ignoring unreadable cache snapshot %s", path, exc_info=True)
+            return 0
+
+        now = self._clock()
+        live = [(k, t, v) for k, t, v in entries if now - t < self.ttl]
+        # Coldest first, so the hottest entries end up most recently used
+        for key, fetched_at, value in reversed(live[: self.capacity]):
+            self.put(key, value, fetched_at)
+        return len(live[: self.capacity])
@@ -0,0 +1,35 @@
+# app/utils/tokens.py
+
+import time
+
+import jwt
+from flask import current_app
+
+from app.utils.exceptions import AuthenticationError
+
+
+def issue_token(user_id) -> dict:
+    """Returns a signed bearer token for ``user_id`` and its lifetime."""
+    config = current_app.config
+    expires_in = config["JWT_EXPIRES_SECONDS"]
+    now = int(time.time())
+    token = jwt.encode(
+        {"sub": str(user_id), "iat": now, "exp": now + expires_in},
+        config["JWT_SECRET_KEY"],
+        algorithm=config["JWT_ALGORITHM"],
+    )
+    return {"access_token": token, "token_type": "Bearer", "expires_in": expires_in}
+
+
+def decode_token(token, config) -> int:
+    """Returns the user id of a valid, unexpired bearer token."""
+    try:
+        claims = jwt.decode(
+            token,
+            config["JWT_SECRET_KEY"],
+            algorithms=[config["JWT_ALGORITHM"]],
+            options={"require": ["exp", "sub"]},
+        )
+        return int(claims["sub"])
+    except (jwt.InvalidTokenError, ValueError) as e:
+        raise AuthenticationError("Invalid or expired token") from e
@@ -0,0 +1,298 @@
+# app/utils/tracing.py
+
+import contextlib
+import functools
+import inspect
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+from contextvars import ContextVar
+
+from flask import request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# W3C Trace Context header: version-trace id-parent span id-flags
+TRACEPARENT_HEADER = "traceparent"
+_TRACEPARENT = re.compile(r"00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+_INVALID_TRACE_ID = "0" * 32
+_INVALID_SPAN_ID = "0" * 16
+
+# Long statements are cut so one bulk query cannot bloat the trace file
+_MAX_STATEMENT_LENGTH = 500
+
+# Innermost open span of the current request; None when it is not sampled
+_current_span = ContextVar("current_span", default=None)
+_NO_SPAN = contextlib.nullcontext()
+
+
+def _new_id(size) -> str:
+    return os.urandom(size).hex()
+
+
+def parse_traceparent(value):
+    """Returns ``(trace_id, parent_span_id, sampled)``, or None if invalid."""
+    match = _TRACEPARENT.fullmatch((value or "").strip().lower())
+    if match is None:
+        return None
+    trace_id, parent_id, flags = match.groups()
+    if trace_id == _INVALID_TRACE_ID or parent_id == _INVALID_SPAN_ID:
+        return None
+    return trace_id, parent_id, bool(int(flags, 16) & 1)
+
+
+class Span:
+    """A timed operation of a sampled trace; also a context manager that
+    makes it the parent of spans opened inside it."""
+
+    __slots__ = (
+        "_trace",
+        "name",
+        "span_id",
+        "parent_id",
+        "attributes",
+        "error",
+        "start",
+        "_started",
+        "duration",
+        "_token",
+    )
+
+    def __init__(self, trace, name, parent_id, attributes) -> None:
+        self._trace = trace
+        self.name = name
+        self.span_id = _new_id(8)
+        self.parent_id = parent_id
+        self.attributes = attributes
+        self.error = None
+        self.start = time.time()
+        self._started = time.perf_counter()
+        self.duration = None
+        self._token = None
+
+    @property
+    def trace_id(self) -> str:
+        return self._trace.trace_id
+
+    def child(self, name, **attributes) -> "Span":
+        return Span(self._trace, name, self.span_id, attributes)
+
+    def end(self) -> None:
+        self.duration = time.perf_counter() - self._started
+        self._trace.finished(self)
+
+    def __enter__(self) -> "Span":
+        self._token = _current_span.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        _current_span.reset(self._token)
+        if exc_type is not None:
+            self.error = exc_type.__name__
+        self.end()
+        return False
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+class _Trace:
+    """Collects the spans of one request and exports them when its root ends."""
+
+    __slots__ = ("trace_id", "root", "spans", "exporter")
+
+    def __init__(self, trace_id, exporter) -> None:
+        self.trace_id = trace_id
+        self.root = None
+        self.spans = []
+        self.exporter = exporter
+
+    def finished(self, span) -> None:
+        # list.append is atomic, so spans may end on scatter's threads
+        self.spans.append(span)
+        if span is self.root:
+            try:
+                self.exporter.export([s.to_dict() for s in self.spans])
+            except Exception:
+                logger.exception("Could not export trace %s", self.trace_id)
+
+
+class FileExporter:
+    """Appends spans as JSON lines to ``path``.
+
+    Each trace is written with a single append, so workers sharing the
+    file do not interleave their lines.
+    """
+
+    def __init__(self, path) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans) -> None:
+        lines = "".join(json.dumps(span, default=str) + "\n" for span in spans)
+        with self._lock, open(self.path, "a") as f:
+            f.write(lines)
+
+
+class Tracer:
+    """Starts the root span of requests picked for tracing.
+
+    A request carrying a valid ``traceparent`` joins that trace and follows
+    its sampled flag; others are sampled at ``sample_rate``. Spans are
+    handed to ``exporter.export(spans)`` as dicts, one call per trace.
+    """
+
+    def __init__(self, exporter, sample_rate=0.0) -> None:
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def start(self, name, traceparent=None, **attributes):
+        """Returns the root ``Span`` of a new trace, or None if not sampled."""
+        parent = parse_traceparent(traceparent)
+        if parent is not None:
+            trace_id, parent_id, sampled = parent
+        else:
+            trace_id, parent_id = None, None
+            sampled = self.sample_rate and random.random() < self.sample_rate
+        if not sampled:
+            return None
+        trace = _Trace(trace_id or _new_id(16), self.exporter)
+        trace.root = Span(trace, name, parent_id, attributes)
+        return trace.root
+
+
+def span(name, **attributes):
+    """Opens a child span of the current one, as a context manager.
+
+    Outside of a sampled request this is a shared no-op context, so spans
+    cost next to nothing on requests that are not traced.
+    """
+    parent = _current_span.get()
+    if parent is None:
+        return _NO_SPAN
+    return parent.child(name, **attributes)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    parent = _current_span.get()
+    if parent is None or context is None:
+        return
+    verb = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    context._trace_span = parent.child(
+        f"db {verb}",
+        statement=statement[:_MAX_STATEMENT_LENGTH],
+        database=conn.engine.url.database,
+    )
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    statement_span = context.__dict__.pop("_trace_span", None) if context else None
+    if statement_span is not None:
+        statement_span.attributes["rows"] = cursor.rowcount
+        statement_span.end()
+
+
+def _handle_error(exception_context):
+    context = exception_context.execution_context
+    statement_span = context.__dict__.pop("_trace_span", None) if context else None
+    if statement_span is not None:
+        statement_span.error = type(exception_context.original_exception).__name__
+        statement_span.end()
+
+
+def trace_statements() -> None:
+    """Records a span for every statement run by any engine of the process."""
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
+
+
+def _request_hooks(tracer, current_request):
+    """Returns the before, after and teardown hooks around each request."""
+
+    def start_request_span():
+        rule = current_request.url_rule
+        route = rule.rule if rule is not None else current_request.path
+        root = tracer.start(
+            f"{current_request.method} {route}",
+            current_request.headers.get(TRACEPARENT_HEADER),
+            method=current_request.method,
+            path=current_request.path,
+        )
+        # Always set, so a span can never leak into the next request
+        _current_span.set(root)
+
+    def record_status(response):
+        root = _current_span.get()
+        if root is not None:
+            root.attributes["status"] = response.status_code
+        return response
+
+    def end_request_span(exc):
+        root = _current_span.get()
+        if root is None:
+            return
+        _current_span.set(None)
+        if exc is not None:
+            root.error = type(exc).__name__
+        root.end()
+
+    return start_request_span, record_status, end_request_span
+
+
+def _as_coroutine(hook):
+    @functools.wraps(hook)
+    async def async_hook(*args):
+        return hook(*args)
+
+    return async_hook
+
+
+def register_tracing(app, current_request=request, exporter=None) -> None:
+    """Traces sampled requests from dispatch down to each database statement.
+
+    Spans go to ``exporter``, or by default to a ``FileExporter`` on
+    ``TRACE_FILE``. Without either the app is left untouched and tracing
+    costs nothing.
+    """
+    config = app.config
+    if exporter is None:
+        path = config.get("TRACE_FILE")
+        if not path:
+            return
+        exporter = FileExporter(path)
+    tracer = Tracer(exporter, config.get("TRACE_SAMPLE_RATE", 0.0))
+    app.extensions["tracer"] = tracer
+    trace_statements()
+
+    hooks = _request_hooks(tracer, current_request)
+    if inspect.iscoroutinefunction(app.full_dispatch_request):
+        # As in register_authentication: sync hooks would run in a thread
+        # with a copy of the context and never see the request's span
+        hooks = [_as_coroutine(hook) for hook in hooks]
+    start, after, teardown = hooks
+    app.before_request(start)
+    app.after_request(after)
+    app.teardown_request(teardown)
+    logger.warning(
+        "Request tracing enabled: sample rate %s, exporting to %s",
+        tracer.sample_rate,
+        getattr(exporter, "path", type(exporter).__name__),
+    )
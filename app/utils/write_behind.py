@@ -0,0 +1,90 @@
+# app/utils/write_behind.py
+
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+
+class WriteBehindBuffer:
+    """Coalesces writes per key in memory and hands them over in batches.
+
+    ``put`` only updates a dict under a lock; repeated puts for a key are
+    combined with ``merge``. A daemon thread, started by the first put,
+    passes everything pending to ``flush`` every ``interval`` seconds, or
+    as soon as ``max_pending`` keys wait. A failed batch is put back, up
+    to ten times ``max_pending`` keys, and retried with the next one.
+    Call ``stop`` on shutdown to write what is left.
+    """
+
+    def __init__(self, flush, interval=5.0, max_pending=1000, merge=max) -> None:
+        self._flush = flush
+        self.interval = interval
+        self.max_pending = max_pending
+        self._merge = merge
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+        self._stopped = False
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def put(self, key, value) -> None:
+        with self._lock:
+            current = self._pending.get(key)
+            self._pending[key] = (
+                value if current is None else self._merge(current, value)
+            )
+            pending = len(self._pending)
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(
+                    target=self._run, name="write-behind", daemon=True
+                )
+                self._thread.start()
+        if pending >= self.max_pending:
+            self._wake.set()
+
+    def _run(self) -> None:
+        while not self._stopped:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            if not self._stopped:
+                self.flush()
+
+    def _requeue(self, batch) -> None:
+        with self._lock:
+            if len(self._pending) + len(batch) > self.max_pending * 10:
+                logger.error("Dropping %d buffered writes after a failure", len(batch))
+                return
+            for key, value in batch.items():
+                current = self._pending.get(key)
+                self._pending[key] = (
+                    value if current is None else self._merge(current, value)
+                )
+
+    def flush(self) -> int:
+        """Writes everything pending now; returns the number of keys written."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return 0
+            try:
+                self._flush(batch)
+            except Exception:
+                logger.exception("Write-behind flush of %d keys failed", len(batch))
+                self._requeue(batch)
+                return 0
+            return len(batch)
+
+    def stop(self, timeout=10.0) -> int:
+        """Stops the flush thread and writes what is still pending."""
+        self._stopped = True
+        self._wake.set()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+        return self.flush()
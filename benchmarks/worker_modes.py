@@ -0,0 +1,163 @@
+# benchmarks/worker_modes.py
+"""Compares uWSGI processes x threads configurations under concurrent load.
+
+Each configuration is started with the options from uwsgi.ini, driven by
+``--concurrency`` clients against an I/O-bound endpoint for ``--duration``
+seconds, and reported with its throughput, latency percentiles and the
+summed RSS of its workers. The database configured in the environment
+(FLASK_ENV, DB_* / LOCAL_DATABASE_URL) must be reachable.
+
+    pipenv run python benchmarks/worker_modes.py --mode 4x1 --mode 2x4 --mode 4x4
+"""
+
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+import requests
+
+HEALTH_PATH = "/service/stack/health"
+DEFAULT_PATH = "/service/stack/users/search?q=a&fields=username"
+
+
+def parse_mode(value):
+    """Parses ``"<processes>x<threads>"``."""
+    processes, _, threads = value.partition("x")
+    try:
+        return int(processes), int(threads)
+    except ValueError:
+        raise click.BadParameter(f"{value!r} is not <processes>x<threads>")
+
+
+def start_uwsgi(processes, threads, port):
+    command = [
+        "uwsgi",
+        "--module=app.server:app",
+        "--master",
+        f"--processes={processes}",
+        f"--threads={threads}",
+        "--lazy-apps",
+        "--thunder-lock",
+        "--enable-threads",
+        "--die-on-term",
+        f"--http-socket=127.0.0.1:{port}",
+        "--disable-logging",
+    ]
+    server = subprocess.Popen(
+        command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{port}{HEALTH_PATH}").ok:
+                return server
+        except requests.ConnectionError:
+            pass
+        time.sleep(0.2)
+    server.terminate()
+    raise click.ClickException(f"uWSGI did not come up on port {port}")
+
+
+def _children(pid):
+    try:
+        with open(f"/proc/{pid}/task/{pid}/children") as f:
+            return [int(child) for child in f.read().split()]
+    except FileNotFoundError:
+        return []
+
+
+def _rss_kb(pid) -> int:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def workers_rss_mb(master_pid) -> float:
+    """Sums the resident memory of the master's worker processes (Linux)."""
+    return sum(_rss_kb(pid) for pid in _children(master_pid)) / 1024
+
+
+def run_load(url, concurrency, duration):
+    """Keeps ``concurrency`` clients busy for ``duration`` seconds."""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def client():
+        nonlocal errors
+        session = requests.Session()
+        own = []
+        failed = 0
+        while time.monotonic() < deadline:
+            started = time.perf_counter()
+            try:
+                ok = session.get(url, timeout=30).ok
+            except requests.RequestException:
+                ok = False
+            own.append(time.perf_counter() - started)
+            failed += not ok
+        with lock:
+            latencies.extend(own)
+            errors += failed
+
+    started = time.monotonic()
+    with ThreadPoolExecutor(concurrency) as pool:
+        for _ in range(concurrency):
+            pool.submit(client)
+    return latencies, errors, time.monotonic() - started
+
+
+def summarize(latencies, errors, elapsed) -> dict:
+    if len(latencies) < 2:
+        raise click.ClickException("Too few requests completed to summarize")
+    cuts = statistics.quantiles(latencies, n=100)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "rps": len(latencies) / elapsed,
+        "p50_ms": cuts[49] * 1000,
+        "p95_ms": cuts[94] * 1000,
+        "p99_ms": cuts[98] * 1000,
+    }
+
+
+@click.command()
+@click.option("--mode", "modes", multiple=True, default=["4x1", "2x4", "4x4"])
+@click.option("--concurrency", default=32, show_default=True)
+@click.option("--duration", default=20.0, show_default=True)
+@click.option("--warmup", default=3.0, show_default=True)
+@click.option("--path", default=DEFAULT_PATH, show_default=True)
+@click.option("--port", default=5099, show_default=True)
+def main(modes, concurrency, duration, warmup, path, port) -> None:
+    """Benchmark uWSGI processes x threads modes."""
+    url = f"http://127.0.0.1:{port}{path}"
+    click.echo(
+        f"{'mode':>6} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+        f"{'errors':>7} {'RSS MB':>8}"
+    )
+    for mode in modes:
+        processes, threads = parse_mode(mode)
+        server = start_uwsgi(processes, threads, port)
+        try:
+            run_load(url, concurrency, warmup)
+            result = summarize(*run_load(url, concurrency, duration))
+            rss = workers_rss_mb(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+        click.echo(
+            f"{mode:>6} {result['rps']:>9.1f} {result['p50_ms']:>8.1f} "
+            f"{result['p95_ms']:>8.1f} {result['p99_ms']:>8.1f} "
+            f"{result['errors']:>7} {rss:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
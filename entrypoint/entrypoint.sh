@@ -4,9 +4,6 @@ set -e  # Exit immediately if a command exits with a non-zero status
 # Assign environment variables with default values
 readonly DB_HOST="${db_host:-db}"
 readonly DB_PORT="${db_port:-3306}"
-readonly DB_NAME="${db_name:-stack_service}"
-readonly DB_USER="${db_user:-stack_user}"
-readonly DB_PASSWORD="${db_password:-password}"
 
 # Function to wait for the MySQL database to be ready
 wait_for_db() {
@@ -19,33 +16,32 @@ wait_for_db() {
     echo "MySQL database is up and running!"
 }
 
-# Function to run Alembic migrations using Flask-Migrate
+# Function to run Alembic migrations using Flask-Migrate.
+# Skips everything when alembic_version is already at head; otherwise a
+# database lock ensures only one replica backs up and migrates while the
+# others wait.
 run_migrations() {
-    echo "Running Alembic migrations..."
-    flask db upgrade
-    echo "Alembic migrations completed successfully."
-}
-
-# Function to backup the database (optional)
-backup_database() {
+    echo "Checking Alembic migrations..."
     if [ "$FLASK_ENV" = "production" ]; then
-        echo "Backing up the production database..."
-        mysqldump -u "$DB_USER" -p"$DB_PASSWORD" "$DB_NAME" > /backups/"$DB_NAME"_$(date +%F_%T).sql
-        echo "Database backup completed."
+        # Back up the production database before migrating
+        flask db upgrade-if-needed --backup-dir /backups
+    else
+        flask db upgrade-if-needed
     fi
 }
 
 # Wait for the database to be ready
 wait_for_db
 
-# Backup the database if in production
-backup_database
-
-# Run migrations
+# Run migrations if needed
 run_migrations
 
 # Start the application
-if [ "$FLASK_ENV" = "staging" ] || [ "$FLASK_ENV" = "production" ]; then
+if [ "$SERVER_MODE" = "asgi" ]; then
+    # Async workers: each one holds many concurrent requests waiting on MySQL
+    echo "Starting uvicorn ASGI server..."
+    exec uvicorn app.asgi:app --host 0.0.0.0 --port 5001 --workers "${ASGI_WORKERS:-4}"
+elif [ "$FLASK_ENV" = "staging" ] || [ "$FLASK_ENV" = "production" ]; then
     echo "Starting uWSGI server..."
     exec uwsgi --ini uwsgi.ini
 else
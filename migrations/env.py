@@ -15,7 +15,16 @@ config = context.config
 fileConfig(config.config_file_name)
 logger = logging.getLogger('alembic.env')
 
+def get_shard():
+    # `flask db upgrade -x shard=N` migrates user shard N instead of the
+    # main database
+    return context.get_x_argument(as_dictionary=True).get('shard')
+
+
 def get_engine():
+    shard = get_shard()
+    if shard is not None:
+        return current_app.extensions['user_shards'].engines[int(shard)]
     try:
         # this works with Flask-SQLAlchemy<3 and Alchemical
         return current_app.extensions['migrate'].db.get_engine()
@@ -40,6 +49,8 @@ def get_engine_url():
 # Retrieve the database URL from the application's configuration
 app_config = get_config()
 database_url = app_config.SQLALCHEMY_DATABASE_URI
+if get_shard() is not None:
+    database_url = app_config.USER_SHARD_URIS[int(get_shard())]
 
 config.set_main_option('sqlalchemy.url', database_url)
 target_db = current_app.extensions['migrate'].db
@@ -0,0 +1,28 @@
+"""Add composite index for active users by creation time
+
+Revision ID: 4e7a0c9b2d15
+Revises: 9d4f1b2c7e61
+Create Date: 2026-10-19 10:41:03.218554
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e7a0c9b2d15'
+down_revision = '9d4f1b2c7e61'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Serves "active users created between X and Y" range scans in
+    # (created_at, id) order, so keyset pages are read straight off the index
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_is_active_created_at_id', ['is_active', 'created_at', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_is_active_created_at_id')
@@ -0,0 +1,27 @@
+"""Add last_seen_at to users
+
+Revision ID: 6c2d9a4e8f13
+Revises: b3c81e5f0a27
+Create Date: 2026-10-19 16:05:22.471930
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6c2d9a4e8f13'
+down_revision = 'b3c81e5f0a27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Nullable with no default, so MySQL 8 adds it as an instant metadata change
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_seen_at', sa.DateTime(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('last_seen_at')
@@ -0,0 +1,41 @@
+"""Add user_directory
+
+Revision ID: 9a41f7c3d2e8
+Revises: 6c2d9a4e8f13
+Create Date: 2026-10-19 17:42:09.318204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.utils.online_migration import copy_in_chunks
+
+
+# revision identifiers, used by Alembic.
+revision = '9a41f7c3d2e8'
+down_revision = '6c2d9a4e8f13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_directory',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('email', sa.String(length=255), nullable=False),
+    sa.Column('username', sa.String(length=150), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('email'),
+    sa.UniqueConstraint('username')
+    )
+    # Existing users keep their ids; new ids continue after the largest one.
+    # Copied in primary key chunks that each commit on their own, so users
+    # rows are only share-locked one chunk at a time
+    with op.get_context().autocommit_block():
+        copy_in_chunks(
+            op.get_bind(), 'users', 'user_directory',
+            ['id', 'email', 'username'], pause=0.1,
+        )
+
+
+def downgrade():
+    op.drop_table('user_directory')
@@ -0,0 +1,29 @@
+"""Add first and last name indexes for prefix search
+
+Revision ID: 9d4f1b2c7e61
+Revises: ec58f4d9d43a
+Create Date: 2026-10-19 09:12:41.503117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4f1b2c7e61'
+down_revision = 'ec58f4d9d43a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # InnoDB builds secondary indexes online, without blocking writes
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_users_first_name'), ['first_name'], unique=False)
+        batch_op.create_index(batch_op.f('ix_users_last_name'), ['last_name'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_users_last_name'))
+        batch_op.drop_index(batch_op.f('ix_users_first_name'))
@@ -0,0 +1,40 @@
+"""Add user counters and daily signup rollup tables
+
+Revision ID: b3c81e5f0a27
+Revises: 4e7a0c9b2d15
+Create Date: 2026-10-19 14:12:47.905311
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3c81e5f0a27'
+down_revision = '4e7a0c9b2d15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    user_counters = op.create_table('user_counters',
+    sa.Column('name', sa.String(length=32), nullable=False),
+    sa.Column('value', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.create_table('user_daily_signups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('signups', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('day')
+    )
+    # Counters start empty rather than being seeded with a full COUNT(*) here;
+    # run `flask users reconcile-stats` once after upgrading to fill them in
+    op.bulk_insert(user_counters, [
+        {'name': 'total', 'value': 0},
+        {'name': 'active', 'value': 0},
+    ])
+
+
+def downgrade():
+    op.drop_table('user_daily_signups')
+    op.drop_table('user_counters')
@@ -0,0 +1,36 @@
+"""Add user_events outbox
+
+Revision ID: d5e2b8a1c470
+Revises: 9a41f7c3d2e8
+Create Date: 2026-10-19 19:11:37.502114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd5e2b8a1c470'
+down_revision = '9a41f7c3d2e8'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_events',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), autoincrement=True, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('type', sa.String(length=32), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('user_events', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_user_events_created_at'), ['created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_events', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_user_events_created_at'))
+
+    op.drop_table('user_events')
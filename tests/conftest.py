@@ -1,20 +1,123 @@
 # tests/conftest.py
 
+import itertools
+import os
+
 import pytest
-from app import create_app
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
 
+# Every app the tests create runs on TestingConfig unless a test says otherwise
+os.environ.setdefault("FLASK_ENV", "testing")
 
-@pytest.fixture
-def app():
-    """Creates and configures a new app instance for each test."""
+from app import create_app  # noqa: E402
+from app.database import db  # noqa: E402
+from app.models import User, UserDirectory  # noqa: E402
+from app.utils.tokens import issue_token  # noqa: E402
+
+
+class _TestSession(Session):
+    """Session that stays on the connection of the test's transaction.
+
+    Flask-SQLAlchemy picks an engine per model, which would check out
+    connections outside of the transaction each test rolls back.
+    """
+
+    def get_bind(self, *args, **kwargs):
+        return self.bind
+
+
+def _enable_savepoints(engine) -> None:
+    """Lets SQLAlchemy, not pysqlite, emit BEGIN so SAVEPOINTs work."""
+
+    @event.listens_for(engine, "connect")
+    def _connect(dbapi_connection, connection_record):
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):
+        connection.exec_driver_sql("BEGIN")
+
+
+@pytest.fixture(scope="session")
+def _session_app():
+    """One app and schema per test process; tests never commit to it.
+
+    Under pytest-xdist each worker gets its own in-memory database.
+    """
     app = create_app()
-    app.config.update(
-        {
-            "TESTING": True,
-            # You can add more test-specific configurations here if needed
+    with app.app_context():
+        _enable_savepoints(db.engine)
+        db.create_all()
+    yield app
+    app.extensions["last_seen"].stop()
+
+
+@pytest.fixture
+def app(_session_app):
+    """The shared app, inside a transaction rolled back after the test.
+
+    Commits made by the code under test only release a savepoint, so each
+    test starts from empty tables and its config changes are undone.
+    """
+    app = _session_app
+    config = dict(app.config)
+    with app.app_context():
+        connection = db.engine.connect()
+        transaction = connection.begin()
+        scoped_session = db.session
+        db.session = db._make_scoped_session(
+            {
+                "class_": _TestSession,
+                "bind": connection,
+                "join_transaction_mode": "create_savepoint",
+            }
+        )
+        try:
+            yield app
+        finally:
+            # Pending writes land in, and are undone with, the transaction
+            app.extensions["last_seen"].flush()
+            app.extensions["user_cache"].clear()
+            db.session.remove()
+            db.session = scoped_session
+            transaction.rollback()
+            connection.close()
+            app.config.clear()
+            app.config.update(config)
+
+
+@pytest.fixture
+def make_user(app):
+    """Returns a factory that inserts users with unique default values."""
+    counter = itertools.count(1)
+
+    def _make_user(**overrides):
+        n = next(counter)
+        values = {
+            "email": f"user{n}@example.com",
+            "username": f"user{n}",
+            "password": "not-a-real-hash",
+            "first_name": "First",
+            "last_name": "Last",
         }
-    )
+        values.update(overrides)
+        # Ids come from the directory, as for users created by the service
+        entry = UserDirectory(email=values["email"], username=values["username"])
+        db.session.add(entry)
+        db.session.flush()
+        user = User(id=entry.id, **values)
+        db.session.add(user)
+        db.session.commit()
+        return user
+
+    return _make_user
 
-    yield app
 
-    # Teardown can be done here if necessary
+@pytest.fixture
+def admin_headers(app, make_user):
+    """Authorization headers of a user the app treats as an admin."""
+    admin = make_user(username="admin")
+    app.config["ADMIN_USER_IDS"] = frozenset({admin.id})
+    token = issue_token(admin.id)["access_token"]
+    return {"Authorization": f"Bearer {token}"}
@@ -0,0 +1,243 @@
+# tests/test_async_app.py
+
+import asyncio
+import json
+
+import pytest
+from sqlalchemy import text
+
+from app.async_app import create_asgi_app
+from app.async_database import async_database_uri, run_service
+from app.database import db, get_db
+from app.utils.tokens import issue_token
+
+
+@pytest.fixture
+def asgi_app(monkeypatch, tmp_path):
+    """An ASGI app on a SQLite file, which the sync and async engines share."""
+    uri = f"sqlite:///{tmp_path / 'stack.db'}"
+    monkeypatch.setattr("app.config.TestingConfig.SQLALCHEMY_DATABASE_URI", uri)
+    app = create_asgi_app()
+    app.config.update({"TESTING": True, "BCRYPT_ROUNDS": 4})
+    flask_app = app.extensions["flask_app"]
+    with flask_app.app_context():
+        db.create_all()
+    yield app
+    flask_app.extensions["last_seen"].stop()
+    with flask_app.app_context():
+        db.drop_all()
+
+
+def _run(app, scenario):
+    """Runs ``scenario(client)`` inside the app's startup and shutdown."""
+
+    async def main():
+        async with app.test_app() as test_app:
+            return await scenario(test_app.test_client())
+
+    return asyncio.run(main())
+
+
+def _admin_headers(app, admin_id=1000):
+    """Makes ``admin_id`` an admin of ``app`` and returns its token headers."""
+    app.config["ADMIN_USER_IDS"] = frozenset({admin_id})
+    with app.extensions["flask_app"].app_context():
+        token = issue_token(admin_id)["access_token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.mark.parametrize(
+    "uri,expected",
+    [
+        ("mysql://u:p@db:3306/stack_db", "mysql+aiomysql://u:***@db:3306/stack_db"),
+        ("mysql+pymysql://u:p@db/stack_db", "mysql+aiomysql://u:***@db/stack_db"),
+        ("sqlite:///stack.db", "sqlite+aiosqlite:///stack.db"),
+    ],
+)
+def test_async_database_uri(uri, expected) -> None:
+    assert str(async_database_uri(uri)) == expected
+
+
+def test_health(asgi_app) -> None:
+    async def scenario(client):
+        response = await client.get("/service/stack/health")
+        return response.status_code, await response.get_json()
+
+    assert _run(asgi_app, scenario) == (200, {"status": "OK"})
+
+
+def test_create_and_search_users(asgi_app) -> None:
+    headers = _admin_headers(asgi_app)
+
+    async def scenario(client):
+        created = await client.post(
+            "/service/stack/users",
+            json={
+                "email": "alice@example.com",
+                "username": "alice",
+                "password": "correct horse",
+                "first_name": "Alice",
+                "last_name": "Liddell",
+            },
+        )
+        found = await client.get(
+            "/service/stack/users/search?q=ali&fields=username", headers=headers
+        )
+        stats = await client.get("/service/stack/users/stats?days=1", headers=headers)
+        return created, await found.get_json(), await stats.get_json()
+
+    created, found, stats = _run(asgi_app, scenario)
+
+    assert created.status_code == 201
+    assert [user["username"] for user in found["users"]] == ["alice"]
+    assert "password" not in found["users"][0]
+    assert (stats["total"], stats["active"]) == (1, 1)
+
+
+def test_login(asgi_app) -> None:
+    async def scenario(client):
+        await client.post(
+            "/service/stack/users",
+            json={
+                "email": "alice@example.com",
+                "username": "alice",
+                "password": "correct horse",
+                "first_name": "Alice",
+                "last_name": "Liddell",
+            },
+        )
+        ok = await client.post(
+            "/service/stack/users/login",
+            json={"login": "alice", "password": "correct horse"},
+        )
+        denied = await client.post(
+            "/service/stack/users/login",
+            json={"login": "alice", "password": "wrong horse"},
+        )
+        token = (await ok.get_json())["access_token"]
+        me = await client.get(
+            "/service/stack/users/me", headers={"Authorization": f"Bearer {token}"}
+        )
+        return (
+            ok.status_code,
+            denied.status_code,
+            me.status_code,
+            (await me.get_json())["username"],
+        )
+
+    assert _run(asgi_app, scenario) == (200, 401, 200, "alice")
+
+
+def test_user_changes_long_poll(asgi_app) -> None:
+    asgi_app.config["CHANGE_FEED_POLL_SECONDS"] = 0.05
+    headers = _admin_headers(asgi_app)
+
+    async def scenario(client):
+        response = await client.get(
+            "/service/stack/users/changes?wait=1", headers=headers
+        )
+        return response.status_code, (await response.get_json())["events"]
+
+    assert _run(asgi_app, scenario) == (200, [])
+
+
+def test_errors_use_the_shared_handlers(asgi_app) -> None:
+    headers = _admin_headers(asgi_app)
+
+    async def scenario(client):
+        invalid = await client.get(
+            "/service/stack/users/search?q=al&limit=0", headers=headers
+        )
+        cursor = await client.get(
+            "/service/stack/users/created"
+            "?start=2024-01-01T00:00:00&end=2024-01-02T00:00:00&cursor=%25%25",
+            headers=headers,
+        )
+        anonymous = await client.post(
+            "/service/stack/users/bulk-status", json={"is_active": False}
+        )
+        return (
+            invalid.status_code,
+            await invalid.get_json(),
+            cursor.status_code,
+            await cursor.get_json(),
+            anonymous.status_code,
+        )
+
+    status, body, cursor_status, cursor_body, anonymous = _run(asgi_app, scenario)
+
+    assert status == 400
+    assert "limit" in body["error"]
+    assert (cursor_status, cursor_body) == (400, {"error": "Invalid cursor"})
+    assert anonymous == 401
+
+
+def test_services_share_the_event_loop(asgi_app) -> None:
+    """Services waiting on the database do not block each other."""
+    events = []
+
+    def service(name):
+        with get_db() as session:
+            events.append(f"{name} start")
+            session.execute(text("SELECT 1"))
+            events.append(f"{name} end")
+        return name
+
+    async def main():
+        async with asgi_app.app_context():
+            return await asyncio.gather(
+                run_service(service, "a"), run_service(service, "b")
+            )
+
+    assert asyncio.run(main()) == ["a", "b"]
+    assert events.index("b start") < events.index("a end")
+
+
+def test_requests_are_traced(monkeypatch, tmp_path) -> None:
+    path = tmp_path / "spans.jsonl"
+    monkeypatch.setattr(
+        "app.config.TestingConfig.SQLALCHEMY_DATABASE_URI",
+        f"sqlite:///{tmp_path / 'stack.db'}",
+    )
+    monkeypatch.setattr("app.config.TestingConfig.TRACE_FILE", str(path))
+    monkeypatch.setattr("app.config.TestingConfig.TRACE_SAMPLE_RATE", 1.0)
+    app = create_asgi_app()
+    flask_app = app.extensions["flask_app"]
+    with flask_app.app_context():
+        db.create_all()
+    headers = _admin_headers(app)
+
+    async def scenario(client):
+        response = await client.get("/service/stack/users/search?q=al", headers=headers)
+        return response.status_code
+
+    assert _run(app, scenario) == 200
+    flask_app.extensions["last_seen"].stop()
+    names = {json.loads(line)["name"] for line in path.read_text().splitlines()}
+    assert {"GET /service/stack/users/search", "view search_users"} <= names
+    assert "db SELECT" in names
+
+
+def test_cors_is_applied(monkeypatch, tmp_path) -> None:
+    origin = "https://app.example.com"
+    monkeypatch.setattr(
+        "app.config.TestingConfig.SQLALCHEMY_DATABASE_URI",
+        f"sqlite:///{tmp_path / 'stack.db'}",
+    )
+    monkeypatch.setattr("app.config.TestingConfig.CORS_ORIGINS", (origin,))
+    app = create_asgi_app()
+
+    async def scenario(client):
+        preflight = await client.options(
+            "/service/stack/users",
+            headers={"Origin": origin, "Access-Control-Request-Method": "POST"},
+        )
+        health = await client.get("/service/stack/health", headers={"Origin": origin})
+        return preflight, health
+
+    preflight, health = _run(app, scenario)
+    app.extensions["flask_app"].extensions["last_seen"].stop()
+
+    assert preflight.status_code == 204
+    assert "Authorization" in preflight.headers["Access-Control-Allow-Headers"]
+    assert health.headers["Access-Control-Allow-Origin"] == origin
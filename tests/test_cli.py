@@ -0,0 +1,178 @@
+# tests/test_cli.py
+
+import pytest
+from sqlalchemy import text
+
+from app import create_app
+from app.database import db
+from app.utils.profiling import verify_profile_request
+
+
+@pytest.fixture
+def cli_app():
+    """An app of its own, since commands open connections outside of tests'
+    rolled-back transaction."""
+    app = create_app()
+    with app.app_context():
+        db.create_all()
+        yield app
+        app.extensions["last_seen"].stop()
+
+
+@pytest.fixture
+def runner(cli_app):
+    return cli_app.test_cli_runner()
+
+
+@pytest.fixture
+def mock_upgrade(mocker):
+    return mocker.patch("app.cli.upgrade")
+
+
+@pytest.fixture
+def mock_backup(mocker):
+    return mocker.patch("app.cli.backup_database", return_value="/backups/db.sql")
+
+
+def test_upgrade_if_needed_skips_when_current(
+    runner, mocker, mock_upgrade, mock_backup
+) -> None:
+    """Nothing is locked, backed up or migrated when the schema is at head."""
+    mocker.patch("app.cli.is_schema_current", return_value=True)
+    mock_lock = mocker.patch("app.cli.advisory_lock")
+
+    result = runner.invoke(args=["db", "upgrade-if-needed", "--backup-dir", "/b"])
+
+    assert result.exit_code == 0
+    assert "skipping migrations" in result.output
+    mock_lock.assert_not_called()
+    mock_backup.assert_not_called()
+    mock_upgrade.assert_not_called()
+
+
+def test_upgrade_if_needed_migrates_under_lock(
+    runner, mocker, mock_upgrade, mock_backup
+) -> None:
+    """The schema is backed up and upgraded once the lock is held."""
+    mocker.patch("app.cli.is_schema_current", side_effect=[False, False])
+    mock_lock = mocker.patch("app.cli.advisory_lock")
+
+    result = runner.invoke(args=["db", "upgrade-if-needed", "--backup-dir", "/b"])
+
+    assert result.exit_code == 0, result.output
+    assert mock_lock.call_args.args[1:] == ("stack_service_migrations", 600)
+    mock_backup.assert_called_once()
+    assert mock_backup.call_args.args[1] == "/b"
+    mock_upgrade.assert_called_once_with()
+    assert "Alembic migrations completed successfully." in result.output
+
+
+def test_upgrade_if_needed_after_another_replica(
+    runner, mocker, mock_upgrade, mock_backup
+) -> None:
+    """A replica that waited for the lock re-checks and skips the upgrade."""
+    mocker.patch("app.cli.is_schema_current", side_effect=[False, True])
+
+    result = runner.invoke(args=["db", "upgrade-if-needed"])
+
+    assert result.exit_code == 0
+    assert "migrated by another replica" in result.output
+    mock_backup.assert_not_called()
+    mock_upgrade.assert_not_called()
+
+
+def test_upgrade_if_needed_without_backup_dir(
+    runner, mocker, mock_upgrade, mock_backup
+) -> None:
+    mocker.patch("app.cli.is_schema_current", return_value=False)
+
+    result = runner.invoke(args=["db", "upgrade-if-needed"])
+
+    assert result.exit_code == 0
+    mock_backup.assert_not_called()
+    mock_upgrade.assert_called_once_with()
+
+
+def test_index_audit(runner, tmp_path) -> None:
+    """The audit flags the index on the primary key and suggests missing ones."""
+    with db.engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE accounts (id INTEGER PRIMARY KEY, email VARCHAR(255), "
+                "created_at DATETIME)"
+            )
+        )
+        conn.execute(text("CREATE INDEX ix_accounts_id ON accounts (id)"))
+    query_log = tmp_path / "queries.log"
+    query_log.write_text(
+        "SELECT * FROM accounts WHERE created_at >= '2024-01-01'\n"
+        "SELECT * FROM accounts WHERE id = 1\n"
+    )
+
+    result = runner.invoke(args=["db", "index-audit", "--query-log", str(query_log)])
+
+    assert result.exit_code == 0, result.output
+    assert "accounts.ix_accounts_id duplicates the primary key" in result.output
+    assert "accounts (created_at) used by 1 queries" in result.output
+    assert "Missing indexes: 1" in result.output
+
+
+def test_users_reconcile_stats(runner, mocker) -> None:
+    mock_reconcile = mocker.patch(
+        "app.cli.reconcile_user_stats",
+        return_value={"total": 5, "active": 4, "days": 3, "batches": 1},
+    )
+
+    result = runner.invoke(args=["users", "reconcile-stats", "--batch-size", "50"])
+
+    assert result.exit_code == 0, result.output
+    mock_reconcile.assert_called_once_with(50)
+    assert "5 users, 4 active, 3 signup days in 1 batches" in result.output
+
+
+def test_debug_profile_header(runner, cli_app) -> None:
+    cli_app.config["PROFILE_SECRET"] = "s3cret"
+
+    result = runner.invoke(args=["debug", "profile-header", "GET", "/service/x"])
+
+    assert result.exit_code == 0, result.output
+    name, value = result.output.strip().split(": ")
+    assert name == "X-Profile"
+    assert verify_profile_request("s3cret", value, "GET", "/service/x")
+
+
+def test_debug_profile_header_requires_secret(runner) -> None:
+    result = runner.invoke(args=["debug", "profile-header", "GET", "/service/x"])
+
+    assert result.exit_code != 0
+    assert "PROFILE_SECRET is not configured" in result.output
+
+
+def test_users_calibrate_bcrypt(runner, mocker) -> None:
+    mock_calibrate = mocker.patch(
+        "app.cli.calibrate_rounds", return_value=(11, {10: 0.1, 11: 0.2, 12: 0.4})
+    )
+
+    result = runner.invoke(args=["users", "calibrate-bcrypt", "--target-ms", "300"])
+
+    assert result.exit_code == 0, result.output
+    mock_calibrate.assert_called_once_with(0.3, 10, 16, 3)
+    assert "cost 12: 400.0 ms" in result.output
+    assert "BCRYPT_ROUNDS=11 (currently 4)" in result.output
+    assert "rehashed at the new cost" in result.output
+
+
+def test_users_calibrate_bcrypt_warns_when_too_slow(runner, mocker) -> None:
+    mocker.patch("app.cli.calibrate_rounds", return_value=(10, {10: 0.5}))
+
+    result = runner.invoke(args=["users", "calibrate-bcrypt", "--target-ms", "100"])
+
+    assert "Warning: even cost 10 exceeds 100 ms." in result.output
+
+
+def test_users_calibrate_bcrypt_validates_rounds(runner) -> None:
+    result = runner.invoke(
+        args=["users", "calibrate-bcrypt", "--min-rounds", "12", "--max-rounds", "11"]
+    )
+
+    assert result.exit_code != 0
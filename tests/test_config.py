@@ -154,3 +154,42 @@ def test_get_config_unknown_env() -> None:
         with pytest.raises(ValueError) as excinfo:
             get_config()
         assert "Unknown environment: unknown_env" in str(excinfo.value)
+
+
+def test_db_pool_covers_admitted_requests() -> None:
+    """Every request let in by the concurrency limiter can hold a pooled
+    connection at once, and spare uWSGI threads are left to shed the rest."""
+    import configparser
+
+    from app.config import Config, ProdConfig, StagingConfig
+
+    parser = configparser.ConfigParser()
+    parser.read("uwsgi.ini")
+    uwsgi = parser["uwsgi"]
+
+    assert uwsgi.getboolean("lazy-apps")
+    assert uwsgi.getboolean("enable-threads")
+    assert Config.CONCURRENCY_LIMIT_ENABLED
+    assert Config.DB_POOL_SIZE >= Config.CONCURRENCY_LIMIT_MAX
+    assert uwsgi.getint("threads") > Config.CONCURRENCY_LIMIT_MAX
+    # Long polls bypass the limiter but are capped on their own
+    busy = Config.CONCURRENCY_LIMIT_MAX + Config.CHANGE_FEED_MAX_WAITERS
+    assert uwsgi.getint("threads") > busy
+    assert Config.DB_POOL_SIZE + Config.DB_MAX_OVERFLOW >= busy
+    assert Config.USER_SHARD_THREADS >= uwsgi.getint("threads")
+    for config in (StagingConfig, ProdConfig):
+        assert config.SQLALCHEMY_ENGINE_OPTIONS["pool_size"] == Config.DB_POOL_SIZE
+
+
+def test_uwsgi_recycles_workers_on_rss() -> None:
+    """Workers are recycled gracefully first and killed only above a higher limit."""
+    import configparser
+
+    parser = configparser.ConfigParser()
+    parser.read("uwsgi.ini")
+    uwsgi = parser["uwsgi"]
+
+    soft = uwsgi.getint("reload-on-rss")
+    hard = uwsgi.getint("evil-reload-on-rss")
+    assert 0 < soft < hard
+    assert uwsgi.getint("worker-reload-mercy") > 0
@@ -4,7 +4,7 @@ import pytest
 from unittest.mock import MagicMock, patch
 from sqlalchemy.exc import SQLAlchemyError
 
-from app.database import init_db, get_db, db
+from app.database import bind_session, init_db, get_db, db
 
 
 @pytest.fixture
@@ -82,3 +82,97 @@ def test_get_db_exception(mocker):
     mock_logger_error.assert_called_once_with("Database session rollback due to error: Test exception")
     mock_session.rollback.assert_called_once()
     mock_session.close.assert_called_once()
+
+
+def test_get_db_uses_bound_session(mocker):
+    """
+    Test that get_db hands out a session bound with bind_session
+    instead of db.session, and only while it is bound.
+    """
+    default_session = mocker.MagicMock()
+    bound_session = mocker.MagicMock()
+    mocker.patch.object(db, 'session', new=default_session)
+
+    with bind_session(bound_session):
+        with get_db() as session:
+            assert session is bound_session
+
+    with get_db() as session:
+        assert session is default_session
+    bound_session.close.assert_called_once()
+
+
+def test_get_db_sessions_are_isolated_per_thread(monkeypatch, tmp_path):
+    """
+    Test that concurrent request threads each get their own session from
+    get_db, and that one thread closing its session does not affect
+    another thread's open transaction.
+    """
+    import threading
+
+    from sqlalchemy import text
+
+    from app import create_app
+
+    monkeypatch.setattr(
+        "app.config.TestingConfig.SQLALCHEMY_DATABASE_URI",
+        f"sqlite:///{tmp_path / 'threads.db'}",
+    )
+    app = create_app()
+    with app.app_context():
+        with get_db() as session:
+            session.execute(text("CREATE TABLE hits (thread INTEGER)"))
+            session.commit()
+
+    workers = 4
+    all_open = threading.Barrier(workers)
+    first_closed = threading.Event()
+    sessions = {}
+    errors = []
+
+    def request_thread(n):
+        try:
+            with app.app_context():
+                with get_db() as session:
+                    sessions[n] = session()
+                    all_open.wait(timeout=5)
+                    if n == 0:
+                        return
+                    # Thread 0 has closed its session by now
+                    first_closed.wait(timeout=5)
+                    session.execute(text("INSERT INTO hits VALUES (:n)"), {"n": n})
+                    session.commit()
+        except Exception as e:
+            errors.append(e)
+        finally:
+            if n == 0:
+                first_closed.set()
+
+    threads = [
+        threading.Thread(target=request_thread, args=(n,)) for n in range(workers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len({id(session) for session in sessions.values()}) == workers
+    with app.app_context():
+        with get_db() as session:
+            rows = session.execute(text("SELECT thread FROM hits")).scalars().all()
+    assert sorted(rows) == [1, 2, 3]
+
+
+@pytest.mark.parametrize("run", [1, 2])
+def test_commits_are_rolled_back_after_each_test(app, make_user, run):
+    """Every test starts from empty tables, even after a committed write."""
+    from sqlalchemy import func, select
+
+    from app.models import User
+
+    assert db.session.scalar(select(func.count()).select_from(User)) == 0
+    with get_db() as session:
+        make_user()
+        session.commit()
+    assert db.session.scalar(select(func.count()).select_from(User)) == 1
@@ -20,8 +20,11 @@ def set_development_env(monkeypatch) -> None:
 
 @pytest.fixture
 def set_production_env(monkeypatch) -> None:
-    """Set FLASK_ENV to 'production'."""
+    """Set FLASK_ENV to 'production', with the JWT secret it requires."""
+    from app.config import ProdConfig
+
     monkeypatch.setenv("FLASK_ENV", "production")
+    monkeypatch.setattr(ProdConfig, "JWT_SECRET_KEY", "production-test-secret")
 
 
 @pytest.fixture
@@ -197,3 +200,17 @@ def test_register_swagger_ui_exception(
     assert (
         "Swagger UI has been registered at /api/docs." not in caplog.text
     ), "Swagger UI should not be registered after exception."
+
+
+def test_create_app_requires_a_jwt_secret(
+    set_production_env, mock_init_db, monkeypatch
+) -> None:
+    """Outside development and testing, a missing token secret stops startup."""
+    from app import create_app
+    from app.config import ProdConfig
+
+    monkeypatch.setattr(ProdConfig, "JWT_SECRET_KEY", None)
+
+    with pytest.raises(RuntimeError, match="JWT_SECRET_KEY must be set"):
+        create_app()
+    mock_init_db.assert_not_called()
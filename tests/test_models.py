@@ -1 +1,35 @@
-# tests/test_models.py
\ No newline at end of file
+# tests/test_models.py
+
+from datetime import datetime
+
+from app.database import db
+from app.models import User, utcnow
+
+
+def test_utcnow_is_naive() -> None:
+    assert utcnow().tzinfo is None
+
+
+def test_user_defaults(make_user) -> None:
+    """New users are active and get a creation timestamp."""
+    user = make_user(username="alice")
+
+    stored = db.session.get(User, user.id)
+    assert stored.is_active is True
+    assert isinstance(stored.created_at, datetime)
+    assert repr(stored) == f"<User {user.id} alice>"
+
+
+def test_user_indexes() -> None:
+    """The model declares the same indexes as the migrations, minus ix_users_id."""
+    indexes = {index.name: index for index in User.__table__.indexes}
+
+    assert set(indexes) == {
+        "ix_users_email",
+        "ix_users_username",
+        "ix_users_first_name",
+        "ix_users_last_name",
+        "ix_users_is_active_created_at_id",
+    }
+    assert indexes["ix_users_email"].unique
+    assert indexes["ix_users_username"].unique
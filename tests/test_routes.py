@@ -1,25 +1,294 @@
-import pytest
+from datetime import datetime
+
 from app import create_app
+from app.service import user_service
+from app.utils.tokens import issue_token
 
 
-@pytest.fixture
-def app():
-    app = create_app()
-    app.config.update(
-        {
-            "TESTING": True,
-        }
+# Tests for /health endpoint
+def test_health(client) -> None:
+    response = client.get("/service/stack/health")
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "OK"}
+
+
+# Tests for /users endpoint
+def test_create_user(app) -> None:
+    client = app.test_client()
+
+    response = client.post(
+        "/service/stack/users",
+        json={
+            "email": "alice@example.com",
+            "username": "alice",
+            "password": "correct horse",
+            "first_name": "Alice",
+            "last_name": "Liddell",
+        },
     )
-    return app
 
+    assert response.status_code == 201
+    body = response.get_json()
+    assert body["username"] == "alice"
+    assert "password" not in body
 
-@pytest.fixture
-def client(app):
-    return app.test_client()
 
+def test_create_user_duplicate(app, make_user) -> None:
+    make_user(email="alice@example.com")
+    client = app.test_client()
+
+    response = client.post(
+        "/service/stack/users",
+        json={
+            "email": "alice@example.com",
+            "username": "alice",
+            "password": "correct horse",
+            "first_name": "Alice",
+            "last_name": "Liddell",
+        },
+    )
+
+    assert response.status_code == 400
+    assert response.get_json() == {"error": "Email or username is already taken"}
+
+
+# Tests for /users/login endpoint
+def test_login(app) -> None:
+    client = app.test_client()
+    client.post(
+        "/service/stack/users",
+        json={
+            "email": "alice@example.com",
+            "username": "alice",
+            "password": "correct horse",
+            "first_name": "Alice",
+            "last_name": "Liddell",
+        },
+    )
+
+    ok = client.post(
+        "/service/stack/users/login",
+        json={"login": "alice@example.com", "password": "correct horse"},
+    )
+    denied = client.post(
+        "/service/stack/users/login",
+        json={"login": "alice", "password": "wrong horse"},
+    )
+
+    assert ok.status_code == 200
+    assert ok.get_json()["user"]["username"] == "alice"
+    assert "password" not in ok.get_json()["user"]
+    assert ok.get_json()["token_type"] == "Bearer"
+    assert denied.status_code == 401
+    assert denied.get_json() == {"error": "Invalid credentials"}
+
+
+# Tests for /users/me endpoint
+def test_current_user(app) -> None:
+    client = app.test_client()
+    client.post(
+        "/service/stack/users",
+        json={
+            "email": "alice@example.com",
+            "username": "alice",
+            "password": "correct horse",
+            "first_name": "Alice",
+            "last_name": "Liddell",
+        },
+    )
+    token = client.post(
+        "/service/stack/users/login",
+        json={"login": "alice", "password": "correct horse"},
+    ).get_json()["access_token"]
+    app.extensions["last_seen"].flush()
+
+    me = client.get(
+        "/service/stack/users/me", headers={"Authorization": f"Bearer {token}"}
+    )
+    anonymous = client.get("/service/stack/users/me")
+    forged = client.get(
+        "/service/stack/users/me", headers={"Authorization": "Bearer not-a-token"}
+    )
+
+    assert me.status_code == 200
+    assert me.get_json()["username"] == "alice"
+    assert me.get_json()["last_seen_at"] is not None
+    assert anonymous.status_code == 401
+    assert anonymous.get_json() == {"error": "Authentication required"}
+    assert forged.status_code == 401
+    assert forged.get_json() == {"error": "Invalid or expired token"}
+
+
+# Tests for /users/<id> endpoint
+def test_get_user(app, make_user) -> None:
+    user = make_user(username="alice")
+    client = app.test_client()
+
+    found = client.get(f"/service/stack/users/{user.id}")
+    missing = client.get(f"/service/stack/users/{user.id + 1}")
+
+    assert found.status_code == 200
+    assert found.get_json()["username"] == "alice"
+    assert "password" not in found.get_json()
+    assert missing.status_code == 404
+    assert missing.get_json() == {"error": "User not found"}
+
+
+# Tests for /users/changes endpoint
+def test_user_changes(app, admin_headers) -> None:
+    app.config["CHANGE_FEED_SETTLE_SECONDS"] = 0
+    client = app.test_client()
+    client.post(
+        "/service/stack/users",
+        json={
+            "email": "alice@example.com",
+            "username": "alice",
+            "password": "correct horse",
+            "first_name": "Alice",
+            "last_name": "Liddell",
+        },
+    )
+
+    first = client.get("/service/stack/users/changes", headers=admin_headers)
+    cursor = first.get_json()["next_cursor"]
+    empty = client.get(
+        f"/service/stack/users/changes?cursor={cursor}", headers=admin_headers
+    )
+    invalid = client.get("/service/stack/users/changes?wait=60", headers=admin_headers)
+
+    assert first.status_code == 200
+    (event,) = first.get_json()["events"]
+    assert event["type"] == "user.created"
+    assert event["payload"]["username"] == "alice"
+    assert empty.get_json() == {"events": [], "next_cursor": cursor}
+    assert invalid.status_code == 400
+
+
+# Tests for /users/stats endpoint
+def test_user_stats(app, admin_headers) -> None:
+    client = app.test_client()
+
+    response = client.get("/service/stack/users/stats?days=7", headers=admin_headers)
 
-# Tests for /health endpoint
-def test_health(client) -> None:
-    response = client.get("/service/stack/health")
     assert response.status_code == 200
-    assert response.get_json() == {"status": "OK"}
+    body = response.get_json()
+    assert (body["total"], body["active"]) == (0, 0)
+    assert len(body["daily_signups"]) == 7
+
+
+# Tests for /users/search endpoint
+def test_search_users(app, make_user, admin_headers) -> None:
+    make_user(username="alice")
+    make_user(username="bob")
+    client = app.test_client()
+
+    response = client.get(
+        "/service/stack/users/search?q=al&fields=username", headers=admin_headers
+    )
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body["count"] == 1
+    assert body["users"][0]["username"] == "alice"
+    assert "password" not in body["users"][0]
+
+
+def test_search_users_invalid_query(app, admin_headers) -> None:
+    client = app.test_client()
+
+    response = client.get(
+        "/service/stack/users/search?q=al&limit=0", headers=admin_headers
+    )
+
+    assert response.status_code == 400
+    assert "limit" in response.get_json()["error"]
+
+
+# Tests for /users/bulk-status endpoint
+def test_bulk_status(app, make_user, admin_headers) -> None:
+    user_id = make_user().id
+    client = app.test_client()
+
+    response = client.post(
+        "/service/stack/users/bulk-status",
+        json={"is_active": False, "ids": [user_id]},
+        headers=admin_headers,
+    )
+
+    assert response.status_code == 200
+    assert response.get_json()["updated"] == 1
+
+
+def test_bulk_status_requires_an_admin(app, make_user, admin_headers) -> None:
+    user = make_user()
+    token = issue_token(user.id)["access_token"]
+    client = app.test_client()
+    body = {"is_active": False, "ids": [user.id]}
+
+    anonymous = client.post("/service/stack/users/bulk-status", json=body)
+    not_admin = client.post(
+        "/service/stack/users/bulk-status",
+        json=body,
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+    assert anonymous.status_code == 401
+    assert not_admin.status_code == 403
+    assert not_admin.get_json() == {"error": "Admin access required"}
+    assert user_service.get_user(user.id)[0].is_active is True
+
+
+def test_bulk_status_requires_json(app, admin_headers) -> None:
+    client = app.test_client()
+
+    response = client.post(
+        "/service/stack/users/bulk-status", data="nope", headers=admin_headers
+    )
+
+    assert response.status_code == 400
+
+
+# Tests for /users/created endpoint
+def test_list_users_created(app, make_user, admin_headers) -> None:
+    make_user(username="alice", created_at=datetime(2024, 1, 1))
+    make_user(username="bob", created_at=datetime(2024, 2, 1))
+    client = app.test_client()
+
+    response = client.get(
+        "/service/stack/users/created"
+        "?start=2024-01-01T00:00:00&end=2024-01-31T00:00:00",
+        headers=admin_headers,
+    )
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert [user["username"] for user in body["users"]] == ["alice"]
+    assert body["next_cursor"] is None
+
+
+# Tests for /debug/memory endpoint
+def test_memory_debug_disabled_by_default(app) -> None:
+    client = app.test_client()
+
+    response = client.get("/service/stack/debug/memory")
+
+    assert response.status_code == 404
+
+
+def test_memory_debug_enabled(monkeypatch) -> None:
+    import tracemalloc
+
+    monkeypatch.setattr("app.config.Config.MEMORY_DEBUG_ENABLED", True)
+    client = create_app().test_client()
+    try:
+        first = client.get("/service/stack/debug/memory?top=3")
+        second = client.get("/service/stack/debug/memory?top=3")
+        invalid = client.get("/service/stack/debug/memory?group_by=module")
+    finally:
+        tracemalloc.stop()
+
+    assert first.status_code == 200
+    assert first.get_json()["growth"] is None
+    assert len(second.get_json()["top"]) == 3
+    assert isinstance(second.get_json()["growth"], list)
+    assert invalid.status_code == 400
@@ -30,3 +30,24 @@ def test_server_creates_app(mocker):
 
         # Assert that the 'app' variable in server_module is the mock_app
         assert server_module.app == mock_app
+
+
+def test_server_wraps_app_in_fast_path(mocker):
+    """
+    Test that the server module puts the probe fast path in front of
+    the Flask WSGI app.
+    """
+    from app.utils.fast_path import FastPathMiddleware
+
+    if 'app.server' in sys.modules:
+        del sys.modules['app.server']
+
+    with patch('app.create_app') as mock_create_app:
+        mock_app = MagicMock(spec=Flask)
+        original_wsgi_app = mock_app.wsgi_app
+        mock_create_app.return_value = mock_app
+
+        server_module = importlib.import_module('app.server')
+
+        assert isinstance(server_module.app.wsgi_app, FastPathMiddleware)
+        assert server_module.app.wsgi_app.app is original_wsgi_app
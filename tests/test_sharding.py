@@ -0,0 +1,272 @@
+# tests/test_sharding.py
+
+import time
+from collections import Counter
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from app import create_app
+from app.database import db
+from app.models import User, UserDirectory
+from app.schemas.user_schema import (
+    UserBulkStatusSchema,
+    UserCreatedRangeSchema,
+    UserSchema,
+    UserSearchSchema,
+)
+from app.service import user_events_service, user_service, user_stats_service
+from app.service.last_seen_service import flush_last_seen
+from app.sharding import (
+    SHARDED_TABLES,
+    group_by_shard,
+    scatter,
+    shard_engine,
+    shard_of,
+    shard_session,
+)
+from app.utils.deadlines import request_deadline
+from app.utils.exceptions import (
+    DatabaseError,
+    DeadlineExceededError,
+    ServiceUnavailableError,
+    ValidationError,
+)
+from app.utils.tracing import Tracer, trace_statements
+
+SHARDS = 3
+
+
+@pytest.fixture
+def sharded_app(monkeypatch, tmp_path):
+    """An app whose users are spread over three SQLite files."""
+    uris = tuple(f"sqlite:///{tmp_path / f'shard{i}.db'}" for i in range(SHARDS))
+    monkeypatch.setattr(
+        "app.config.TestingConfig.SQLALCHEMY_DATABASE_URI",
+        f"sqlite:///{tmp_path / 'main.db'}",
+    )
+    monkeypatch.setattr("app.config.TestingConfig.USER_SHARD_URIS", uris)
+    app = create_app()
+
+    with app.app_context():
+        db.create_all()
+        tables = [db.metadata.tables[name] for name in SHARDED_TABLES]
+        for shard in range(SHARDS):
+            db.metadata.create_all(shard_engine(shard), tables=tables)
+        yield app
+        app.extensions["last_seen"].stop()
+        db.session.remove()
+
+
+def _create(n, **overrides):
+    data = {
+        "email": f"user{n}@example.com",
+        "username": f"user{n}",
+        "password": "correct horse",
+        "first_name": "First",
+        "last_name": "Last",
+        **overrides,
+    }
+    user, _ = user_service.create_user(UserSchema().load(data))
+    return user
+
+
+def _rows_per_shard():
+    return [
+        session.scalar(select(func.count()).select_from(User))
+        for session in _sessions()
+    ]
+
+
+def _sessions():
+    for shard in range(SHARDS):
+        with shard_session(shard) as session:
+            yield session
+
+
+def test_shard_of_is_stable_and_spreads_ids(sharded_app) -> None:
+    placements = [shard_of(user_id) for user_id in range(1, 3001)]
+
+    assert placements == [shard_of(user_id) for user_id in range(1, 3001)]
+    assert all(800 < n < 1200 for n in Counter(placements).values())
+
+
+def test_group_by_shard(sharded_app) -> None:
+    groups = group_by_shard([9, 3, 3, 1])
+
+    assert sorted(i for ids in groups.values() for i in ids) == [1, 3, 9]
+    assert all(shard_of(i) == shard for shard, ids in groups.items() for i in ids)
+
+
+def test_create_user_places_rows_by_id(sharded_app) -> None:
+    users = [_create(n) for n in range(12)]
+
+    assert sum(_rows_per_shard()) == 12
+    assert all(rows > 0 for rows in _rows_per_shard())
+    for user in users:
+        with shard_session(shard_of(user.id)) as session:
+            assert session.get(User, user.id).username == user.username
+    assert db.session.scalar(select(func.count()).select_from(UserDirectory)) == 12
+    # The main database holds no user rows of its own
+    assert db.session.scalar(select(func.count()).select_from(User)) == 0
+
+
+def test_create_user_rejects_duplicates_across_shards(sharded_app) -> None:
+    _create(1)
+
+    with pytest.raises(ValidationError, match="already taken"):
+        _create(2, email="user1@example.com")
+
+    assert sum(_rows_per_shard()) == 1
+
+
+def test_failed_shard_write_releases_the_directory_entry(sharded_app, mocker) -> None:
+    mocker.patch.object(
+        user_service,
+        "record_users_created",
+        side_effect=OperationalError("INSERT", {}, Exception("shard down")),
+    )
+
+    with pytest.raises(DatabaseError):
+        _create(1)
+
+    assert db.session.scalar(select(func.count()).select_from(UserDirectory)) == 0
+
+
+def test_claim_is_released_after_the_deadline_passed(sharded_app, mocker) -> None:
+    """A deadline expiring between the claim and the shard write frees it."""
+    allocate = user_service._allocate_user_id
+
+    def slow_allocate(email, username):
+        user_id = allocate(email, username)
+        time.sleep(0.02)
+        return user_id
+
+    mocker.patch.object(user_service, "_allocate_user_id", side_effect=slow_allocate)
+
+    with request_deadline({}, 0.01), pytest.raises(DeadlineExceededError):
+        _create(1)
+
+    assert db.session.scalar(select(func.count()).select_from(UserDirectory)) == 0
+    assert sum(_rows_per_shard()) == 0
+
+
+def test_each_shard_gets_a_thread_per_request_thread(sharded_app) -> None:
+    executor = sharded_app.extensions["user_shards"].executor
+
+    assert executor._max_workers == SHARDS * sharded_app.config["USER_SHARD_THREADS"]
+
+
+@pytest.mark.parametrize("login", ["user7", "user7@example.com"])
+def test_login_goes_through_the_directory(sharded_app, login) -> None:
+    for n in range(10):
+        _create(n)
+
+    result, status_code = user_service.authenticate(
+        {"login": login, "password": "correct horse"}
+    )
+
+    assert status_code == 200
+    assert result["user"].username == "user7"
+
+
+def test_search_users_gathers_every_shard(sharded_app) -> None:
+    for n in range(10):
+        _create(n, username=f"al{n:02d}")
+
+    result, _ = user_service.search_users(
+        UserSearchSchema().load({"q": "al", "fields": "username", "limit": "5"})
+    )
+
+    assert [user.username for user in result["users"]] == [
+        f"al{n:02d}" for n in range(5)
+    ]
+
+
+def test_list_users_created_pages_across_shards(sharded_app) -> None:
+    ids = [_create(n).id for n in range(9)]
+    params = {"start": "2000-01-01T00:00:00", "end": "2100-01-01T00:00:00"}
+    seen, cursor = [], None
+
+    while True:
+        args = {**params, "limit": "4", **({"cursor": cursor} if cursor else {})}
+        page, _ = user_service.list_users_created(UserCreatedRangeSchema().load(args))
+        seen.extend(user.id for user in page["users"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert seen == ids
+
+
+def test_stats_and_bulk_updates_add_up_over_shards(sharded_app) -> None:
+    ids = [_create(n).id for n in range(8)]
+
+    user_service.bulk_set_active(
+        UserBulkStatusSchema().load({"is_active": False, "ids": ids[:5]})
+    )
+    stats, _ = user_stats_service.get_user_stats({"days": 1})
+
+    assert (stats["total"], stats["active"]) == (8, 3)
+    assert stats["daily_signups"][-1]["signups"] == 8
+    assert user_stats_service.reconcile_user_stats(batch_size=2)["active"] == 3
+
+
+def test_flush_last_seen_writes_each_shard(sharded_app) -> None:
+    users = [_create(n) for n in range(6)]
+    seen_at = users[0].created_at
+
+    flush_last_seen(sharded_app, {user.id: seen_at for user in users})
+
+    for user in users:
+        with shard_session(shard_of(user.id)) as session:
+            assert session.get(User, user.id).last_seen_at == seen_at
+
+
+def test_change_feed_reads_every_shard(sharded_app) -> None:
+    sharded_app.config["CHANGE_FEED_SETTLE_SECONDS"] = 0
+    ids = [_create(n).id for n in range(7)]
+    seen, cursor = [], None
+
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        page, _ = user_events_service.fetch_changes(params)
+        if not page["events"]:
+            break
+        seen.extend(event.user_id for event in page["events"])
+        cursor = page["next_cursor"]
+
+    assert sorted(seen) == ids
+
+
+def test_scatter_runs_on_every_shard(sharded_app) -> None:
+    urls = scatter(lambda session: str(session.get_bind().url))
+
+    assert urls == [str(shard_engine(shard).url) for shard in range(SHARDS)]
+
+
+def test_scatter_keeps_the_trace_on_shard_threads(sharded_app) -> None:
+    trace_statements()
+    traces = []
+    tracer = Tracer(type("Exporter", (), {"export": lambda _, s: traces.append(s)})())
+
+    with tracer.start("scatter", "00-" + "a" * 32 + "-" + "b" * 16 + "-01") as root:
+        scatter(lambda session: session.scalar(select(func.count(User.id))))
+
+    statements = [s for s in traces[0] if s["name"] == "db SELECT"]
+    assert len(statements) == SHARDS
+    assert {s["parent_id"] for s in statements} == {root.span_id}
+
+
+def test_an_open_shard_breaker_spares_the_other_shards(sharded_app) -> None:
+    users = [_create(n) for n in range(6)]
+    down = shard_of(users[0].id)
+    sharded_app.extensions["user_shards"].breakers[down]._open()
+
+    for user in users:
+        if shard_of(user.id) == down:
+            with pytest.raises(ServiceUnavailableError, match=f"shard {down}"):
+                user_service.get_user(user.id)
+        else:
+            assert user_service.get_user(user.id)[0].id == user.id
@@ -0,0 +1,57 @@
+# tests/tests_service/test_last_seen_service.py
+
+from datetime import datetime
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.database import db
+from app.models import User
+from app.service import last_seen_service
+from app.service.last_seen_service import flush_last_seen
+from app.utils.exceptions import DatabaseError
+from app.utils.tokens import issue_token
+
+
+def test_flush_last_seen_updates_each_user(app, make_user, monkeypatch) -> None:
+    monkeypatch.setattr(last_seen_service, "LAST_SEEN_BATCH_SIZE", 2)
+    users = [make_user() for _ in range(3)]
+    untouched = make_user()
+    seen = {
+        user.id: datetime(2026, 1, 1, 12, minute) for minute, user in enumerate(users)
+    }
+
+    flush_last_seen(app, seen)
+
+    db.session.expire_all()
+    for user in users:
+        assert db.session.get(User, user.id).last_seen_at == seen[user.id]
+    assert db.session.get(User, untouched.id).last_seen_at is None
+
+
+def test_flush_last_seen_wraps_database_errors(app, mocker) -> None:
+    mocker.patch.object(
+        db.session, "execute", side_effect=OperationalError("UPDATE", {}, Exception())
+    )
+
+    with pytest.raises(DatabaseError, match="Failed to update last seen times"):
+        flush_last_seen(app, {1: datetime(2026, 1, 1)})
+
+
+def test_requests_with_a_token_are_buffered(app, make_user) -> None:
+    """Many requests by the same user become one pending write."""
+    user = make_user()
+    buffer = app.extensions["last_seen"]
+    client = app.test_client()
+    with app.test_request_context():
+        token = issue_token(user.id)["access_token"]
+
+    for _ in range(5):
+        client.get(
+            "/service/stack/users/me", headers={"Authorization": f"Bearer {token}"}
+        )
+
+    assert len(buffer) == 1
+    assert buffer.flush() == 1
+    db.session.expire_all()
+    assert db.session.get(User, user.id).last_seen_at is not None
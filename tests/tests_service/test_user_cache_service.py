@@ -0,0 +1,63 @@
+# tests/tests_service/test_user_cache_service.py
+
+import pytest
+
+from app import create_app
+from app.schemas.user_schema import UserBulkStatusSchema
+from app.service import user_cache_service, user_service
+from app.service.user_cache_service import lookup_user, save_user_cache
+from app.utils.exceptions import NotFoundError
+
+
+def test_lookup_user_caches_public_fields(app, make_user, mocker) -> None:
+    user = make_user(username="alice")
+    get_user = mocker.spy(user_cache_service, "get_user")
+
+    first, status_code = lookup_user(user.id)
+    second, _ = lookup_user(user.id)
+
+    assert status_code == 200
+    assert first == second
+    assert first["username"] == "alice"
+    assert "password" not in first
+    get_user.assert_called_once_with(user.id)
+
+
+def test_lookup_user_not_found(app) -> None:
+    with pytest.raises(NotFoundError):
+        lookup_user(404)
+
+    assert len(app.extensions["user_cache"]) == 0
+
+
+def test_local_changes_invalidate_the_cache(app, make_user) -> None:
+    user = make_user()
+    lookup_user(user.id)
+
+    user_service.bulk_set_active(
+        UserBulkStatusSchema().load({"is_active": False, "ids": [user.id]})
+    )
+
+    assert lookup_user(user.id)[0]["is_active"] is False
+
+
+def test_new_workers_start_from_the_snapshot(
+    app, make_user, mocker, monkeypatch, tmp_path
+) -> None:
+    path = str(tmp_path / "users.snapshot")
+    app.config["USER_CACHE_SNAPSHOT_PATH"] = path
+    ids = [make_user().id for _ in range(3)]
+    for user_id in ids:
+        lookup_user(user_id)
+    assert save_user_cache(app) == 3
+
+    monkeypatch.setattr("app.config.TestingConfig.USER_CACHE_SNAPSHOT_PATH", path)
+    monkeypatch.setattr("app.config.TestingConfig.USER_CACHE_SNAPSHOT_SECONDS", 3600)
+    worker = create_app()
+    get_user = mocker.patch.object(user_cache_service, "get_user")
+
+    with worker.app_context():
+        cached, _ = lookup_user(ids[0])
+
+    assert cached["id"] == ids[0]
+    get_user.assert_not_called()
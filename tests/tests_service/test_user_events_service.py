@@ -0,0 +1,196 @@
+# tests/tests_service/test_user_events_service.py
+
+import threading
+import time
+from datetime import timedelta
+
+import pytest
+from marshmallow import ValidationError as MarshmallowValidationError
+from sqlalchemy import func, select
+from sqlalchemy.exc import OperationalError
+
+from app.database import db
+from app.models import UserEvent, db_utcnow, utcnow
+from app.schemas.user_schema import (
+    UserBulkStatusSchema,
+    UserChangesSchema,
+    UserSchema,
+)
+from app.service import user_events_service, user_service
+from app.service.signals import users_changed
+from app.utils.exceptions import DatabaseError, ValidationError
+
+
+@pytest.fixture
+def feed_app(app):
+    """Events are readable as soon as they are committed."""
+    app.config["CHANGE_FEED_SETTLE_SECONDS"] = 0
+    return app
+
+
+def _create(n):
+    data = {
+        "email": f"user{n}@example.com",
+        "username": f"user{n}",
+        "password": "correct horse",
+        "first_name": "First",
+        "last_name": "Last",
+    }
+    return user_service.create_user(UserSchema().load(data))[0]
+
+
+def _changes(args=None):
+    params = UserChangesSchema().load(args or {})
+    return user_events_service.wait_for_changes(params)[0]
+
+
+def _event_count():
+    return db.session.scalar(select(func.count()).select_from(UserEvent))
+
+
+def test_create_user_appends_an_event(feed_app) -> None:
+    user = _create(1)
+
+    (event,) = _changes()["events"]
+
+    assert (event.user_id, event.type) == (user.id, "user.created")
+    assert event.payload["username"] == "user1"
+    assert event.payload["is_active"] is True
+    assert "password" not in event.payload
+
+
+def test_failed_create_appends_nothing(feed_app, mocker) -> None:
+    mocker.patch.object(
+        user_service,
+        "record_users_created",
+        side_effect=OperationalError("INSERT", {}, Exception("gone away")),
+    )
+
+    with pytest.raises(DatabaseError):
+        _create(1)
+
+    assert _event_count() == 0
+
+
+def test_bulk_set_active_appends_one_event_per_changed_user(feed_app) -> None:
+    ids = [_create(n).id for n in range(3)]
+    cursor = _changes()["next_cursor"]
+    user_service.bulk_set_active(
+        UserBulkStatusSchema().load({"is_active": False, "ids": ids[:2]})
+    )
+    user_service.bulk_set_active(
+        UserBulkStatusSchema().load({"is_active": False, "ids": ids})
+    )
+
+    events = _changes({"cursor": cursor})["events"]
+
+    assert [(e.user_id, e.type) for e in events] == [
+        (ids[0], "user.deactivated"),
+        (ids[1], "user.deactivated"),
+        (ids[2], "user.deactivated"),
+    ]
+
+
+def test_changes_are_paged_by_cursor(feed_app) -> None:
+    ids = [_create(n).id for n in range(5)]
+    seen, cursor = [], None
+
+    for _ in range(3):
+        page = _changes({"limit": "2", **({"cursor": cursor} if cursor else {})})
+        seen.extend(event.user_id for event in page["events"])
+        cursor = page["next_cursor"]
+
+    assert seen == ids
+    assert _changes({"cursor": cursor})["events"] == []
+
+
+def test_recent_events_are_held_back(app) -> None:
+    app.config["CHANGE_FEED_SETTLE_SECONDS"] = 60
+    _create(1)
+
+    assert _changes()["events"] == []
+
+
+def test_events_are_stamped_by_the_database_clock(feed_app) -> None:
+    _create(1)
+
+    (event,) = _changes()["events"]
+
+    drift = db.session.scalar(select(db_utcnow())) - event.created_at
+    assert timedelta(0) <= drift < timedelta(seconds=5)
+
+
+@pytest.mark.parametrize("cursor", ["not base64!", "YWJj", "MSwy"])
+def test_invalid_cursor(feed_app, cursor) -> None:
+    with pytest.raises(ValidationError, match="Invalid cursor"):
+        _changes({"cursor": cursor})
+
+
+@pytest.mark.parametrize("args", [{"limit": "0"}, {"wait": "31"}, {"cursor": ""}])
+def test_changes_validation(feed_app, args) -> None:
+    with pytest.raises(MarshmallowValidationError):
+        _changes(args)
+
+
+def test_long_poll_returns_empty_after_wait(feed_app) -> None:
+    feed_app.config["CHANGE_FEED_POLL_SECONDS"] = 0.05
+    started = time.monotonic()
+
+    page = _changes({"wait": "1"})
+
+    assert page["events"] == []
+    assert 1 <= time.monotonic() - started < 2
+
+
+def test_long_poll_wakes_on_local_change(feed_app, mocker) -> None:
+    """A change in this process answers the poll without waiting for a re-read."""
+    feed_app.config["CHANGE_FEED_POLL_SECONDS"] = 30
+    fetch = mocker.patch.object(
+        user_events_service,
+        "fetch_changes",
+        side_effect=[
+            ({"events": [], "next_cursor": "MA=="}, 200),
+            ({"events": ["event"], "next_cursor": "MQ=="}, 200),
+        ],
+    )
+    timer = threading.Timer(0.1, lambda: users_changed.send(feed_app, ids=[1]))
+    started = time.monotonic()
+    timer.start()
+
+    page = _changes({"wait": "10"})
+
+    assert page["events"] == ["event"]
+    assert fetch.call_count == 2
+    assert time.monotonic() - started < 5
+
+
+def test_long_poll_answers_at_once_over_the_waiter_cap(feed_app) -> None:
+    """Past CHANGE_FEED_MAX_WAITERS, a poll returns without holding its thread."""
+    feed_app.config["CHANGE_FEED_MAX_WAITERS"] = 1
+    started = time.monotonic()
+
+    with user_events_service.change_notifier.waiting(1) as admitted:
+        assert admitted
+        page = _changes({"wait": "10"})
+
+    assert page["events"] == []
+    assert time.monotonic() - started < 1
+    assert user_events_service.change_notifier.waiters == 0
+
+
+def test_prune_user_events(feed_app) -> None:
+    _create(1)
+    _create(2)
+    db.session.execute(
+        UserEvent.__table__.update()
+        .where(UserEvent.user_id == 1)
+        .values(created_at=utcnow() - timedelta(days=10))
+    )
+    db.session.commit()
+
+    deleted = user_events_service.prune_user_events(
+        utcnow() - timedelta(days=7), batch_size=1
+    )
+
+    assert deleted == 1
+    assert [e.user_id for e in _changes()["events"]] == [2]
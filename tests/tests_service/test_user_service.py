@@ -0,0 +1,497 @@
+# tests/tests_service/test_user_service.py
+
+from datetime import datetime
+
+import pytest
+from marshmallow import ValidationError as MarshmallowValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from app.database import db
+from app.models import User
+from app.service import user_service
+from app.schemas.user_schema import (
+    UserBulkStatusSchema,
+    UserCreatedRangeSchema,
+    UserSchema,
+    UserSearchSchema,
+)
+from app.service.signals import users_changed
+from app.utils.exceptions import (
+    AuthenticationError,
+    DatabaseError,
+    NotFoundError,
+    ValidationError,
+)
+from app.utils.prefix_index import PrefixIndex
+from app.utils.tokens import decode_token
+
+
+# The services take parameters already loaded by the route's schema
+def _search(args):
+    return user_service.search_users(UserSearchSchema().load(args))
+
+
+def _bulk(data):
+    return user_service.bulk_set_active(UserBulkStatusSchema().load(data))
+
+
+def _created(args):
+    return user_service.list_users_created(UserCreatedRangeSchema().load(args))
+
+
+def _create(data):
+    return user_service.create_user(UserSchema().load(data))
+
+
+@pytest.fixture
+def users(make_user):
+    """A handful of users whose fields share prefixes."""
+    make_user(username="alice", email="alice@example.com", first_name="Alice")
+    make_user(username="albert", email="bert@example.com", first_name="Albert")
+    make_user(username="bob", email="bob@example.com", first_name="Alfonso")
+    make_user(username="al_x", email="alx@example.com", last_name="Xu")
+
+
+@pytest.fixture
+def fresh_username_index(monkeypatch):
+    index = PrefixIndex()
+    monkeypatch.setattr(user_service, "username_index", index)
+    return index
+
+
+def _usernames(response):
+    body, status_code = response
+    assert status_code == 200
+    assert body["count"] == len(body["users"])
+    return [user.username for user in body["users"]]
+
+
+def test_search_users_by_username_prefix(users) -> None:
+    response = _search({"q": "al", "fields": "username"})
+
+    assert _usernames(response) == ["al_x", "albert", "alice"]
+
+
+def test_search_users_escapes_like_wildcards(users) -> None:
+    """An underscore in the query is a literal, not a single-char wildcard."""
+    response = _search({"q": "al_", "fields": "username"})
+
+    assert _usernames(response) == ["al_x"]
+
+
+def test_search_users_merges_fields_in_order(users) -> None:
+    """Fields are searched in the order given and duplicates are dropped."""
+    response = _search({"q": "Al", "fields": "first_name,username"})
+
+    assert _usernames(response) == ["albert", "bob", "alice", "al_x"]
+
+
+def test_search_users_respects_limit(users) -> None:
+    response = _search({"q": "al", "limit": "2"})
+
+    assert len(_usernames(response)) == 2
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        {},
+        {"q": ""},
+        {"q": "al", "limit": "500"},
+        {"q": "al", "fields": "password"},
+        {"q": "al", "fields": ","},
+    ],
+)
+def test_search_users_validation(app, args) -> None:
+    with pytest.raises(MarshmallowValidationError):
+        _search(args)
+
+
+def test_search_users_database_error(app, mocker) -> None:
+    mocker.patch(
+        "app.sharding.get_db",
+        side_effect=OperationalError("SELECT", {}, Exception("gone away")),
+    )
+
+    with pytest.raises(DatabaseError):
+        _search({"q": "al"})
+
+
+def test_search_users_with_username_index(
+    app, users, fresh_username_index, make_user
+) -> None:
+    """The in-memory index answers username lookups and picks up new users."""
+    app.config["USERNAME_INDEX_ENABLED"] = True
+
+    response = _search({"q": "AL", "fields": "username"})
+    assert _usernames(response) == ["al_x", "albert", "alice"]
+    assert fresh_username_index.complete
+    assert len(fresh_username_index) == 4
+
+    make_user(username="alma")
+    app.config["USERNAME_INDEX_REFRESH_SECONDS"] = 0
+    response = _search({"q": "al", "fields": "username"})
+    assert _usernames(response) == ["al_x", "albert", "alice", "alma"]
+
+
+def test_username_index_loads_in_batches(app, users, fresh_username_index) -> None:
+    """Until the index has caught up, lookups fall back to the database."""
+    app.config.update(
+        {"USERNAME_INDEX_ENABLED": True, "USERNAME_INDEX_REFRESH_BATCH": 3}
+    )
+
+    response = _search({"q": "al", "fields": "username"})
+    assert _usernames(response) == ["al_x", "albert", "alice"]
+    assert not fresh_username_index.complete
+
+    _search({"q": "al", "fields": "username"})
+    assert fresh_username_index.complete
+
+
+def test_username_index_skips_renamed_users(app, users, fresh_username_index) -> None:
+    """Stale index entries are filtered against the current username."""
+    app.config["USERNAME_INDEX_ENABLED"] = True
+    _search({"q": "al", "fields": "username"})
+    db.session.execute(
+        db.update(User).where(User.username == "alice").values(username="zed")
+    )
+    db.session.commit()
+
+    response = _search({"q": "al", "fields": "username"})
+    assert _usernames(response) == ["al_x", "albert"]
+
+
+def test_username_index_is_rebuilt_once_too_old(
+    app, users, fresh_username_index
+) -> None:
+    """Renames made elsewhere are found once the index is rebuilt."""
+    app.config["USERNAME_INDEX_ENABLED"] = True
+    _search({"q": "al", "fields": "username"})
+    db.session.execute(
+        db.update(User).where(User.username == "alice").values(username="alvin")
+    )
+    db.session.commit()
+    assert _usernames(_search({"q": "alv", "fields": "username"})) == []
+
+    app.config["USERNAME_INDEX_MAX_AGE_SECONDS"] = 0
+    response = _search({"q": "alv", "fields": "username"})
+
+    assert _usernames(response) == ["alvin"]
+    assert fresh_username_index.complete
+
+
+# -------------------- bulk_set_active Tests -------------------- #
+
+
+@pytest.fixture
+def cohort(make_user):
+    """Five users, two of them at example.org, created a day apart."""
+    ids = []
+    for day, domain in enumerate(["com", "org", "com", "org", "com"], start=1):
+        user = make_user(
+            email=f"user{day}@example.{domain}",
+            created_at=datetime(2024, 1, day),
+        )
+        ids.append(user.id)
+    return ids
+
+
+def _active_ids():
+    return set(db.session.scalars(select(User.id).where(User.is_active)))
+
+
+def test_bulk_set_active_by_ids_in_chunks(app, cohort, mocker) -> None:
+    """Ids are updated in chunks of USER_BULK_BATCH_SIZE, one commit each."""
+    app.config["USER_BULK_BATCH_SIZE"] = 2
+    received = []
+    users_changed.connect(lambda sender, ids: received.append(ids), weak=False)
+
+    body, status_code = _bulk(
+        {"is_active": False, "ids": cohort[:3] + [cohort[0], 999]}
+    )
+
+    assert status_code == 200
+    assert body == {"is_active": False, "processed": 4, "updated": 3, "batches": 2}
+    assert _active_ids() == set(cohort[3:])
+    assert received == [cohort[:2], [cohort[2], 999]]
+    users_changed.receivers.clear()
+
+
+def test_bulk_set_active_only_counts_changed_rows(app, cohort) -> None:
+    _bulk({"is_active": False, "ids": cohort[:2]})
+
+    body, _ = _bulk({"is_active": False, "ids": cohort})
+
+    assert body["updated"] == 3
+
+
+@pytest.mark.parametrize(
+    "user_filter,expected_inactive",
+    [
+        ({"email_domain": "example.org"}, [1, 3]),
+        ({"email_domain": "@example.org"}, [1, 3]),
+        ({"created_after": "2024-01-02T00:00:00"}, [1, 2, 3, 4]),
+        (
+            {
+                "created_after": "2024-01-02T00:00:00+00:00",
+                "created_before": "2024-01-04T00:00:00+00:00",
+            },
+            [1, 2],
+        ),
+    ],
+)
+def test_bulk_set_active_by_filter(app, cohort, user_filter, expected_inactive) -> None:
+    app.config["USER_BULK_BATCH_SIZE"] = 1
+
+    body, _ = _bulk({"is_active": False, "filter": user_filter})
+
+    inactive = {cohort[i] for i in expected_inactive}
+    assert body["updated"] == len(inactive)
+    assert body["batches"] == len(inactive)
+    assert _active_ids() == set(cohort) - inactive
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        None,
+        {"ids": [1]},
+        {"is_active": True},
+        {"is_active": True, "ids": [1], "filter": {"email_domain": "x.com"}},
+        {"is_active": True, "ids": []},
+        {"is_active": True, "filter": {}},
+    ],
+)
+def test_bulk_set_active_validation(app, data) -> None:
+    with pytest.raises(MarshmallowValidationError):
+        _bulk(data)
+
+
+def test_bulk_set_active_database_error(app, mocker) -> None:
+    mocker.patch(
+        "app.sharding.get_db",
+        side_effect=OperationalError("UPDATE", {}, Exception("gone away")),
+    )
+
+    with pytest.raises(DatabaseError, match="stopped after 0 batches"):
+        _bulk({"is_active": True, "ids": [1]})
+
+
+# -------------------- list_users_created Tests -------------------- #
+
+
+@pytest.fixture
+def timeline(make_user):
+    """Seven users; two share a timestamp and users 3 and 6 are inactive."""
+    stamps = [1, 2, 2, 3, 4, 5, 6]
+    users = []
+    for n, day in enumerate(stamps):
+        user = make_user(created_at=datetime(2024, 1, day), is_active=n not in (3, 6))
+        users.append(user.username)
+    return users
+
+
+def _page(args):
+    body, status_code = _created(args)
+    assert status_code == 200
+    return [user.username for user in body["users"]], body["next_cursor"]
+
+
+def test_list_users_created_pages_with_cursor(timeline) -> None:
+    """Pages follow (created_at, id) order, even across equal timestamps."""
+    args = {"start": "2024-01-01T00:00:00", "end": "2024-01-06T00:00:00", "limit": 2}
+
+    first, cursor = _page(args)
+    second, cursor = _page({**args, "cursor": cursor})
+    third, cursor = _page({**args, "cursor": cursor})
+
+    assert first == [timeline[0], timeline[1]]
+    assert second == [timeline[2], timeline[4]]
+    assert third == [timeline[5]]
+    assert cursor is None
+
+
+def test_list_users_created_last_page_has_no_cursor(timeline) -> None:
+    args = {"start": "2024-01-01T00:00:00", "end": "2024-01-06T00:00:00"}
+
+    usernames, cursor = _page(args)
+
+    assert usernames == [timeline[i] for i in (0, 1, 2, 4, 5)]
+    assert cursor is None
+
+
+def test_list_users_created_includes_inactive(timeline) -> None:
+    """Active and inactive users are merged back into (created_at, id) order."""
+    args = {
+        "start": "2024-01-01T00:00:00+00:00",
+        "end": "2024-01-06T00:00:00+00:00",
+        "active_only": "false",
+        "limit": 3,
+    }
+
+    first, cursor = _page(args)
+    second, cursor = _page({**args, "cursor": cursor})
+
+    assert first + second == timeline[:6]
+    assert cursor is None
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        {"start": "2024-01-01T00:00:00"},
+        {"start": "2024-01-02T00:00:00", "end": "2024-01-01T00:00:00"},
+        {"start": "2024-01-01T00:00:00", "end": "2024-01-02T00:00:00", "limit": 0},
+    ],
+)
+def test_list_users_created_validation(app, args) -> None:
+    with pytest.raises(MarshmallowValidationError):
+        _created(args)
+
+
+@pytest.mark.parametrize("cursor", ["%%%", "bm90LWEtY3Vyc29y"])
+def test_list_users_created_invalid_cursor(app, cursor) -> None:
+    with pytest.raises(ValidationError, match="Invalid cursor"):
+        _created(
+            {
+                "start": "2024-01-01T00:00:00",
+                "end": "2024-01-02T00:00:00",
+                "cursor": cursor,
+            }
+        )
+
+
+def test_list_users_created_database_error(app, mocker) -> None:
+    mocker.patch(
+        "app.sharding.get_db",
+        side_effect=OperationalError("SELECT", {}, Exception("gone away")),
+    )
+
+    with pytest.raises(DatabaseError):
+        _created({"start": "2024-01-01T00:00:00", "end": "2024-01-02T00:00:00"})
+
+
+# -------------------- create_user Tests -------------------- #
+
+
+def _user_data(**overrides):
+    data = {
+        "email": "new@example.com",
+        "username": "newbie",
+        "password": "correct horse",
+        "first_name": "New",
+        "last_name": "User",
+    }
+    data.update(overrides)
+    return data
+
+
+def test_create_user(app) -> None:
+    received = []
+    users_changed.connect(lambda sender, ids: received.append(ids), weak=False)
+
+    user, status_code = _create(_user_data())
+
+    assert status_code == 201
+    assert (user.username, user.is_active) == ("newbie", True)
+    assert user.created_at is not None
+    stored = db.session.get(User, user.id)
+    assert stored.password.startswith("$2b$04$")
+    assert received == [[user.id]]
+    users_changed.receivers.clear()
+
+
+def test_create_user_duplicate(app, make_user) -> None:
+    make_user(email="new@example.com")
+
+    with pytest.raises(ValidationError, match="already taken"):
+        _create(_user_data())
+
+
+@pytest.mark.parametrize(
+    "data",
+    [None, _user_data(password="short"), _user_data(email="not-an-email")],
+)
+def test_create_user_validation(app, data) -> None:
+    with pytest.raises(MarshmallowValidationError):
+        _create(data)
+
+
+# -------------------- authenticate Tests -------------------- #
+
+
+@pytest.fixture
+def alice(app):
+    user, _ = _create(_user_data(email="alice@example.com", username="alice"))
+    return user
+
+
+def _login(login, password="correct horse"):
+    return user_service.authenticate({"login": login, "password": password})
+
+
+@pytest.mark.parametrize("login", ["alice", "alice@example.com"])
+def test_authenticate(app, alice, login) -> None:
+    result, status_code = _login(login)
+
+    assert status_code == 200
+    assert result["user"].id == alice.id
+    assert decode_token(result["access_token"], app.config) == alice.id
+    assert alice.id in app.extensions["last_seen"]._pending
+
+
+@pytest.mark.parametrize(
+    "login,password", [("alice", "wrong horse"), ("nobody", "correct horse")]
+)
+def test_authenticate_rejects_bad_credentials(alice, login, password) -> None:
+    with pytest.raises(AuthenticationError, match="Invalid credentials"):
+        _login(login, password)
+
+
+def test_get_user(alice) -> None:
+    user, status_code = user_service.get_user(alice.id)
+
+    assert status_code == 200
+    assert user.username == "alice"
+    with pytest.raises(NotFoundError, match="User not found"):
+        user_service.get_user(alice.id + 1)
+
+
+def test_authenticate_rejects_inactive_users(alice) -> None:
+    _bulk({"is_active": False, "ids": [alice.id]})
+
+    with pytest.raises(AuthenticationError):
+        _login("alice")
+
+
+def test_authenticate_rehashes_at_configured_cost(app, alice) -> None:
+    app.config["BCRYPT_ROUNDS"] = 5
+
+    _login("alice")
+
+    stored = db.session.get(User, alice.id).password
+    assert stored.startswith("$2b$05$")
+    db.session.remove()
+    _login("alice")
+    assert db.session.get(User, alice.id).password == stored
+
+
+def test_rehash_never_overwrites_a_newer_password(app, alice, mocker) -> None:
+    """A password changed between the check and the rehash is kept."""
+    app.config["BCRYPT_ROUNDS"] = 5
+    original = user_service.find_login_user
+
+    def find_then_change_password(login):
+        user = original(login)
+        db.session.execute(
+            db.update(User).where(User.id == user.id).values(password="newer")
+        )
+        db.session.commit()
+        return user
+
+    mocker.patch.object(user_service, "find_login_user", find_then_change_password)
+
+    _login("alice")
+
+    assert db.session.get(User, alice.id).password == "newer"
@@ -0,0 +1,149 @@
+# tests/tests_service/test_user_stats_service.py
+
+from datetime import date, datetime
+
+import pytest
+from marshmallow import ValidationError as MarshmallowValidationError
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+
+from app.database import db
+from app.models import UserCounter, UserDailySignups
+from app.schemas.user_schema import UserSchema, UserStatsSchema
+from app.service import user_service, user_stats_service
+from app.utils.exceptions import DatabaseError, ValidationError
+
+
+def _counters():
+    return dict(db.session.execute(select(UserCounter.name, UserCounter.value)).all())
+
+
+def _daily():
+    return dict(
+        db.session.execute(select(UserDailySignups.day, UserDailySignups.signups)).all()
+    )
+
+
+def _new_user(n):
+    return UserSchema().load(
+        {
+            "email": f"new{n}@example.com",
+            "username": f"new{n}",
+            "password": "correct horse",
+            "first_name": "New",
+            "last_name": "User",
+        }
+    )
+
+
+def _stats(args):
+    return user_stats_service.get_user_stats(UserStatsSchema().load(args))
+
+
+@pytest.fixture
+def frozen_today(mocker):
+    mocker.patch(
+        "app.service.user_stats_service.utcnow",
+        return_value=datetime(2024, 3, 10, 12, 0),
+    )
+
+
+def test_create_user_updates_counters(app) -> None:
+    first, _ = user_service.create_user(_new_user(1))
+    user_service.create_user(_new_user(2))
+
+    assert _counters() == {"total": 2, "active": 2}
+    assert _daily() == {first.created_at.date(): 2}
+
+
+def test_failed_create_does_not_count(app) -> None:
+    user_service.create_user(_new_user(1))
+
+    with pytest.raises(ValidationError):
+        user_service.create_user(_new_user(1))
+
+    assert _counters() == {"total": 1, "active": 1}
+
+
+def test_bulk_set_active_adjusts_active_counter(app) -> None:
+    ids = [user_service.create_user(_new_user(n))[0].id for n in range(3)]
+
+    user_service.bulk_set_active({"is_active": False, "ids": ids[:2] + [999]})
+    assert _counters() == {"total": 3, "active": 1}
+
+    user_service.bulk_set_active({"is_active": True, "ids": ids})
+    assert _counters() == {"total": 3, "active": 3}
+
+
+def test_get_user_stats(app, frozen_today) -> None:
+    db.session.add_all(
+        [
+            UserCounter(name="total", value=7),
+            UserCounter(name="active", value=5),
+            UserDailySignups(day=date(2024, 3, 1), signups=4),
+            UserDailySignups(day=date(2024, 3, 8), signups=2),
+            UserDailySignups(day=date(2024, 3, 10), signups=1),
+        ]
+    )
+    db.session.commit()
+
+    body, status_code = _stats({"days": "3"})
+
+    assert status_code == 200
+    assert body == {
+        "total": 7,
+        "active": 5,
+        "daily_signups": [
+            {"day": "2024-03-08", "signups": 2},
+            {"day": "2024-03-09", "signups": 0},
+            {"day": "2024-03-10", "signups": 1},
+        ],
+    }
+
+
+def test_get_user_stats_defaults(app, frozen_today) -> None:
+    body, _ = _stats({})
+
+    assert body["total"] == 0
+    assert len(body["daily_signups"]) == 30
+    assert body["daily_signups"][-1] == {"day": "2024-03-10", "signups": 0}
+
+
+@pytest.mark.parametrize("args", [{"days": "0"}, {"days": "367"}, {"days": "x"}])
+def test_get_user_stats_validation(app, args) -> None:
+    with pytest.raises(MarshmallowValidationError):
+        _stats(args)
+
+
+def test_get_user_stats_database_error(app, mocker) -> None:
+    mocker.patch(
+        "app.sharding.get_db",
+        side_effect=OperationalError("SELECT", {}, Exception("gone away")),
+    )
+
+    with pytest.raises(DatabaseError, match="Failed to read user stats"):
+        _stats({})
+
+
+def test_reconcile_user_stats(app, make_user) -> None:
+    """Drifted rollups are rebuilt from the users table in chunks."""
+    for day in (1, 1, 2, 4):
+        make_user(created_at=datetime(2024, 1, day, 23, 59))
+    make_user(created_at=datetime(2024, 1, 2), is_active=False)
+    db.session.add_all(
+        [
+            UserCounter(name="total", value=99),
+            UserDailySignups(day=date(2023, 12, 31), signups=3),
+        ]
+    )
+    db.session.commit()
+
+    stats = user_stats_service.reconcile_user_stats(batch_size=2)
+
+    assert stats == {"total": 5, "active": 4, "days": 3, "batches": 3}
+    assert _counters() == {"total": 5, "active": 4}
+    assert _daily() == {
+        date(2024, 1, 1): 2,
+        date(2024, 1, 2): 2,
+        date(2024, 1, 4): 1,
+    }
@@ -0,0 +1,37 @@
+# tests/tests_utils/test_change_notifier.py
+
+import threading
+
+from app.utils.change_notifier import ChangeNotifier
+
+
+def test_wait_times_out_without_changes() -> None:
+    notifier = ChangeNotifier()
+
+    assert notifier.wait(notifier.version, 0.01) is False
+
+
+def test_wait_returns_at_once_for_an_outdated_version() -> None:
+    """A notify between reading the version and waiting is not lost."""
+    notifier = ChangeNotifier()
+    version = notifier.version
+    notifier.notify()
+
+    assert notifier.wait(version, 10) is True
+
+
+def test_notify_wakes_waiters() -> None:
+    notifier = ChangeNotifier()
+    threading.Timer(0.05, notifier.notify).start()
+
+    assert notifier.wait(notifier.version, 10) is True
+
+
+def test_waiting_admits_up_to_max_waiters() -> None:
+    notifier = ChangeNotifier()
+
+    with notifier.waiting(1) as first:
+        with notifier.waiting(1) as second:
+            assert (first, second, notifier.waiters) == (True, False, 1)
+
+    assert notifier.waiters == 0
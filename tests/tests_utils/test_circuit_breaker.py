@@ -0,0 +1,132 @@
+# tests/tests_utils/test_circuit_breaker.py
+
+import pytest
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+from app.database import get_db
+from app.utils.circuit_breaker import (
+    CLOSED,
+    HALF_OPEN,
+    OPEN,
+    CircuitBreaker,
+    is_unavailable,
+)
+from app.utils.exceptions import ServiceUnavailableError
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _mysql_error(code):
+    return OperationalError("SELECT 1", {}, Exception(code, "error"))
+
+
+def _fail(breaker, times=1):
+    for _ in range(times):
+        with pytest.raises(OperationalError):
+            with breaker.guard():
+                raise _mysql_error(2003)
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def breaker(clock):
+    return CircuitBreaker(
+        "Database",
+        failure_rate=0.5,
+        min_calls=4,
+        window=10,
+        open_seconds=5,
+        clock=clock,
+    )
+
+
+def test_is_unavailable() -> None:
+    assert is_unavailable(_mysql_error(2006))
+    assert is_unavailable(PoolTimeoutError("QueuePool limit reached"))
+    assert not is_unavailable(_mysql_error(1213))
+    assert not is_unavailable(IntegrityError("INSERT", {}, Exception(1062, "dup")))
+    assert not is_unavailable(ValueError("not a database error"))
+
+
+def test_opens_once_the_failure_rate_is_reached(breaker) -> None:
+    for _ in range(3):
+        with breaker.guard():
+            pass
+    _fail(breaker, 2)
+    assert breaker.state == CLOSED
+
+    _fail(breaker)
+
+    assert breaker.state == OPEN
+    with pytest.raises(ServiceUnavailableError) as excinfo:
+        with breaker.guard():
+            pytest.fail("an open breaker must not run the call")
+    assert excinfo.value.retry_after == 5
+
+
+def test_other_errors_do_not_count(breaker) -> None:
+    for _ in range(10):
+        with pytest.raises(OperationalError):
+            with breaker.guard():
+                raise _mysql_error(1213)
+
+    assert breaker.state == CLOSED
+
+
+def test_half_open_lets_a_single_probe_through(breaker, clock) -> None:
+    _fail(breaker, 4)
+    clock.now += 5
+    assert breaker.state == HALF_OPEN
+
+    with breaker.guard():
+        with pytest.raises(ServiceUnavailableError):
+            with breaker.guard():
+                pass
+
+    assert breaker.state == CLOSED
+
+
+def test_failed_probe_opens_again(breaker, clock) -> None:
+    _fail(breaker, 4)
+    clock.now += 5
+
+    _fail(breaker)
+
+    assert breaker.state == OPEN
+    clock.now += 4
+    with pytest.raises(ServiceUnavailableError):
+        with breaker.guard():
+            pass
+
+
+def test_get_db_fails_fast_while_open(
+    app, make_user, breaker, clock, monkeypatch
+) -> None:
+    user = make_user()
+    monkeypatch.setitem(app.extensions, "db_breaker", breaker)
+    _fail(breaker, 4)
+    client = app.test_client()
+
+    response = client.get(f"/service/stack/users/{user.id}")
+
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "5"
+    assert response.get_json() == {"error": "Database is unavailable"}
+    with pytest.raises(ServiceUnavailableError):
+        with get_db():
+            pass
+
+    clock.now += 5
+    assert client.get(f"/service/stack/users/{user.id}").status_code == 200
+    assert breaker.state == CLOSED
@@ -0,0 +1,180 @@
+# tests/tests_utils/test_concurrency_limit.py
+
+import asyncio
+import threading
+
+import pytest
+from flask import Flask
+from quart import Quart
+
+from app.utils.concurrency_limit import (
+    AdaptiveLimiter,
+    ConcurrencyLimitMiddleware,
+    register_concurrency_limit,
+)
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _fill(limiter):
+    while limiter.acquire():
+        pass
+
+
+def test_requests_over_the_limit_are_shed() -> None:
+    limiter = AdaptiveLimiter(initial=2)
+
+    assert limiter.acquire() and limiter.acquire()
+    assert not limiter.acquire()
+    limiter.release()
+    assert limiter.acquire()
+    assert (limiter.in_flight, limiter.shed) == (2, 1)
+
+
+def test_fast_requests_grow_a_busy_limit() -> None:
+    limiter = AdaptiveLimiter(initial=4, max_limit=5)
+
+    for _ in range(4):
+        _fill(limiter)
+        for _ in range(limiter.limit):
+            limiter.release(0.01)
+
+    assert limiter.limit == 5
+
+
+def test_an_idle_limit_does_not_grow() -> None:
+    limiter = AdaptiveLimiter(initial=4)
+
+    for _ in range(100):
+        limiter.acquire()
+        limiter.release(0.01)
+
+    assert limiter.limit == 4
+
+
+def test_slow_requests_shrink_the_limit_once_per_target() -> None:
+    clock = FakeClock()
+    limiter = AdaptiveLimiter(
+        initial=10, min_limit=8, latency_target=0.5, backoff=0.9, clock=clock
+    )
+
+    _fill(limiter)
+    for _ in range(3):
+        limiter.release(2.0)
+    assert limiter.limit == 9
+
+    clock.now += 0.5
+    for _ in range(3):
+        limiter.release(2.0)
+    assert limiter.limit == 8
+
+    clock.now += 5
+    limiter.release(2.0)
+    assert limiter.limit == 8
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.config.update(
+        {
+            "CONCURRENCY_LIMIT_ENABLED": True,
+            "CONCURRENCY_LIMIT_INITIAL": 1,
+            "CONCURRENCY_LIMIT_MIN": 1,
+            "CONCURRENCY_LIMIT_MAX": 1,
+            "CONCURRENCY_LATENCY_TARGET_SECONDS": 0.5,
+            "CONCURRENCY_LIMIT_BACKOFF": 0.9,
+            "CONCURRENCY_RETRY_AFTER_SECONDS": 2,
+        }
+    )
+    app.entered = threading.Event()
+    app.proceed = threading.Event()
+
+    @app.get("/work")
+    def work():
+        app.entered.set()
+        app.proceed.wait(5)
+        return {"status": "done"}
+
+    register_concurrency_limit(app)
+    return app
+
+
+def test_middleware_sheds_with_retry_after(app) -> None:
+    assert isinstance(app.wsgi_app, ConcurrencyLimitMiddleware)
+    results = []
+    busy = threading.Thread(
+        target=lambda: results.append(app.test_client().get("/work").status_code)
+    )
+    busy.start()
+    app.entered.wait(5)
+
+    shed = app.test_client().get("/work")
+    app.proceed.set()
+    busy.join(5)
+
+    assert shed.status_code == 503
+    assert shed.headers["Retry-After"] == "2"
+    assert shed.get_json() == {"error": "Service overloaded, retry later"}
+    assert results == [200]
+    assert app.extensions["concurrency_limiter"].in_flight == 0
+
+
+def test_long_polls_bypass_the_limiter(app) -> None:
+    """Change feed polls are neither shed nor hold a slot while they wait."""
+
+    @app.get("/service/stack/users/changes")
+    def changes():
+        return {"events": []}
+
+    limiter = app.extensions["concurrency_limiter"]
+    _fill(limiter)
+    shed = limiter.shed
+
+    response = app.test_client().get("/service/stack/users/changes")
+
+    assert response.status_code == 200
+    assert (limiter.in_flight, limiter.shed) == (1, shed)
+
+
+def test_limiter_is_off_unless_enabled() -> None:
+    app = Flask(__name__)
+    wsgi_app = app.wsgi_app
+
+    register_concurrency_limit(app)
+
+    assert app.wsgi_app == wsgi_app
+    assert "concurrency_limiter" not in app.extensions
+
+
+def test_asgi_middleware_sheds(app) -> None:
+    asgi = Quart(__name__)
+    asgi.config.update(app.config)
+    release = asyncio.Event()
+
+    @asgi.get("/work")
+    async def work():
+        await release.wait()
+        return {"status": "done"}
+
+    register_concurrency_limit(asgi)
+
+    async def scenario():
+        client = asgi.test_client()
+        busy = asyncio.create_task(client.get("/work"))
+        while asgi.extensions["concurrency_limiter"].in_flight == 0:
+            await asyncio.sleep(0.01)
+        shed = await client.get("/work")
+        release.set()
+        return shed, await busy
+
+    shed, done = asyncio.run(scenario())
+
+    assert (shed.status_code, shed.headers["Retry-After"]) == (503, "2")
+    assert done.status_code == 200
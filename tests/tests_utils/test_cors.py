@@ -0,0 +1,168 @@
+# tests/tests_utils/test_cors.py
+
+import asyncio
+
+import pytest
+from flask import Flask
+from quart import Quart
+
+from app.config import Config
+from app.utils.concurrency_limit import register_concurrency_limit
+from app.utils.cors import AsgiCorsMiddleware, CorsMiddleware, register_cors
+
+ALLOWED = "https://app.example.com"
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.dispatched = []
+
+    @app.before_request
+    def record():
+        app.dispatched.append(True)
+
+    @app.route("/things", methods=["GET", "POST"])
+    def things():
+        return {"ok": True}
+
+    app.wsgi_app = CorsMiddleware(app.wsgi_app, [ALLOWED], max_age=600)
+    return app
+
+
+def _preflight(client, origin):
+    return client.options(
+        "/things",
+        headers={
+            "Origin": origin,
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "Content-Type",
+        },
+    )
+
+
+def test_preflight_is_answered_before_flask(app, client) -> None:
+    response = _preflight(client, ALLOWED)
+
+    assert response.status_code == 204
+    assert response.headers["Access-Control-Allow-Origin"] == ALLOWED
+    assert "POST" in response.headers["Access-Control-Allow-Methods"]
+    assert "Content-Type" in response.headers["Access-Control-Allow-Headers"]
+    assert response.headers["Access-Control-Max-Age"] == "600"
+    assert app.dispatched == []
+
+
+def test_allowed_origin_gets_cors_headers(client) -> None:
+    response = client.post("/things", headers={"Origin": ALLOWED})
+
+    assert response.get_json() == {"ok": True}
+    assert response.headers["Access-Control-Allow-Origin"] == ALLOWED
+    assert response.headers["Vary"] == "Origin"
+    assert "Access-Control-Allow-Credentials" not in response.headers
+
+
+@pytest.mark.parametrize("headers", [{}, {"Origin": "https://evil.example.com"}])
+def test_other_requests_get_no_cors_headers(client, headers) -> None:
+    response = client.get("/things", headers=headers)
+
+    assert response.status_code == 200
+    assert "Access-Control-Allow-Origin" not in response.headers
+    assert response.headers["Vary"] == "Origin"
+
+
+def test_disallowed_preflight_reaches_flask(app, client) -> None:
+    response = _preflight(client, "https://evil.example.com")
+
+    assert "Access-Control-Allow-Origin" not in response.headers
+    assert app.dispatched == [True]
+
+
+def test_credentials_header() -> None:
+    app = Flask(__name__)
+    app.add_url_rule("/", "index", lambda: "ok")
+    app.wsgi_app = CorsMiddleware(app.wsgi_app, [ALLOWED], supports_credentials=True)
+
+    response = app.test_client().get("/", headers={"Origin": ALLOWED})
+
+    assert response.headers["Access-Control-Allow-Credentials"] == "true"
+
+
+@pytest.mark.parametrize("origins,installed", [((), False), ((ALLOWED,), True)])
+def test_register_cors(origins, installed) -> None:
+    app = Flask(__name__)
+    app.config["CORS_ORIGINS"] = origins
+
+    register_cors(app)
+
+    assert isinstance(app.wsgi_app, CorsMiddleware) is installed
+
+
+def test_configured_headers_are_allowed_and_exposed() -> None:
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config["CORS_ORIGINS"] = (ALLOWED,)
+    app.add_url_rule("/", "index", lambda: "ok")
+    register_cors(app)
+    client = app.test_client()
+
+    preflight = client.options(
+        "/", headers={"Origin": ALLOWED, "Access-Control-Request-Method": "GET"}
+    )
+    response = client.get("/", headers={"Origin": ALLOWED})
+
+    allowed = preflight.headers["Access-Control-Allow-Headers"].split(", ")
+    assert {"X-Request-Timeout", "traceparent", "X-Profile"} <= set(allowed)
+    exposed = response.headers["Access-Control-Expose-Headers"].split(", ")
+    assert {"Retry-After", "X-Profile-Busy"} <= set(exposed)
+
+
+def test_shed_requests_carry_cors_headers() -> None:
+    """CORS wraps the concurrency limiter, so browsers can read its 503s."""
+    app = Flask(__name__)
+    app.config.from_object(Config)
+    app.config.update({"CORS_ORIGINS": (ALLOWED,), "CONCURRENCY_LIMIT_ENABLED": True})
+    app.add_url_rule("/", "index", lambda: "ok")
+    register_concurrency_limit(app)
+    register_cors(app)
+    limiter = app.extensions["concurrency_limiter"]
+    while limiter.acquire():
+        pass
+
+    response = app.test_client().get("/", headers={"Origin": ALLOWED})
+
+    assert response.status_code == 503
+    assert response.headers["Access-Control-Allow-Origin"] == ALLOWED
+    assert "Retry-After" in response.headers["Access-Control-Expose-Headers"]
+
+
+def test_asgi_app_gets_cors_headers() -> None:
+    app = Quart(__name__)
+    app.config.update({"CORS_ORIGINS": (ALLOWED,), "CORS_MAX_AGE": 600})
+    dispatched = []
+
+    @app.get("/things")
+    async def things():
+        dispatched.append(True)
+        return {"ok": True}
+
+    register_cors(app)
+
+    async def scenario():
+        client = app.test_client()
+        preflight = await client.options(
+            "/things",
+            headers={"Origin": ALLOWED, "Access-Control-Request-Method": "GET"},
+        )
+        allowed = await client.get("/things", headers={"Origin": ALLOWED})
+        other = await client.get("/things", headers={"Origin": "https://evil.example"})
+        return preflight, allowed, other
+
+    preflight, allowed, other = asyncio.run(scenario())
+
+    assert isinstance(app.asgi_app, AsgiCorsMiddleware)
+    assert preflight.status_code == 204
+    assert preflight.headers["Access-Control-Max-Age"] == "600"
+    assert dispatched == [True, True]
+    assert allowed.headers["Access-Control-Allow-Origin"] == ALLOWED
+    assert "Access-Control-Allow-Origin" not in other.headers
+    assert other.headers["Vary"] == "Origin"
@@ -0,0 +1,148 @@
+# tests/tests_utils/test_deadlines.py
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from flask import Flask
+from sqlalchemy import create_engine, text
+
+from app.utils.deadlines import (
+    _limit_statement,
+    _translate_timeout,
+    bounded_wait,
+    check_deadline,
+    limit_statements,
+    request_deadline,
+    time_left,
+)
+from app.utils.endpoint import endpoint
+from app.utils.error_handlers import register_error_handlers
+from app.utils.exceptions import DeadlineExceededError
+
+MYSQL = SimpleNamespace(dialect=SimpleNamespace(name="mysql"))
+SQLITE = SimpleNamespace(dialect=SimpleNamespace(name="sqlite"))
+
+
+@pytest.fixture
+def engine():
+    limit_statements()
+    engine = create_engine("sqlite://")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def app(engine):
+    app = Flask(__name__)
+    app.config["REQUEST_TIMEOUT_SECONDS"] = 5
+    register_error_handlers(app)
+
+    @app.get("/slow")
+    @endpoint(timeout=0.05)
+    def slow():
+        time.sleep(0.06)
+        with engine.connect() as conn:
+            return {"value": conn.execute(text("SELECT 1")).scalar()}
+
+    @app.get("/budget")
+    @endpoint()
+    def budget():
+        return {"left": time_left()}
+
+    return app
+
+
+def _limited(connection, statement):
+    with request_deadline({}, 2.5):
+        return _limit_statement(connection, None, statement, (), None, False)[0]
+
+
+def test_request_deadline_takes_the_shorter_budget() -> None:
+    assert time_left() is None
+    with request_deadline({"X-Request-Timeout": "0.5"}, 30):
+        assert 0.4 < time_left() <= 0.5
+    with request_deadline({"X-Request-Timeout": "60"}, 30):
+        assert 29 < time_left() <= 30
+    with request_deadline({"X-Request-Timeout": "soon"}, None):
+        assert time_left() is None
+    assert time_left() is None
+
+
+def test_check_deadline_raises_once_expired() -> None:
+    check_deadline("the view")
+    with request_deadline({}, 0.001):
+        time.sleep(0.005)
+        with pytest.raises(DeadlineExceededError, match="before the view"):
+            check_deadline("the view")
+
+
+def test_bounded_wait_leaves_a_margin() -> None:
+    assert bounded_wait(30) == 30
+    with request_deadline({}, 10):
+        assert 8.9 < bounded_wait(30) <= 9
+        assert bounded_wait(2) == 2
+    with request_deadline({}, 0.5):
+        assert bounded_wait(30) == 0
+
+
+@pytest.mark.parametrize(
+    "statement,expected",
+    [
+        (
+            "SELECT id FROM users",
+            "SELECT /*+ MAX_EXECUTION_TIME(2500) */ id FROM users",
+        ),
+        (
+            "select /*+ INDEX(users ix) */ id FROM users",
+            "select /*+ MAX_EXECUTION_TIME(2500) INDEX(users ix) */ id FROM users",
+        ),
+        (
+            "INSERT INTO t SELECT id FROM users",
+            "INSERT INTO t SELECT id FROM users",
+        ),
+    ],
+)
+def test_mysql_selects_get_the_time_left(statement, expected) -> None:
+    assert _limited(MYSQL, statement).replace("2499", "2500") == expected
+
+
+def test_other_databases_keep_their_statements() -> None:
+    assert _limited(SQLITE, "SELECT 1") == "SELECT 1"
+
+
+def test_statements_are_not_sent_past_the_deadline(engine) -> None:
+    with engine.connect() as conn:
+        with request_deadline({}, 0.001):
+            time.sleep(0.005)
+            with pytest.raises(DeadlineExceededError, match="before a query"):
+                conn.execute(text("SELECT 1"))
+        assert conn.execute(text("SELECT 1")).scalar() == 1
+
+
+def test_mysql_query_timeouts_become_deadline_errors() -> None:
+    timeout = SimpleNamespace(
+        dialect=MYSQL.dialect,
+        original_exception=Exception(3024, "maximum statement execution time"),
+        sqlalchemy_exception=None,
+    )
+    other = SimpleNamespace(**{**vars(timeout), "original_exception": Exception(1205)})
+
+    with pytest.raises(DeadlineExceededError, match="during a query"):
+        _translate_timeout(timeout)
+    assert _translate_timeout(other) is None
+
+
+def test_endpoint_answers_504_past_its_timeout(app) -> None:
+    response = app.test_client().get("/slow")
+
+    assert response.status_code == 504
+    assert response.get_json() == {"error": "Request deadline exceeded before a query"}
+
+
+def test_endpoint_budget_defaults_to_the_config(app) -> None:
+    client = app.test_client()
+
+    assert 4 < client.get("/budget").get_json()["left"] <= 5
+    left = client.get("/budget", headers={"X-Request-Timeout": "1"}).get_json()
+    assert 0 < left["left"] <= 1
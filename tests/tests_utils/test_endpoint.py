@@ -0,0 +1,92 @@
+# tests/tests_utils/test_endpoint.py
+
+import pytest
+from flask import Flask
+from marshmallow import Schema, fields
+
+from app.utils.endpoint import endpoint
+from app.utils.error_handlers import register_error_handlers
+from app.utils.metrics import RouteTimings, route_timings
+
+
+class EchoSchema(Schema):
+    name = fields.Str(required=True)
+    times = fields.Int(load_default=1)
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    register_error_handlers(app)
+
+    @app.post("/echo")
+    @endpoint(load=EchoSchema(), dump=EchoSchema())
+    def echo(params):
+        return {**params, "secret": "dropped by dump"}
+
+    @app.get("/lookup/<int:item_id>")
+    @endpoint(load=EchoSchema(), location="query", status=202)
+    def lookup(params, item_id):
+        return {"id": item_id, "name": params["name"]}
+
+    @app.get("/created")
+    @endpoint()
+    def created():
+        return [1, 2], 201
+
+    route_timings.reset()
+    yield app
+    route_timings.reset()
+
+
+def test_endpoint_loads_json_and_dumps(client) -> None:
+    response = client.post("/echo", json={"name": "a", "times": "3"})
+
+    assert response.status_code == 200
+    assert response.get_json() == {"name": "a", "times": 3}
+
+
+def test_endpoint_loads_query_and_passes_view_args(client) -> None:
+    response = client.get("/lookup/7?name=b")
+
+    assert response.status_code == 202
+    assert response.get_json() == {"id": 7, "name": "b"}
+
+
+def test_endpoint_without_schemas_keeps_view_status(client) -> None:
+    response = client.get("/created")
+
+    assert response.status_code == 201
+    assert response.get_json() == [1, 2]
+
+
+@pytest.mark.parametrize("kwargs", [{"json": {"times": 2}}, {"data": "not json"}])
+def test_endpoint_load_errors_are_400(client, kwargs) -> None:
+    response = client.post("/echo", **kwargs)
+
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_endpoint_records_timings(client) -> None:
+    client.get("/created")
+    client.get("/created")
+    client.post("/echo", json={})
+
+    timings = route_timings.snapshot()
+    assert timings["created"]["count"] == 2
+    assert timings["echo"]["count"] == 1
+    assert timings["created"]["max_seconds"] <= timings["created"]["total_seconds"]
+
+
+def test_route_timings_track_count_total_and_max() -> None:
+    timings = RouteTimings()
+
+    for seconds in (0.5, 2.0, 1.0):
+        timings.observe("route", seconds)
+
+    assert timings.snapshot() == {
+        "route": {"count": 3, "total_seconds": 3.5, "max_seconds": 2.0}
+    }
+    timings.reset()
+    assert timings.snapshot() == {}
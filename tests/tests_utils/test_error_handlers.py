@@ -0,0 +1,75 @@
+# tests/tests_utils/test_error_handlers.py
+
+import logging
+
+import pytest
+from flask import Flask, abort
+from marshmallow import ValidationError as MarshmallowValidationError
+
+from app.utils.error_handlers import register_error_handlers
+from app.utils.exceptions import (
+    AuthenticationError,
+    AuthorizationError,
+    DatabaseError,
+    ValidationError,
+)
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    register_error_handlers(app)
+    return app
+
+
+@pytest.fixture
+def raise_from_view(app):
+    """Registers a view that raises the given exception and returns its path."""
+
+    def _raise(exc):
+        def view():
+            raise exc
+
+        app.add_url_rule("/boom", "boom", view)
+        return "/boom"
+
+    return _raise
+
+
+@pytest.mark.parametrize(
+    "exc,status,body",
+    [
+        (
+            MarshmallowValidationError({"name": ["Missing data."]}),
+            400,
+            {"error": {"name": ["Missing data."]}},
+        ),
+        (ValidationError("Invalid cursor"), 400, {"error": "Invalid cursor"}),
+        (AuthenticationError(), 401, {"error": "Authentication failed"}),
+        (AuthorizationError(), 403, {"error": "Authorization failed"}),
+        (DatabaseError("pool exhausted"), 500, {"error": "Database error occurred"}),
+        (RuntimeError("bug"), 500, {"error": "Internal server error"}),
+    ],
+)
+def test_error_responses(client, raise_from_view, exc, status, body) -> None:
+    response = client.get(raise_from_view(exc))
+
+    assert response.status_code == status
+    assert response.mimetype == "application/json"
+    assert response.get_json() == body
+
+
+def test_http_exceptions_pass_through(app, client) -> None:
+    app.add_url_rule("/gone", "gone", lambda: abort(410))
+
+    assert client.get("/gone").status_code == 410
+    assert client.get("/missing").status_code == 404
+
+
+def test_unexpected_errors_are_logged(client, raise_from_view, caplog) -> None:
+    caplog.set_level(logging.ERROR, logger="app.utils.error_handlers")
+
+    client.get(raise_from_view(RuntimeError("bug")))
+
+    assert "Unexpected error in boom" in caplog.text
+    assert "RuntimeError: bug" in caplog.text
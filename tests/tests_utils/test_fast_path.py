@@ -0,0 +1,75 @@
+# tests/tests_utils/test_fast_path.py
+
+import pytest
+from flask import Flask
+
+from app.utils.fast_path import FastPathMiddleware
+from app.utils.metrics import render_prometheus, route_timings
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+    app.dispatched = []
+
+    @app.before_request
+    def record():
+        app.dispatched.append(True)
+
+    @app.route("/service/stack/health", methods=["GET", "POST"])
+    def health():
+        return {"status": "from flask"}
+
+    app.wsgi_app = FastPathMiddleware(app.wsgi_app)
+    route_timings.reset()
+    yield app
+    route_timings.reset()
+
+
+def test_probe_is_answered_without_flask(app, client) -> None:
+    response = client.get("/service/stack/health")
+
+    assert response.status_code == 200
+    assert response.get_json() == {"status": "OK"}
+    assert response.headers["Content-Length"] == str(len(response.data))
+    assert app.dispatched == []
+
+
+def test_head_probe_has_no_body(app, client) -> None:
+    response = client.head("/service/stack/health")
+
+    assert response.status_code == 200
+    assert response.data == b""
+    assert app.dispatched == []
+
+
+def test_other_methods_and_paths_reach_flask(app, client) -> None:
+    assert client.post("/service/stack/health").get_json() == {"status": "from flask"}
+    assert client.get("/service/stack/other").status_code == 404
+    assert len(app.dispatched) == 2
+
+
+def test_metrics_render_route_timings(app, client) -> None:
+    route_timings.observe("search_users", 0.25)
+    route_timings.observe("search_users", 0.5)
+
+    response = client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.mimetype == "text/plain"
+    assert 'stack_request_duration_seconds_count{route="search_users"} 2' in (
+        response.text
+    )
+    assert app.dispatched == []
+
+
+def test_render_prometheus() -> None:
+    text = render_prometheus(
+        {'a"b': {"count": 1, "total_seconds": 0.5, "max_seconds": 0.5}}
+    )
+
+    assert text.splitlines()[2:4] == [
+        'stack_request_duration_seconds_count{route="a\\"b"} 1',
+        'stack_request_duration_seconds_sum{route="a\\"b"} 0.500000',
+    ]
+    assert text.endswith('stack_request_duration_max_seconds{route="a\\"b"} 0.500000\n')
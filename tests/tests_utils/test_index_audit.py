@@ -0,0 +1,124 @@
+# tests/tests_utils/test_index_audit.py
+
+import pytest
+import sqlalchemy as sa
+
+from app.utils.index_audit import (
+    Finding,
+    Index,
+    Suggestion,
+    collect_indexes,
+    find_redundant_indexes,
+    parse_query_log,
+    suggest_missing_indexes,
+)
+
+USERS_COLUMNS = {
+    "users": {"id", "email", "username", "first_name", "is_active", "created_at"}
+}
+
+
+@pytest.fixture
+def inspector():
+    """Inspector over a users table shaped like the one the migrations create."""
+    engine = sa.create_engine("sqlite://")
+    with engine.begin() as conn:
+        conn.execute(
+            sa.text(
+                "CREATE TABLE users (id INTEGER PRIMARY KEY, email VARCHAR(255), "
+                "username VARCHAR(150))"
+            )
+        )
+        conn.execute(sa.text("CREATE UNIQUE INDEX ix_users_email ON users (email)"))
+        conn.execute(sa.text("CREATE INDEX ix_users_id ON users (id)"))
+    return sa.inspect(engine)
+
+
+def test_collect_indexes(inspector) -> None:
+    indexes = collect_indexes(inspector, "users")
+
+    assert Index("PRIMARY", ("id",), unique=True, primary=True) in indexes
+    assert Index("ix_users_email", ("email",), unique=True) in indexes
+    assert Index("ix_users_id", ("id",)) in indexes
+
+
+def test_index_on_primary_key_is_redundant(inspector) -> None:
+    indexes = collect_indexes(inspector, "users")
+
+    assert find_redundant_indexes("users", indexes) == [
+        Finding("users", "ix_users_id", "duplicates the primary key")
+    ]
+
+
+@pytest.mark.parametrize(
+    "indexes,expected",
+    [
+        (
+            # Leftmost prefix of a wider index
+            [Index("ix_a", ("a",)), Index("ix_a_b", ("a", "b"))],
+            [Finding("t", "ix_a", "is a prefix of ix_a_b (a, b)")],
+        ),
+        (
+            # Not a leftmost prefix
+            [Index("ix_b", ("b",)), Index("ix_a_b", ("a", "b"))],
+            [],
+        ),
+        (
+            # A unique index still enforces its constraint
+            [Index("uq_a", ("a",), unique=True), Index("ix_a_b", ("a", "b"))],
+            [],
+        ),
+        (
+            # Identical indexes: the plain one goes, the unique one stays
+            [Index("ix_a", ("a",)), Index("uq_a", ("a",), unique=True)],
+            [Finding("t", "ix_a", "duplicates uq_a")],
+        ),
+        (
+            # Identical twins are only reported once
+            [Index("ix_a_1", ("a",)), Index("ix_a_2", ("a",))],
+            [Finding("t", "ix_a_2", "duplicates ix_a_1")],
+        ),
+    ],
+)
+def test_find_redundant_indexes(indexes, expected) -> None:
+    assert find_redundant_indexes("t", indexes) == expected
+
+
+def test_parse_query_log() -> None:
+    lines = [
+        "2024-10-20T10:00:00 42 Query SELECT users.id FROM users "
+        "WHERE users.email = 'a@b.c' LIMIT 1",
+        "SELECT * FROM users WHERE created_at >= 'x' AND is_active = 1 "
+        "ORDER BY created_at, id LIMIT 100",
+        "SELECT * FROM users u WHERE u.first_name LIKE 'AND id = 1%' LIMIT 10",
+        "UPDATE users SET is_active=0 WHERE id IN (1, 2, 3)",
+        "SELECT * FROM orders WHERE customer_id = 1",
+        "SELECT 1",
+    ]
+
+    usage = parse_query_log(lines, USERS_COLUMNS)
+
+    assert usage == {
+        ("users", ("email",), ()): 1,
+        ("users", ("is_active", "created_at"), ("created_at", "id")): 1,
+        ("users", ("first_name",), ()): 1,
+        ("users", ("id",), ()): 1,
+    }
+
+
+def test_suggest_missing_indexes() -> None:
+    indexes_by_table = {
+        "users": [
+            Index("PRIMARY", ("id",), unique=True, primary=True),
+            Index("ix_users_email", ("email",), unique=True),
+        ]
+    }
+    usage = {
+        ("users", ("email",), ()): 10,
+        ("users", ("is_active", "created_at"), ("created_at", "id")): 5,
+        ("users", ("first_name",), ()): 1,
+    }
+
+    suggestions = suggest_missing_indexes(indexes_by_table, usage, min_count=2)
+
+    assert suggestions == [Suggestion("users", ("is_active", "created_at", "id"), 5)]
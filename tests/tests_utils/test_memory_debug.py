@@ -0,0 +1,47 @@
+# tests/tests_utils/test_memory_debug.py
+
+import tracemalloc
+
+import pytest
+
+from app.utils.memory_debug import MemoryTracker, current_rss_bytes
+
+
+@pytest.fixture
+def tracker():
+    tracker = MemoryTracker(frames=3)
+    tracker.start()
+    yield tracker
+    tracemalloc.stop()
+
+
+def test_current_rss_bytes() -> None:
+    assert current_rss_bytes() > 1024 * 1024
+
+
+def test_first_report_has_no_growth(tracker) -> None:
+    report = tracker.report(top=5)
+
+    assert report["growth"] is None
+    assert 0 < len(report["top"]) <= 5
+    assert report["traced_peak_bytes"] >= report["traced_bytes"] > 0
+
+
+def test_report_diffs_against_the_previous_snapshot(tracker) -> None:
+    tracker.report()
+    leak = [bytearray(4096) for _ in range(256)]  # noqa: F841
+
+    report = tracker.report(top=5)
+
+    assert report["growth"][0]["site"].startswith(__file__)
+    assert report["growth"][0]["size_diff_bytes"] >= 256 * 4096
+    assert report["growth"][0]["count_diff"] >= 256
+
+
+def test_report_reset_and_traceback_grouping(tracker) -> None:
+    tracker.report()
+
+    report = tracker.report(group_by="traceback", reset=True)
+
+    assert report["growth"] is None
+    assert all(len(entry.get("traceback", [1])) <= 3 for entry in report["top"])
@@ -0,0 +1,153 @@
+# tests/tests_utils/test_online_migration.py
+
+import pytest
+import sqlalchemy as sa
+
+from app.utils.online_migration import (
+    backfill_in_chunks,
+    copy_and_swap,
+    copy_in_chunks,
+    iter_pk_ranges,
+)
+
+
+@pytest.fixture
+def bind():
+    """Autocommit SQLite connection with a populated users table."""
+    engine = sa.create_engine("sqlite://")
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(
+            sa.text(
+                "CREATE TABLE users (id INTEGER PRIMARY KEY, "
+                "username VARCHAR(150) NOT NULL, is_active BOOLEAN NOT NULL)"
+            )
+        )
+        # Sparse ids to make sure gaps do not produce empty batches
+        for user_id in list(range(1, 21)) + [100, 250, 251]:
+            conn.execute(
+                sa.text("INSERT INTO users VALUES (:id, :username, 1)"),
+                {"id": user_id, "username": f"user{user_id}"},
+            )
+        yield conn
+
+
+def test_iter_pk_ranges_walks_the_index(bind) -> None:
+    """Ranges hold at most batch_size rows and the last one is open-ended."""
+    ranges = list(iter_pk_ranges(bind, "users", batch_size=10))
+
+    assert ranges == [(1, 11), (11, 100), (100, None)]
+
+
+def test_iter_pk_ranges_empty_table(bind) -> None:
+    bind.execute(sa.text("DELETE FROM users"))
+
+    assert list(iter_pk_ranges(bind, "users")) == []
+
+
+def test_backfill_in_chunks_updates_every_row(bind, mocker) -> None:
+    """The backfill updates matching rows batch by batch and pauses in between."""
+    mock_sleep = mocker.patch("app.utils.online_migration.time.sleep")
+
+    updated = backfill_in_chunks(
+        bind,
+        "users",
+        "is_active = :active",
+        where="id > :min_id",
+        params={"active": False, "min_id": 5},
+        batch_size=10,
+        pause=0.5,
+    )
+
+    assert updated == 18
+    inactive = bind.execute(
+        sa.text("SELECT COUNT(*) FROM users WHERE is_active = 0")
+    ).scalar()
+    assert inactive == 18
+    assert mock_sleep.call_count == 3
+    mock_sleep.assert_called_with(0.5)
+
+
+def test_copy_in_chunks_copies_every_row(bind, mocker) -> None:
+    """Rows are copied range by range, pausing after each batch."""
+    mock_sleep = mocker.patch("app.utils.online_migration.time.sleep")
+    bind.execute(
+        sa.text("CREATE TABLE names (id INTEGER PRIMARY KEY, username VARCHAR(150))")
+    )
+
+    copied = copy_in_chunks(
+        bind, "users", "names", ["id", "username"], batch_size=10, pause=0.5
+    )
+
+    assert copied == 23
+    rows = bind.execute(sa.text("SELECT id, username FROM names")).all()
+    assert len(rows) == 23
+    assert (251, "user251") in rows
+    assert mock_sleep.call_count == 3
+
+
+def test_copy_and_swap_rebuilds_table(bind, mocker) -> None:
+    """Rows are copied into the new definition and the tables are swapped."""
+    mocker.patch("app.utils.online_migration.time.sleep")
+
+    def create_shadow(name):
+        bind.execute(
+            sa.text(
+                f"CREATE TABLE {name} (id INTEGER PRIMARY KEY, "
+                "username VARCHAR(150) NOT NULL, is_active BOOLEAN NOT NULL, "
+                "last_seen_at DATETIME)"
+            )
+        )
+
+    copied = copy_and_swap(bind, "users", create_shadow, batch_size=7)
+
+    assert copied == 23
+    inspector = sa.inspect(bind)
+    assert "last_seen_at" in {c["name"] for c in inspector.get_columns("users")}
+    assert set(inspector.get_table_names()) == {"users"}
+    usernames = bind.execute(
+        sa.text("SELECT username FROM users WHERE id = 251")
+    ).scalar()
+    assert usernames == "user251"
+
+
+def test_copy_and_swap_keep_old(bind) -> None:
+    """The previous table is kept around when requested."""
+
+    def create_shadow(name):
+        bind.execute(
+            sa.text(
+                f"CREATE TABLE {name} (id INTEGER PRIMARY KEY, "
+                "username VARCHAR(150) NOT NULL, is_active BOOLEAN NOT NULL)"
+            )
+        )
+
+    copy_and_swap(
+        bind,
+        "users",
+        create_shadow,
+        columns=["id", "username", "is_active"],
+        keep_old=True,
+    )
+
+    assert set(sa.inspect(bind).get_table_names()) == {"users", "_users_old"}
+
+
+def test_mysql_mirror_triggers(mocker) -> None:
+    """MySQL gets triggers mirroring inserts, updates and deletes into the shadow."""
+    from sqlalchemy.dialects import mysql
+
+    from app.utils.online_migration import _mirror_triggers
+
+    bind = mocker.MagicMock()
+    bind.dialect = mysql.dialect()
+
+    triggers = _mirror_triggers(bind, "users", "_users_new", ["id", "email"], "id")
+
+    assert set(triggers) == {"users_osc_ins", "users_osc_upd", "users_osc_del"}
+    assert triggers["users_osc_ins"] == (
+        "AFTER INSERT ON users FOR EACH ROW "
+        "REPLACE INTO _users_new (id, email) VALUES (NEW.id, NEW.email)"
+    )
+    assert triggers["users_osc_del"].endswith(
+        "DELETE FROM _users_new WHERE id = OLD.id"
+    )
@@ -0,0 +1,87 @@
+# tests/tests_utils/test_prefix_index.py
+
+import pytest
+
+from app.utils.prefix_index import PrefixIndex
+
+
+@pytest.fixture
+def index():
+    rows = [(1, "alice"), (2, "Albert"), (3, "bob"), (4, "alfred"), (5, "carol")]
+
+    def fetch_rows(after_id, batch_size):
+        return [row for row in rows if row[0] > after_id][:batch_size]
+
+    index = PrefixIndex()
+    index.refresh(fetch_rows, batch_size=10)
+    return index
+
+
+def test_search_is_case_insensitive_and_ordered(index) -> None:
+    assert index.search("AL", limit=10) == [2, 4, 1]
+
+
+def test_search_respects_limit(index) -> None:
+    assert index.search("al", limit=2) == [2, 4]
+
+
+def test_search_without_matches(index) -> None:
+    assert index.search("zed", limit=10) == []
+
+
+def test_refresh_is_incremental_and_bounded() -> None:
+    """Rows are loaded in bounded batches until a partial batch comes back."""
+    rows = [(i, f"user{i:02d}") for i in range(1, 8)]
+    calls = []
+
+    def fetch_rows(after_id, batch_size):
+        calls.append(after_id)
+        return [row for row in rows if row[0] > after_id][:batch_size]
+
+    index = PrefixIndex()
+    assert index.refresh(fetch_rows, batch_size=3) == 3
+    assert not index.complete
+    assert index.refresh(fetch_rows, batch_size=3) == 3
+    assert index.refresh(fetch_rows, batch_size=3) == 1
+    assert index.complete
+    assert calls == [0, 3, 6]
+    assert len(index) == 7
+    assert index.high_water_id == 7
+
+
+def test_add_and_remove(index) -> None:
+    """Renamed rows are re-indexed; rows past the high water mark wait for refresh."""
+    index.remove("alice", 1)
+    index.add("zelda", 1)
+    index.add("zeno", 99)
+
+    assert index.search("al", limit=10) == [2, 4]
+    assert index.search("ze", limit=10) == [1]
+
+
+def test_overlapping_refreshes_add_each_row_once() -> None:
+    """Two refreshes fetching the same range do not duplicate its rows."""
+    rows = [(1, "alice"), (2, "alfred")]
+    index = PrefixIndex()
+
+    def fetch_rows(after_id, batch_size):
+        fetched = [row for row in rows if row[0] > after_id][:batch_size]
+        if not index.complete:
+            # Another thread refreshes the same range while this one waits
+            index.complete = True
+            index.refresh(fetch_rows, batch_size)
+        return fetched
+
+    assert index.refresh(fetch_rows, batch_size=10) == 0
+    assert index.search("al", limit=10) == [2, 1]
+    assert len(index) == 2
+
+
+def test_clear_drops_rows_fetched_before_it(index) -> None:
+    def fetch_rows(after_id, batch_size):
+        index.clear()
+        return [(6, "alma")]
+
+    assert index.refresh(fetch_rows, batch_size=10) == 0
+    assert len(index) == 0
+    assert (index.high_water_id, index.built_at, index.complete) == (0, None, False)
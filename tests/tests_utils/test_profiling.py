@@ -0,0 +1,156 @@
+# tests/tests_utils/test_profiling.py
+
+import cProfile
+import pstats
+import threading
+
+import pytest
+from flask import Flask
+
+from app.utils.profiling import (
+    PROFILE_BUSY_HEADER,
+    ProfilerMiddleware,
+    collapsed_stacks,
+    register_profiler,
+    sign_profile_request,
+    verify_profile_request,
+)
+
+SECRET = "s3cret"
+
+
+def _busy(n):
+    return sum(i * i for i in range(n))
+
+
+def _outer():
+    return _busy(20000) + _busy(10000)
+
+
+@pytest.fixture
+def app():
+    app = Flask(__name__)
+
+    @app.get("/work")
+    def work():
+        return {"total": _outer()}
+
+    return app
+
+
+def _profiled(app, tmp_path, **kwargs):
+    app.wsgi_app = ProfilerMiddleware(app.wsgi_app, str(tmp_path), **kwargs)
+    return app.test_client()
+
+
+def test_signed_header_round_trip() -> None:
+    value = sign_profile_request(SECRET, "get", "/work", ttl=60, now=1000)
+
+    assert verify_profile_request(SECRET, value, "GET", "/work", now=1059)
+    assert not verify_profile_request(SECRET, value, "GET", "/work", now=1061)
+    assert not verify_profile_request(SECRET, value, "POST", "/work", now=1000)
+    assert not verify_profile_request(SECRET, value, "GET", "/other", now=1000)
+    assert not verify_profile_request("other", value, "GET", "/work", now=1000)
+    assert not verify_profile_request(SECRET, "garbage", "GET", "/work", now=1000)
+
+
+def test_unsigned_requests_are_not_profiled(app, tmp_path) -> None:
+    client = _profiled(app, tmp_path, secret=SECRET)
+
+    assert client.get("/work").status_code == 200
+    assert client.get("/work", headers={"X-Profile": "1.abc"}).status_code == 200
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_signed_request_writes_pstats_and_collapsed_stacks(app, tmp_path) -> None:
+    client = _profiled(app, tmp_path, secret=SECRET)
+    header = sign_profile_request(SECRET, "GET", "/work")
+
+    response = client.get("/work", headers={"X-Profile": header})
+
+    assert response.status_code == 200
+    # The profile is written once the server is done sending the response
+    assert list(tmp_path.iterdir()) == []
+    response.close()
+    (pstats_file,) = tmp_path.glob("*-GET-work-*.pstats")
+    stats = pstats.Stats(str(pstats_file))
+    assert any(func[2] == "_outer" for func in stats.stats)
+    collapsed = pstats_file.with_suffix(".collapsed").read_text().splitlines()
+    assert any("_outer (test_profiling.py" in line for line in collapsed)
+    for line in collapsed:
+        stack, weight = line.rsplit(" ", 1)
+        assert stack and int(weight) > 0
+
+
+def test_sampling_profiles_without_a_header(app, tmp_path) -> None:
+    client = _profiled(app, tmp_path, sample_rate=1.0)
+
+    client.get("/work").close()
+
+    assert len(list(tmp_path.glob("*.pstats"))) == 1
+
+
+def test_overlapping_requests_are_profiled_one_at_a_time(app, tmp_path) -> None:
+    """A request wanting a profile while another is profiled runs without one."""
+    entered, proceed = threading.Event(), threading.Event()
+
+    @app.get("/slow")
+    def slow():
+        entered.set()
+        proceed.wait(5)
+        return {"total": _outer()}
+
+    client = _profiled(app, tmp_path, sample_rate=1.0)
+    results = []
+    first = threading.Thread(target=lambda: results.append(client.get("/slow")))
+    first.start()
+    entered.wait(5)
+
+    second = app.test_client().get("/work")
+    proceed.set()
+    first.join(5)
+
+    assert second.status_code == 200
+    assert second.headers[PROFILE_BUSY_HEADER] == "1"
+    assert results[0].status_code == 200
+    assert PROFILE_BUSY_HEADER not in results[0].headers
+    second.close()
+    results[0].close()
+    (pstats_file,) = tmp_path.glob("*.pstats")
+    assert "-slow-" in pstats_file.name
+
+
+def test_collapsed_stacks_split_time_between_callers() -> None:
+    profiler = cProfile.Profile()
+    profiler.runcall(_outer)
+
+    stacks = collapsed_stacks(pstats.Stats(profiler))
+
+    busy = {stack: w for stack, w in stacks.items() if "<genexpr>" in stack}
+    assert busy, stacks
+    assert all("_outer" in stack and "_busy" in stack for stack in busy)
+    assert sum(stacks.values()) > 0
+
+
+@pytest.mark.parametrize(
+    "config,installed",
+    [
+        ({}, False),
+        ({"PROFILE_SAMPLE_RATE": 0.1}, False),
+        ({"PROFILE_DIR": "DIR"}, False),
+        ({"PROFILE_DIR": "DIR", "PROFILE_SAMPLE_RATE": 0.1}, True),
+        ({"PROFILE_DIR": "DIR", "PROFILE_SECRET": SECRET}, True),
+    ],
+)
+def test_register_profiler_only_when_configured(
+    app, tmp_path, config, installed
+) -> None:
+    if "PROFILE_DIR" in config:
+        config["PROFILE_DIR"] = str(tmp_path / "profiles")
+    app.config.update(config)
+
+    register_profiler(app)
+
+    assert isinstance(app.wsgi_app, ProfilerMiddleware) is installed
+    if not installed:
+        assert "wsgi_app" not in vars(app)
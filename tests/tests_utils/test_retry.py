@@ -0,0 +1,296 @@
+# tests/tests_utils/test_retry.py
+
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.util import greenlet_spawn
+
+from app.database import db
+from app.models import UserDirectory, UserEvent
+from app.service import user_service
+from app.utils import retry
+from app.utils.deadlines import request_deadline
+from app.utils.exceptions import DatabaseError
+from app.utils.metrics import render_retry_counters, retry_counters
+from app.utils.retry import (
+    LOCK_MYSQL_ERRORS,
+    backoff_delay,
+    retry_policy,
+    retry_transient,
+    transient_error_code,
+)
+
+POLICY = {
+    "DB_RETRY_ATTEMPTS": 3,
+    "DB_RETRY_BASE_SECONDS": 0.05,
+    "DB_RETRY_MAX_SECONDS": 1.0,
+    "DB_RETRY_BUDGET": 3,
+}
+
+
+def _mysql_error(code):
+    return OperationalError("SELECT 1", {}, Exception(code, "error"))
+
+
+def _wrapped(code):
+    try:
+        raise _mysql_error(code)
+    except OperationalError as e:
+        try:
+            raise DatabaseError("Failed to load user") from e
+        except DatabaseError as wrapped:
+            return wrapped
+
+
+@pytest.fixture(autouse=True)
+def sleeps(monkeypatch):
+    slept = []
+    monkeypatch.setattr(retry.time, "sleep", slept.append)
+    retry_counters.reset()
+    yield slept
+    retry_counters.reset()
+
+
+def _flaky(*errors):
+    errors = list(errors)
+    calls = []
+
+    @retry_transient
+    def unit():
+        calls.append(1)
+        if errors:
+            raise errors.pop(0)
+        return "done"
+
+    return unit, calls
+
+
+def test_transient_error_code() -> None:
+    assert transient_error_code(_mysql_error(1213)) == 1213
+    assert transient_error_code(_wrapped(1205)) == 1205
+    assert transient_error_code(_mysql_error(1146)) is None
+    assert transient_error_code(IntegrityError("INSERT", {}, Exception(1062))) is None
+    assert transient_error_code(DatabaseError("Failed to load user")) is None
+
+
+def test_backoff_is_jittered_and_capped() -> None:
+    delays = [backoff_delay(retry, 0.05, 0.3) for retry in range(10) for _ in range(50)]
+
+    assert all(0 <= delay <= 0.3 for delay in delays)
+    assert max(backoff_delay(0, 0.05, 0.3) for _ in range(50)) <= 0.05
+    assert len(set(delays)) > 1
+
+
+def test_transient_errors_are_retried_until_success(sleeps) -> None:
+    unit, calls = _flaky(_wrapped(1213), _mysql_error(2013))
+
+    with retry_policy(POLICY):
+        assert unit() == "done"
+
+    assert len(calls) == 3
+    assert len(sleeps) == 2
+    assert sleeps[1] <= 0.1
+    assert retry_counters.snapshot() == {
+        "retries": {1213: 1, 2013: 1},
+        "recovered": 1,
+        "gave_up": {},
+    }
+
+
+def test_gives_up_after_the_attempts() -> None:
+    unit, calls = _flaky(*[_mysql_error(1205)] * 5)
+
+    with retry_policy(POLICY), pytest.raises(OperationalError):
+        unit()
+
+    assert len(calls) == 3
+    assert retry_counters.snapshot()["gave_up"] == {(1205, "attempts"): 1}
+
+
+def test_other_errors_are_not_retried() -> None:
+    unit, calls = _flaky(_mysql_error(1146))
+
+    with retry_policy(POLICY), pytest.raises(OperationalError):
+        unit()
+
+    assert len(calls) == 1
+    assert retry_counters.snapshot()["retries"] == {}
+
+
+def test_units_of_a_request_share_the_budget() -> None:
+    first, _ = _flaky(_mysql_error(1213), _mysql_error(1213))
+    second, calls = _flaky(_mysql_error(1213), _mysql_error(1213))
+
+    with retry_policy({**POLICY, "DB_RETRY_BUDGET": 3}):
+        assert first() == "done"
+        with pytest.raises(OperationalError):
+            second()
+
+    assert len(calls) == 2
+    assert retry_counters.snapshot()["gave_up"] == {(1213, "budget"): 1}
+
+
+def test_units_can_limit_the_retried_codes() -> None:
+    errors = [_mysql_error(1213), _mysql_error(2013)]
+    calls = []
+
+    @retry_transient(codes=LOCK_MYSQL_ERRORS)
+    def write():
+        calls.append(1)
+        raise errors.pop(0)
+
+    with retry_policy(POLICY), pytest.raises(OperationalError):
+        write()
+
+    assert len(calls) == 2
+    assert retry_counters.snapshot()["retries"] == {1213: 1}
+
+
+def test_nested_units_leave_retrying_to_the_outer_one() -> None:
+    inner, inner_calls = _flaky(_mysql_error(1213))
+
+    @retry_transient
+    def outer():
+        return inner()
+
+    with retry_policy(POLICY):
+        assert outer() == "done"
+
+    assert len(inner_calls) == 2
+    assert retry_counters.snapshot()["retries"] == {1213: 1}
+
+
+def test_no_retry_past_the_deadline() -> None:
+    unit, calls = _flaky(_mysql_error(1213))
+
+    with retry_policy({**POLICY, "DB_RETRY_BASE_SECONDS": 10}):
+        with request_deadline({}, 0.001), pytest.raises(OperationalError):
+            unit()
+
+    assert len(calls) == 1
+
+
+def test_backoff_in_a_greenlet_awaits(monkeypatch, sleeps) -> None:
+    awaited = []
+
+    async def fake_sleep(seconds):
+        awaited.append(seconds)
+
+    monkeypatch.setattr(retry.asyncio, "sleep", fake_sleep)
+    unit, calls = _flaky(_mysql_error(2006))
+
+    async def run():
+        with retry_policy(POLICY):
+            return await greenlet_spawn(unit)
+
+    assert asyncio.run(run()) == "done"
+    assert len(awaited) == 1
+    assert sleeps == []
+
+
+def test_backoff_without_greenlet_sleeps(monkeypatch, sleeps) -> None:
+    def no_greenlet():
+        raise ImportError("greenlet is not installed")
+
+    monkeypatch.setattr(retry, "HAS_GREENLET", False)
+    monkeypatch.setattr(retry, "in_greenlet", no_greenlet)
+    unit, calls = _flaky(_mysql_error(2006))
+
+    with retry_policy(POLICY):
+        assert unit() == "done"
+
+    assert len(sleeps) == 1
+
+
+def test_render_retry_counters() -> None:
+    retry_counters.retried(1213)
+    retry_counters.recovered()
+    retry_counters.gave_up(2013, "budget")
+
+    text = render_retry_counters(retry_counters.snapshot())
+
+    assert 'stack_db_retries_total{code="1213"} 1' in text
+    assert "stack_db_retry_recovered_total 1" in text
+    assert 'stack_db_retry_gave_up_total{code="2013",reason="budget"} 1' in text
+
+
+def test_get_user_recovers_from_a_deadlock(app, make_user, monkeypatch) -> None:
+    user = make_user()
+    user_session = user_service.user_session
+    failures = [_mysql_error(1213)]
+
+    def deadlocking_session(user_id):
+        if failures:
+            raise failures.pop()
+        return user_session(user_id)
+
+    monkeypatch.setattr(user_service, "user_session", deadlocking_session)
+
+    response = app.test_client().get(f"/service/stack/users/{user.id}")
+
+    assert response.status_code == 200
+    assert response.get_json()["id"] == user.id
+    assert retry_counters.snapshot()["recovered"] == 1
+
+
+def _count(model):
+    return db.session.scalar(select(func.count()).select_from(model))
+
+
+def _fail_once(monkeypatch, name, code):
+    original = getattr(user_service, name)
+    failures = [_mysql_error(code)]
+
+    def failing(*args):
+        if failures:
+            raise failures.pop()
+        return original(*args)
+
+    monkeypatch.setattr(user_service, name, failing)
+
+
+def _signup(app):
+    return app.test_client().post(
+        "/service/stack/users",
+        json={
+            "email": "alice@example.com",
+            "username": "alice",
+            "password": "correct horse",
+            "first_name": "Alice",
+            "last_name": "Liddell",
+        },
+    )
+
+
+def test_create_user_recovers_from_a_deadlock(app, monkeypatch) -> None:
+    _fail_once(monkeypatch, "record_users_created", 1213)
+
+    response = _signup(app)
+
+    assert response.status_code == 201
+    assert (_count(UserDirectory), _count(UserEvent)) == (1, 1)
+    assert retry_counters.snapshot()["recovered"] == 1
+
+
+def test_create_user_is_not_rerun_after_a_lost_connection(app, monkeypatch) -> None:
+    _fail_once(monkeypatch, "record_users_created", 2013)
+
+    response = _signup(app)
+
+    assert response.status_code == 500
+    assert (_count(UserDirectory), _count(UserEvent)) == (0, 0)
+    assert retry_counters.snapshot()["retries"] == {}
+
+
+def test_bulk_chunks_recover_from_a_deadlock(app, make_user, monkeypatch) -> None:
+    app.config["USER_BULK_BATCH_SIZE"] = 2
+    ids = [make_user().id for _ in range(3)]
+    _fail_once(monkeypatch, "record_active_change", 1205)
+
+    body, _ = user_service.bulk_set_active({"is_active": False, "ids": ids})
+
+    assert (body["updated"], body["batches"]) == (3, 2)
+    assert _count(UserEvent) == 3
+    assert retry_counters.snapshot()["retries"] == {1205: 1}
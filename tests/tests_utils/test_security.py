@@ -0,0 +1,89 @@
+# tests/tests_utils/test_security.py
+
+import bcrypt
+import pytest
+
+from app.utils.security import (
+    calibrate_rounds,
+    check_password,
+    hash_password,
+    hash_rounds,
+    verify_and_update,
+)
+
+
+def test_hash_and_check_password() -> None:
+    hashed = hash_password("correct horse", rounds=4)
+
+    assert hash_rounds(hashed) == 4
+    assert check_password("correct horse", hashed)
+    assert not check_password("wrong horse", hashed)
+    assert not check_password("correct horse", "not-a-hash")
+
+
+@pytest.mark.parametrize("hashed", ["not-a-hash", "$2b$xx$abc", "plain$text"])
+def test_hash_rounds_of_non_bcrypt_values(hashed) -> None:
+    assert hash_rounds(hashed) is None
+
+
+def test_verify_and_update_keeps_hash_at_target_cost() -> None:
+    hashed = hash_password("correct horse", rounds=4)
+
+    assert verify_and_update("correct horse", hashed, rounds=4) == (True, None)
+
+
+def test_verify_and_update_rehashes_other_costs() -> None:
+    hashed = hash_password("correct horse", rounds=5)
+
+    verified, new_hash = verify_and_update("correct horse", hashed, rounds=4)
+
+    assert verified
+    assert hash_rounds(new_hash) == 4
+    assert check_password("correct horse", new_hash)
+
+
+@pytest.mark.parametrize("hashed", [None, "not-a-hash"])
+def test_verify_and_update_failures(hashed) -> None:
+    assert verify_and_update("correct horse", hashed, rounds=4) == (False, None)
+
+
+def test_verify_and_update_wrong_password_is_not_rehashed() -> None:
+    hashed = hash_password("correct horse", rounds=5)
+
+    assert verify_and_update("wrong horse", hashed, rounds=4) == (False, None)
+
+
+def test_calibrate_rounds_picks_highest_cost_within_target(mocker) -> None:
+    """Simulated hashing doubles in cost per round: 10 ms at cost 10."""
+    clock = iter(range(10**6))
+    costs = []
+    mocker.patch(
+        "app.utils.security.bcrypt.hashpw",
+        side_effect=lambda password, salt: costs.append(int(salt.split(b"$")[2])),
+    )
+
+    def perf_counter():
+        # Every hash call sits between two clock reads
+        step = next(clock)
+        if step % 2 == 0:
+            return 0.0
+        return 0.010 * 2 ** (costs[-1] - 10)
+
+    mocker.patch("app.utils.security.time.perf_counter", side_effect=perf_counter)
+
+    rounds, timings = calibrate_rounds(0.1, min_rounds=10, max_rounds=16, samples=1)
+
+    assert rounds == 13
+    assert list(timings) == [10, 11, 12, 13, 14]
+
+
+def test_calibrate_rounds_never_goes_below_minimum() -> None:
+    rounds, timings = calibrate_rounds(0.0, min_rounds=4, max_rounds=6, samples=1)
+
+    assert rounds == 4
+    assert list(timings) == [4]
+
+
+def test_bcrypt_prefix_is_2b() -> None:
+    """hash_rounds relies on the $2b$<cost>$ layout produced by bcrypt."""
+    assert bcrypt.gensalt(rounds=4).startswith(b"$2b$04$")
@@ -0,0 +1,91 @@
+# tests/tests_utils/test_snapshot_cache.py
+
+import os
+import stat
+
+from app.utils.snapshot_cache import SnapshotCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_get_put_and_lru_eviction() -> None:
+    cache = SnapshotCache(capacity=2, ttl=60)
+    cache.put(1, "a")
+    cache.put(2, "b")
+    cache.get(1)
+    cache.put(3, "c")
+
+    assert cache.get(2) is None
+    assert (cache.get(1), cache.get(3)) == ("a", "c")
+    assert (cache.hits, cache.misses) == (3, 1)
+
+
+def test_entries_expire() -> None:
+    clock = FakeClock()
+    cache = SnapshotCache(capacity=10, ttl=60, clock=clock)
+    cache.put(1, "a")
+
+    clock.now += 60
+
+    assert cache.get(1) is None
+    assert len(cache) == 0
+
+
+def test_invalidate() -> None:
+    cache = SnapshotCache(capacity=10, ttl=60)
+    cache.put(1, "a")
+    cache.put(2, "b")
+
+    cache.invalidate([1, 99])
+
+    assert cache.get(1) is None
+    assert cache.get(2) == "b"
+
+
+def test_save_and_load_keep_the_hottest_entries(tmp_path) -> None:
+    clock = FakeClock()
+    path = str(tmp_path / "users.snapshot")
+    cache = SnapshotCache(capacity=10, ttl=60, clock=clock)
+    for key in range(5):
+        cache.put(key, {"id": key})
+    cache.get(0)
+
+    assert cache.save(path, limit=3) == 3
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    clock.now += 30
+    warm = SnapshotCache(capacity=10, ttl=60, clock=clock)
+    assert warm.load(path) == 3
+    assert [key for key, _, _ in warm.hottest(10)] == [0, 4, 3]
+    assert warm.get(0) == {"id": 0}
+
+    # Entries keep their fetch time, so they still expire on schedule
+    clock.now += 30
+    assert warm.get(4) is None
+
+
+def test_load_without_a_usable_snapshot(tmp_path) -> None:
+    cache = SnapshotCache(capacity=10, ttl=60)
+    corrupt = tmp_path / "corrupt.snapshot"
+    corrupt.write_bytes(b"not zlib")
+
+    assert cache.load(str(tmp_path / "missing.snapshot")) == 0
+    assert cache.load(str(corrupt)) == 0
+    assert len(cache) == 0
+
+
+def test_clear() -> None:
+    cache = SnapshotCache(capacity=10, ttl=60)
+    cache.put(1, "a")
+    cache.put(2, "b")
+
+    cache.clear()
+
+    assert len(cache) == 0
+    assert cache.get(1) is None
@@ -0,0 +1,152 @@
+# tests/tests_utils/test_tracing.py
+
+import json
+
+import pytest
+from flask import Flask
+from marshmallow import Schema, fields
+from sqlalchemy import create_engine, text
+
+from app.utils.endpoint import endpoint
+from app.utils.error_handlers import register_error_handlers
+from app.utils.tracing import (
+    FileExporter,
+    Tracer,
+    parse_traceparent,
+    register_tracing,
+    span,
+)
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+PARENT_ID = "00f067aa0ba902b7"
+
+
+class ListExporter:
+    def __init__(self) -> None:
+        self.traces = []
+
+    def export(self, spans) -> None:
+        self.traces.append(spans)
+
+
+class ItemSchema(Schema):
+    id = fields.Int()
+    total = fields.Int()
+
+
+def _by_name(spans):
+    return {s["name"]: s for s in spans}
+
+
+@pytest.fixture
+def exporter():
+    return ListExporter()
+
+
+@pytest.fixture
+def app(exporter):
+    app = Flask(__name__)
+    app.config["TRACE_SAMPLE_RATE"] = 1.0
+    register_tracing(app, exporter=exporter)
+    register_error_handlers(app)
+    engine = create_engine("sqlite://")
+
+    @app.get("/items/<int:item_id>")
+    @endpoint(dump=ItemSchema())
+    def get_item(item_id):
+        with engine.connect() as conn:
+            total = conn.execute(text("SELECT 40 + 2")).scalar()
+        return {"id": item_id, "total": total}
+
+    @app.get("/broken")
+    @endpoint()
+    def broken():
+        with engine.connect() as conn:
+            conn.execute(text("SELECT * FROM missing"))
+
+    yield app
+    engine.dispose()
+
+
+def test_parse_traceparent() -> None:
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-01") == (
+        TRACE_ID,
+        PARENT_ID,
+        True,
+    )
+    assert parse_traceparent(f"00-{TRACE_ID}-{PARENT_ID}-00")[2] is False
+    assert parse_traceparent(f"00-{'0' * 32}-{PARENT_ID}-01") is None
+    assert parse_traceparent("garbage") is None
+    assert parse_traceparent(None) is None
+
+
+def test_request_spans_nest_down_to_statements(app, exporter) -> None:
+    response = app.test_client().get("/items/7")
+
+    assert response.get_json() == {"id": 7, "total": 42}
+    [spans] = exporter.traces
+    named = _by_name(spans)
+    root = named["GET /items/<int:item_id>"]
+    assert root["parent_id"] is None
+    assert root["attributes"]["status"] == 200
+    assert named["view get_item"]["parent_id"] == root["span_id"]
+    assert named["dump ItemSchema"]["parent_id"] == root["span_id"]
+    statement = named["db SELECT"]
+    assert statement["parent_id"] == named["view get_item"]["span_id"]
+    assert statement["attributes"]["statement"] == "SELECT 40 + 2"
+    assert {s["trace_id"] for s in spans} == {root["trace_id"]}
+
+
+def test_errors_are_recorded_on_their_spans(app, exporter) -> None:
+    response = app.test_client().get("/broken")
+
+    assert response.status_code == 500
+    named = _by_name(exporter.traces[0])
+    assert named["db SELECT"]["error"] == "OperationalError"
+    assert named["view broken"]["error"] == "OperationalError"
+    assert named["GET /broken"]["attributes"]["status"] == 500
+
+
+def test_incoming_trace_context_is_joined(app, exporter) -> None:
+    client = app.test_client()
+
+    client.get("/items/1", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-01"})
+    client.get("/items/2", headers={"traceparent": f"00-{TRACE_ID}-{PARENT_ID}-00"})
+
+    [spans] = exporter.traces
+    root = _by_name(spans)["GET /items/<int:item_id>"]
+    assert (root["trace_id"], root["parent_id"]) == (TRACE_ID, PARENT_ID)
+
+
+def test_unsampled_requests_record_nothing(app, exporter) -> None:
+    app.extensions["tracer"].sample_rate = 0.0
+
+    assert app.test_client().get("/items/1").status_code == 200
+    assert exporter.traces == []
+    with span("outside a request") as current:
+        assert current is None
+
+
+def test_register_tracing_needs_a_destination() -> None:
+    app = Flask(__name__)
+
+    register_tracing(app)
+
+    assert "tracer" not in app.extensions
+    assert not app.before_request_funcs
+
+
+def test_file_exporter_appends_json_lines(tmp_path) -> None:
+    path = tmp_path / "spans.jsonl"
+    tracer = Tracer(FileExporter(str(path)), sample_rate=1.0)
+
+    for name in ("first", "second"):
+        with tracer.start(name) as root:
+            with span("child"):
+                pass
+            assert root.name == name
+
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    assert [s["name"] for s in spans] == ["child", "first", "child", "second"]
+    assert spans[0]["parent_id"] == spans[1]["span_id"]
+    assert spans[1]["duration_ms"] >= spans[0]["duration_ms"]
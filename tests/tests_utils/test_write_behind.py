@@ -0,0 +1,80 @@
+# tests/tests_utils/test_write_behind.py
+
+import threading
+
+from app.utils.write_behind import WriteBehindBuffer
+
+
+def test_put_coalesces_per_key() -> None:
+    batches = []
+    buffer = WriteBehindBuffer(batches.append, interval=60)
+
+    buffer.put(1, 10)
+    buffer.put(1, 30)
+    buffer.put(1, 20)
+    buffer.put(2, 5)
+
+    assert len(buffer) == 2
+    assert buffer.flush() == 2
+    assert batches == [{1: 30, 2: 5}]
+    assert buffer.flush() == 0
+    buffer.stop()
+
+
+def test_size_threshold_wakes_the_flush_thread() -> None:
+    flushed = threading.Event()
+    batches = []
+
+    def flush(batch):
+        batches.append(batch)
+        flushed.set()
+
+    buffer = WriteBehindBuffer(flush, interval=60, max_pending=3)
+    for key in range(3):
+        buffer.put(key, key)
+
+    assert flushed.wait(5)
+    assert batches == [{0: 0, 1: 1, 2: 2}]
+    buffer.stop()
+
+
+def test_failed_flush_is_retried_with_newer_values() -> None:
+    calls = []
+
+    def flush(batch):
+        calls.append(dict(batch))
+        if len(calls) == 1:
+            raise RuntimeError("database is down")
+
+    buffer = WriteBehindBuffer(flush, interval=60)
+    buffer.put(1, 10)
+
+    assert buffer.flush() == 0
+    buffer.put(1, 20)
+    buffer.put(2, 5)
+    assert buffer.flush() == 2
+    assert calls == [{1: 10}, {1: 20, 2: 5}]
+    buffer.stop()
+
+
+def test_failed_flush_drops_writes_beyond_the_cap() -> None:
+    def flush(batch):
+        raise RuntimeError("database is down")
+
+    buffer = WriteBehindBuffer(flush, interval=60, max_pending=1)
+    for key in range(20):
+        buffer._pending[key] = key
+
+    buffer.flush()
+
+    assert len(buffer) == 0
+
+
+def test_stop_flushes_pending_writes() -> None:
+    batches = []
+    buffer = WriteBehindBuffer(batches.append, interval=60)
+    buffer.put("a", 1)
+
+    assert buffer.stop() == 1
+    assert batches == [{"a": 1}]
+    assert not buffer._thread.is_alive()
@@ -61,7 +61,9 @@ module "eks" {
   service_port        = 8080
   service_target_port = 5001
   env_from_secrets = [
-    "${local.env}-${local.stack_name}-db-credentials"
+    "${local.env}-${local.stack_name}-db-credentials",
+    # JWT_SECRET_KEY, which signs login tokens; the app refuses to start without it
+    "${local.env}-${local.stack_name}-jwt-secret"
   ]
   readiness_probe_path = "/${local.microservice_type}/${local.stack_name}/health"
   liveness_probe_path  = "/${local.microservice_type}/${local.stack_name}/health"